@@ -0,0 +1,76 @@
+"""
+Micro-benchmark : connexions ouvertes à chaque ouverture de fenêtre.
+
+Rejoue les accès base d'une ouverture de GestionDepenses (PeriodeManager, DatabaseManager,
+liste des contacts, lignes et totaux de la période) sur une copie de la base, de deux façons :
+- "avant" : chaque instanciation de DatabaseManager abandonne la connexion, comme le faisait
+  l'ancien __init__ (simulé par close_connection()) ;
+- "après" : le gestionnaire garde sa connexion d'écriture d'une fenêtre à l'autre.
+
+Usage : python benchmarks/bench_connexions.py [--db data/mlbdd.db] [--ouvertures 200]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from constants import DB_CONFIG
+from database import DatabaseManager
+
+
+def ouvrir_fenetre(db_file, ancien):
+    """Accès base d'une ouverture de GestionDepenses ; retourne le gestionnaire utilisé."""
+    for _ in range(2):  # PeriodeManager() puis DatabaseManager("data/mlbdd.db")
+        db = DatabaseManager(db_file)
+        if ancien:
+            db.close_connection()
+        mois, annee = db.load_periode()
+    db.fetch_all("SELECT DISTINCT nom FROM contacts ORDER BY nom ASC")
+    db.fetch_depenses_periode(1, annee, as_tuples=True)
+    db.get_totaux_periode("depense", 1, annee)
+    return db
+
+
+def mesurer(db_file, ouvertures, ancien):
+    db = DatabaseManager(db_file)
+    db.close_connection()
+    depart = db.connexions_ouvertes
+    debut = time.perf_counter()
+    for _ in range(ouvertures):
+        ouvrir_fenetre(db_file, ancien)
+    duree = time.perf_counter() - debut
+    return db.connexions_ouvertes - depart, duree
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Connexions économisées par ouverture de fenêtre.")
+    parser.add_argument("--db", default=DB_CONFIG["DEFAULT_PATH"], help="Base à copier pour la mesure")
+    parser.add_argument("--ouvertures", type=int, default=200, help="Nombre d'ouvertures de fenêtre simulées")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        copie = os.path.join(dossier, "bench.db")
+        source = sqlite3.connect(args.db)
+        with sqlite3.connect(copie) as destination:
+            source.backup(destination)
+        source.close()
+
+        # Les messages de connexion de DatabaseManager faussent la mesure
+        sortie, sys.stdout = sys.stdout, open(os.devnull, "w")
+        try:
+            resultats = {ancien: mesurer(copie, args.ouvertures, ancien) for ancien in (True, False)}
+        finally:
+            sys.stdout.close()
+            sys.stdout = sortie
+        DatabaseManager().close_connection()
+
+    for ancien, libelle in ((True, "avant"), (False, "après")):
+        connexions, duree = resultats[ancien]
+        print(f"{libelle:6} : {connexions / args.ouvertures:.2f} connexion(s) par ouverture, "
+              f"{duree / args.ouvertures * 1000:.3f} ms par ouverture")
+    economie = (resultats[True][0] - resultats[False][0]) / args.ouvertures
+    print(f"Connexions économisées : {economie:.2f} par ouverture de fenêtre")
@@ -0,0 +1,58 @@
+"""
+Benchmark : débit de l'export PDF par lot (utils/export_lot.py) selon le nombre de processus.
+
+Sur une copie de la base dont une année est grossie de dépenses fictives, rend les 17 PDF
+de l'année (12 mois, 4 trimestres, synthèse) avec 1, 2, 4... processus et affiche la durée
+totale, le débit et l'accélération par rapport à un seul processus. L'accélération est
+bornée par le nombre de cœurs (os.cpu_count()) et par le plus gros rapport (trimestre).
+
+Usage : python benchmarks/bench_export_lot.py [--db data/mlbdd.db] [--lignes 24000] [--processus 1 2 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from constants import DB_CONFIG, PDF_CONFIG
+from database import DatabaseManager
+from utils.backup import copier_base
+from utils.cache_rapports import CacheRapports
+from utils.export_lot import exporter_lot, taches_export
+
+ANNEE = 2031  # Année vide dans la base réelle
+
+
+def preparer_base(source, dest, lignes):
+    copier_base(source, dest)
+    db = DatabaseManager(dest)
+    db.insert_depenses_bulk([
+        (f"{ANNEE}-{i % 12 + 1:02d}-{i % 28 + 1:02d}", f"Fournisseur {i % 500}", round(i * 1.37 % 2000, 2),
+         20.0, round(i * 1.37 % 2000 / 6, 2), "Oui", "")
+        for i in range(lignes)
+    ], fetch_rows=False)
+    db.close_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Débit de l'export PDF par lot.")
+    parser.add_argument("--db", default=DB_CONFIG["DEFAULT_PATH"], help="Base à copier pour la mesure")
+    parser.add_argument("--lignes", type=int, default=24000, help="Dépenses fictives de l'année")
+    parser.add_argument("--processus", type=int, nargs="+", default=[1, 2, 4], help="Tailles de pool comparées")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cœur(s)")
+    with tempfile.TemporaryDirectory() as dossier:
+        base = os.path.join(dossier, "base.db")
+        preparer_base(args.db, base, args.lignes)
+        taches = taches_export(1, ANNEE, 12, ANNEE)
+        reference = None
+        cache = CacheRapports.instance(os.path.join(dossier, PDF_CONFIG["CACHE_DOSSIER"]))
+        for processus in args.processus:
+            cache.vider()  # Chaque mesure rend tous les PDF
+            resultat = exporter_lot(taches, os.path.join(dossier, f"pdf_{processus}"), base, processus)
+            reference = reference or resultat["duree"]
+            rendu = sum(duree for _, duree in resultat["fichiers"])
+            print(f"{processus:2} processus : {resultat['duree']:6.1f} s, {len(taches) / resultat['duree']:5.2f} PDF/s, "
+                  f"rendu cumulé {rendu:6.1f} s, accélération x{reference / resultat['duree']:.2f}")
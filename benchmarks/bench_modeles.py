@@ -0,0 +1,89 @@
+"""
+Benchmark : coût des exports PDF avec et sans l'encodage ASCII85 des flux.
+
+Enchaîne des exports identiques (rapport fiscal d'un petit mois, cache des rapports
+désactivé, et rapport des fournisseurs à régler), avec le registre des modèles du
+processus, une fois avec rl_config.useA85 = 1 (réglage par défaut de ReportLab) et une
+fois avec rl_config.useA85 = 0 (réglage de pdf_modeles.py). La préparation seule
+(couleurs des styles, logo dessiné dans un document vide) est aussi mesurée séparément.
+
+Usage : python benchmarks/bench_modeles.py [--db data/mlbdd.db] [--exports 50]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from reportlab import rl_config
+from reportlab.pdfgen import canvas
+
+from constants import DB_CONFIG
+from database import DatabaseManager
+from pdf_generator import PDFGenerator
+from pdf_modeles import STYLES, STYLES_TABLEAUX, RegistreModeles
+from utils.backup import copier_base
+
+MOIS, ANNEE = 1, 2025
+
+
+def preparer(registre):
+    """Objets de préparation d'un export : couleurs des styles et logo dessiné dans un document."""
+    for style in STYLES.values():
+        registre.couleur(style["couleur"])
+    for style in STYLES_TABLEAUX.values():
+        registre.couleur(style["entete_fond"])
+        registre.couleur(style["entete_texte"])
+        registre.couleur(style["total_fond"])
+    logo = registre.chemin_image("logo")
+    if logo:
+        c = canvas.Canvas(io.BytesIO())
+        registre.dessiner_image(c, logo, 0, 0, 100, 100)
+
+
+def mesurer(exports, use_a85, action):
+    """:return: Durée moyenne d'un export en ms, avec rl_config.useA85 = use_a85."""
+    precedent, rl_config.useA85 = rl_config.useA85, use_a85
+    try:
+        action()  # Registre du processus rempli, comme après le premier export
+        debut = time.perf_counter()
+        for _ in range(exports):
+            action()
+        return (time.perf_counter() - debut) * 1000 / exports
+    finally:
+        rl_config.useA85 = precedent
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Coût des exports PDF avec et sans ASCII85.")
+    parser.add_argument("--db", default=DB_CONFIG["DEFAULT_PATH"], help="Base à copier pour la mesure")
+    parser.add_argument("--exports", type=int, default=50, help="Exports par mesure")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        base = os.path.join(dossier, "base.db")
+        copier_base(args.db, base)
+        db = DatabaseManager(base)
+        lignes = db.fetch_all("SELECT id, date, fournisseur, ttc FROM depenses WHERE validation != 'Oui'", as_tuples=True)
+        donnees = [["ID", "Date", "Fournisseur", "TTC"]] + [[str(l[0]), str(l[1]), str(l[2]), str(l[3])] for l in lignes]
+        sortie = os.path.join(dossier, "rapport.pdf")
+        partage = RegistreModeles.instance()  # Registre du processus, comme dans l'application
+        logo = "avec" if partage.chemin_image("logo") else "sans"
+        print(f"{args.exports} exports, logo : {logo}")
+
+        mesures = {
+            "préparation seule": lambda: preparer(partage),
+            "rapport fiscal": lambda: PDFGenerator(db, cache=False, registre=partage).generate_ddf(
+                MOIS, ANNEE, sortie),
+            "fournisseurs à régler": lambda: PDFGenerator(db, cache=False, registre=partage).generate_pdf(
+                donnees, sortie),
+        }
+        for nom, action in mesures.items():
+            ascii85 = mesurer(args.exports, 1, action)
+            binaire = mesurer(args.exports, 0, action)
+            print(f"{nom:22} : ASCII85 {ascii85:7.2f} ms, binaire {binaire:7.2f} ms "
+                  f"({binaire - ascii85:+.2f} ms par export)")
+        db.close_connection()
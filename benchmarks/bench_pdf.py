@@ -0,0 +1,90 @@
+"""
+Benchmark : durée et mémoire du rapport fiscal PDF selon le nombre de lignes du mois.
+
+Compare, sur une copie de la base dont un mois est grossi de dépenses fictives :
+- le moteur en flux de pdf_generator.py (RapportFlux, lignes lues par lots) ;
+- la mise en page Platypus d'origine : toutes les lignes formatées en liste, puis un
+  seul Table construit par SimpleDocTemplate.build.
+La durée est mesurée sans instrumentation, la mémoire de pointe dans un second passage
+sous tracemalloc.
+
+Usage : python benchmarks/bench_pdf.py [--db data/mlbdd.db] [--lignes 5000 10000 20000] [--sans-platypus]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+
+from constants import DB_CONFIG
+from database import DatabaseManager
+from pdf_generator import PDFGenerator
+from utils.backup import copier_base
+
+MOIS, ANNEE = 6, 2031  # Mois vide dans la base réelle
+
+
+def preparer_base(source, dest, lignes):
+    copier_base(source, dest)
+    db = DatabaseManager(dest)
+    db.insert_depenses_bulk([
+        (f"{ANNEE}-{MOIS:02d}-{i % 30 + 1:02d}", f"Fournisseur {i % 500}", round(i * 1.37 % 2000, 2),
+         20.0, round(i * 1.37 % 2000 / 6, 2), "Oui", "")
+        for i in range(lignes)
+    ], fetch_rows=False)
+    return db
+
+
+def rapport_platypus(db, chemin):
+    """Mise en page d'origine du tableau des dépenses : une liste complète, un seul Table."""
+    generateur = PDFGenerator(db, cache=False)
+    donnees = [['Date', 'Fournisseur', 'TTC', 'Taux TVA', 'TVA']]
+    for depense in db.fetch_depenses_periode(MOIS, ANNEE):
+        donnees.append([generateur.format_date(depense['date']), depense['fournisseur'],
+                        f"{generateur.safe_float(depense['ttc']):.2f} €", f"{depense['tva_id']}%",
+                        f"{generateur.safe_float(depense['montant_tva']):.2f} €"])
+    table = Table(donnees, colWidths=[1.2*inch, 2.5*inch, 1.2*inch, 1*inch, 1.2*inch], repeatRows=1)
+    table.setStyle(TableStyle([('GRID', (0, 0), (-1, -1), 1, colors.black), ('FONTSIZE', (0, 0), (-1, -1), 10)]))
+    SimpleDocTemplate(chemin, pagesize=A4, pageCompression=1).build([table])
+
+
+def mesurer(fonction):
+    db = DatabaseManager()
+    db.cache.vider()
+    debut = time.perf_counter()
+    fonction()
+    duree = time.perf_counter() - debut
+    db.cache.vider()
+    tracemalloc.start()
+    fonction()
+    pointe = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return duree, pointe
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Durée et mémoire du rapport fiscal PDF.")
+    parser.add_argument("--db", default=DB_CONFIG["DEFAULT_PATH"], help="Base à copier pour la mesure")
+    parser.add_argument("--lignes", type=int, nargs="+", default=[5000, 10000, 20000], help="Dépenses du mois")
+    parser.add_argument("--sans-platypus", action="store_true", help="Ne mesure que le moteur en flux")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        for lignes in args.lignes:
+            db = preparer_base(args.db, os.path.join(dossier, f"base_{lignes}.db"), lignes)
+            sortie = os.path.join(dossier, "rapport.pdf")
+            duree, pointe = mesurer(lambda: PDFGenerator(db, cache=False).generate_ddf(MOIS, ANNEE, sortie))
+            print(f"{lignes:6} lignes | flux     : {duree * 1000:7.0f} ms, {pointe / 1e6:6.1f} Mo en pointe, "
+                  f"{os.path.getsize(sortie) / 1e6:.2f} Mo")
+            if not args.sans_platypus:
+                duree, pointe = mesurer(lambda: rapport_platypus(db, sortie))
+                print(f"{lignes:6} lignes | platypus : {duree * 1000:7.0f} ms, {pointe / 1e6:6.1f} Mo en pointe")
+            db.close_connection()
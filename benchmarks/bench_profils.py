@@ -0,0 +1,97 @@
+"""
+Benchmark : effet des profils de performance SQLite (constants.DB_PROFILS).
+
+Pour chaque profil, sur une copie de la base grossie de dépenses fictives, reconstruite
+(VACUUM) avant la mesure :
+- chargement des 12 mois d'une année (lignes et totaux), connexion fraîchement ouverte ;
+- rechargement des mêmes mois, cache de résultats vidé (cache de pages SQLite chaud) ;
+- parcours complet de la table (fournisseurs à régler), limité par les lectures de pages ;
+- insertion massive par insert_depenses_bulk, en lots d'une transaction chacun.
+
+Usage : python benchmarks/bench_profils.py [--db data/mlbdd.db] [--lignes 200000] [--insertions 100000]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from constants import DB_CONFIG, DB_PROFILS
+from database import DatabaseManager
+from utils.backup import copier_base
+from utils.maintenance import reconstruire_base
+
+ANNEE = 2024
+TAILLE_LOT = 5000
+
+
+def depenses_fictives(nombre, annee=ANNEE):
+    return [
+        (f"{annee}-{i % 12 + 1:02d}-{i % 28 + 1:02d}", f"Fournisseur {i % 200}", round(i * 1.37 % 2000, 2),
+         20.0, round(i * 1.37 % 2000 / 6, 2), "Oui" if i % 3 else "Non", "Facture n° %d" % i)
+        for i in range(nombre)
+    ]
+
+
+def preparer_base(source, dest, lignes):
+    """Copie la base et y ajoute des dépenses fictives sur une année (totaux tenus par les triggers)."""
+    copier_base(source, dest)
+    db = DatabaseManager(dest)
+    db.insert_depenses_bulk(depenses_fictives(lignes), fetch_rows=False)
+    db.close_connection()
+
+
+def charger_annee(db):
+    debut = time.perf_counter()
+    for mois in range(1, 13):
+        db.fetch_depenses_periode(mois, ANNEE, as_tuples=True)
+        db.fetch_recettes_periode(mois, ANNEE, as_tuples=True)
+        db.get_totaux_periode("depense", mois, ANNEE)
+    return time.perf_counter() - debut
+
+
+def mesurer_profil(base, nom, insertions):
+    db = DatabaseManager(base)
+    db.appliquer_profil(nom)
+    reconstruire_base(db)
+    db.close_connection()
+    db.cache.vider()
+    premier = charger_annee(db)
+    db.cache.vider()
+    second = charger_annee(db)
+    debut = time.perf_counter()
+    db.fetch_all("SELECT id, date, fournisseur, ttc FROM depenses WHERE validation != 'Oui'", as_tuples=True)
+    parcours = time.perf_counter() - debut
+    lignes = depenses_fictives(insertions, ANNEE + 1)
+    debut = time.perf_counter()
+    for i in range(0, len(lignes), TAILLE_LOT):
+        db.insert_depenses_bulk(lignes[i:i + TAILLE_LOT], fetch_rows=False)
+    insertion = time.perf_counter() - debut
+    db.close_connection()
+    return premier, second, parcours, insertion
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Effet des profils de performance SQLite.")
+    parser.add_argument("--db", default=DB_CONFIG["DEFAULT_PATH"], help="Base à copier pour la mesure")
+    parser.add_argument("--lignes", type=int, default=200000, help="Dépenses fictives ajoutées à la copie")
+    parser.add_argument("--insertions", type=int, default=100000, help="Dépenses insérées par profil")
+    parser.add_argument("--profils", nargs="+", default=list(DB_PROFILS), help="Profils comparés")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        modele = os.path.join(dossier, "modele.db")
+        preparer_base(args.db, modele, args.lignes)
+        print(f"Base : {os.path.getsize(modele) / 1e6:.1f} Mo, SQLite {sqlite3.sqlite_version}")
+        for nom in args.profils:
+            base = os.path.join(dossier, f"{nom}.db")
+            shutil.copy2(modele, base)
+            premier, second, parcours, insertion = mesurer_profil(base, nom, args.insertions)
+            print(f"{nom:15} : 12 mois {premier * 1000:6.0f} ms, rechargement {second * 1000:6.0f} ms, "
+                  f"parcours {parcours * 1000:5.0f} ms | "
+                  f"{args.insertions} insertions {insertion * 1000:6.0f} ms "
+                  f"({args.insertions / insertion:,.0f} lignes/s)")
@@ -0,0 +1,120 @@
+"""
+Benchmark : taille et durée des sauvegardes selon le niveau de compression.
+
+Compare, sur une copie de la base, l'ancienne copie de fichier (shutil.copy2) à
+l'instantané du dépôt de blocs (utils/depot.py) pour plusieurs niveaux de compression :
+- premier instantané (dépôt vide) : durée et octets écrits ;
+- instantané suivant après quelques écritures : durée et octets ajoutés ;
+- restauration : durée de la reconstitution du fichier depuis ses blocs.
+
+Usage : python benchmarks/bench_sauvegarde.py [--db data/mlbdd.db] [--lignes 100000] [--niveaux 0 1 6 9]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from constants import DB_CONFIG
+from utils.backup import copier_base
+from utils.depot import ecrire_instantane, reconstruire
+
+
+def preparer_base(source, dest, lignes):
+    """Copie la base et y ajoute des dépenses fictives pour atteindre une taille représentative."""
+    copier_base(source, dest)
+    conn = sqlite3.connect(dest)
+    conn.executemany(
+        "INSERT INTO depenses (date, fournisseur, ttc, tva_id, montant_tva, validation, commentaire) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            (f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}", f"Fournisseur {i % 200}", round(i * 1.37 % 2000, 2),
+             20.0, round(i * 1.37 % 2000 / 6, 2), "Oui" if i % 3 else "Non", "Facture n° %d" % i)
+            for i in range(lignes)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def modifier_base(chemin):
+    """Quelques écritures, comme une journée de saisie."""
+    conn = sqlite3.connect(chemin)
+    for jour in range(1, 21):
+        conn.execute(
+            "INSERT INTO depenses (date, fournisseur, ttc, tva_id, montant_tva, validation, commentaire) "
+            "VALUES (?, 'Nouveau', 120.0, 20.0, 20.0, 'Non', '')", (f"2025-03-{jour:02d}",)
+        )
+    conn.execute("UPDATE depenses SET validation = 'Oui' WHERE id % 997 = 0")
+    conn.commit()
+    conn.close()
+
+
+def taille_dossier(dossier):
+    return sum(os.path.getsize(os.path.join(racine, f)) for racine, _, fichiers in os.walk(dossier) for f in fichiers)
+
+
+def mesurer_copie(base, dossier):
+    """Ancienne méthode : une copie complète du fichier par sauvegarde."""
+    os.makedirs(dossier)
+    resultats = []
+    for numero in (1, 2):
+        if numero == 2:
+            modifier_base(base)
+        debut = time.perf_counter()
+        shutil.copy2(base, os.path.join(dossier, f"mlbdd_{numero}.db"))
+        resultats.append((time.perf_counter() - debut, taille_dossier(dossier)))
+    return resultats
+
+
+def mesurer_depot(base, dossier, niveau):
+    """Instantanés du dépôt de blocs, copie cohérente comprise, au niveau de compression donné."""
+    os.makedirs(dossier)
+    resultats = []
+    for numero in (1, 2):
+        if numero == 2:
+            modifier_base(base)
+        debut = time.perf_counter()
+        instantane = os.path.join(dossier, "instantane.db")
+        copier_base(base, instantane)
+        ecrire_instantane(instantane, os.path.join(dossier, f"mlbdd_{numero}.manifest"), dossier, niveau=niveau)
+        os.remove(instantane)
+        resultats.append((time.perf_counter() - debut, taille_dossier(dossier)))
+    debut = time.perf_counter()
+    reconstruire(os.path.join(dossier, "mlbdd_2.manifest"), os.path.join(dossier, "restaure.db"), dossier)
+    restauration = time.perf_counter() - debut
+    os.remove(os.path.join(dossier, "restaure.db"))
+    return resultats, restauration
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Taille et durée des sauvegardes selon la compression.")
+    parser.add_argument("--db", default=DB_CONFIG["DEFAULT_PATH"], help="Base à copier pour la mesure")
+    parser.add_argument("--lignes", type=int, default=100000, help="Dépenses fictives ajoutées à la copie")
+    parser.add_argument("--niveaux", type=int, nargs="+", default=[0, 1, 6, 9], help="Niveaux zlib comparés")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        modele = os.path.join(dossier, "modele.db")
+        preparer_base(args.db, modele, args.lignes)
+        print(f"Base : {os.path.getsize(modele) / 1e6:.1f} Mo")
+
+        def essai(nom):
+            base = os.path.join(dossier, f"{nom}.db")
+            shutil.copy2(modele, base)
+            return base, os.path.join(dossier, f"sauvegardes_{nom}")
+
+        base, cible = essai("copie")
+        (t1, o1), (t2, o2) = mesurer_copie(base, cible)
+        print(f"{'shutil.copy2':16} : 1re {t1 * 1000:7.0f} ms {o1 / 1e6:7.2f} Mo | "
+              f"suivante {t2 * 1000:7.0f} ms +{(o2 - o1) / 1e6:7.2f} Mo")
+        for niveau in args.niveaux:
+            base, cible = essai(f"niveau{niveau}")
+            ((t1, o1), (t2, o2)), restauration = mesurer_depot(base, cible, niveau)
+            print(f"{'blocs, niveau ' + str(niveau):16} : 1re {t1 * 1000:7.0f} ms {o1 / 1e6:7.2f} Mo | "
+                  f"suivante {t2 * 1000:7.0f} ms +{(o2 - o1) / 1e6:7.2f} Mo | "
+                  f"reconstitution {restauration * 1000:.0f} ms")
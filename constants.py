@@ -9,19 +9,59 @@ ERROR_MESSAGES = {
     "UPDATE_SUCCESS": "L'élément a été modifié avec succès.",
     "DELETE_SUCCESS": "L'élément a été supprimé avec succès.",
     "NO_SELECTION": "Aucune ligne sélectionnée.",
+    "ARCHIVED_ROW": "Cette écriture appartient à un exercice archivé : elle ne peut plus être modifiée ni supprimée.",
     "INVALID_AMOUNT": "Le montant doit être un nombre valide.",
     "INVALID_TVA": "Le taux de TVA doit être un nombre valide.",
     "DB_CONNECTION": "Connexion à la base de données établie.",
     "DB_CONNECTION_ERROR": "Erreur de connexion à la base de données : {}",
     "PERIODE_LOADED": "Période chargée : {}, {}",
-    "PERIODE_LOAD_ERROR": "Erreur lors du chargement de la période : {}"
+    "PERIODE_LOAD_ERROR": "Erreur lors du chargement de la période : {}",
+    "MIGRATION_ERROR": "Erreur lors de la migration de schéma {} : {}"
 }
 
 # Configuration de la base de données
 DB_CONFIG = {
     "DEFAULT_PATH": "data/mlbdd.db",
     "DEFAULT_MONTH": "Janvier",
-    "DEFAULT_YEAR": "2023"
+    "DEFAULT_YEAR": "2023",
+    "READERS": 2,  # Connexions de lecture des lectures interactives (une par thread de query_service.py)
+    "TACHES_LONGUES": 2,  # Threads des tâches longues (PDF, import, archivage, sauvegarde), chacun avec sa connexion de lecture
+    "CACHE_MAX_MO": 32,  # Taille maximale du cache des lectures par période
+    "PAGE_SIZE": 4096,  # Taille de page d'une base créée : propriété du fichier, commune à tous les postes
+    "PROFIL": "portable"  # Profil de performance SQLite (DB_PROFILS), remplacé par la variable MLTVA_PROFIL
+}
+
+# Profils de performance SQLite appliqués à chaque connexion (voir database.appliquer_pragmas)
+# cache_mo : cache de pages par connexion ; mmap_mo : lecture par projection mémoire (0 : désactivée).
+# Un profil est propre au poste : la taille de page, propre au fichier, est dans DB_CONFIG["PAGE_SIZE"]
+DB_PROFILS = {
+    # Poste local : WAL, projection mémoire, écritures synchronisées aux checkpoints
+    "portable": {
+        "cache_mo": 16, "mmap_mo": 128, "temp_store": "MEMORY", "busy_timeout_ms": 5000,
+        "synchronous": "NORMAL", "journal_mode": "WAL",
+    },
+    # Base sur un partage réseau : ni WAL ni mmap (mémoire partagée non fiable), attente longue des verrous
+    "partage_reseau": {
+        "cache_mo": 32, "mmap_mo": 0, "temp_store": "MEMORY", "busy_timeout_ms": 30000,
+        "synchronous": "FULL", "journal_mode": "DELETE",
+    },
+    # Import massif : gros cache, aucune synchronisation disque (un import interrompu se rejoue)
+    "import_massif": {
+        "cache_mo": 64, "mmap_mo": 256, "temp_store": "MEMORY", "busy_timeout_ms": 5000,
+        "synchronous": "OFF", "journal_mode": "WAL",
+    },
+}
+
+# Rapports PDF (pdf_generator.py)
+PDF_CONFIG = {
+    "CACHE_DOSSIER": "cache_pdf",  # Cache des rapports générés, à côté de la base (utils/cache_rapports.py)
+    "CACHE_MAX_MO": 200,  # Taille maximale du cache, les rapports les moins récemment utilisés sont supprimés
+    "CACHE_MAX_FICHIERS": 500  # Nombre maximal de rapports en cache
+}
+
+# Sauvegardes (utils/backup.py)
+BACKUP_CONFIG = {
+    "NIVEAU_COMPRESSION": 1  # Compression zlib des blocs sauvegardés : 1 (rapide) à 9 (compact), 0 pour désactiver
 }
 
 # Configuration de l'interface
@@ -1,24 +1,289 @@
+import copy
+import os
+import re
 import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
 from sqlite3 import Error
-from constants import DB_CONFIG, ERROR_MESSAGES
+from constants import DB_CONFIG, DB_PROFILS, ERROR_MESSAGES
 
-class DatabaseManager:
-    _instance = None
-    _connection = None
-    _cursor = None
+# Colonnes renvoyées pour une ligne, dans l'ordre des grilles de saisie
+DEPENSES_COLONNES = "id, date, fournisseur, ttc, tva_id, montant_tva, validation, commentaire"
+RECETTES_COLONNES = "id, date, client, paiement, numero_facture, montant, tva, montant_tva, commentaire"
 
-    def __new__(cls, db_file=None):
-        if cls._instance is None:
-            cls._instance = super(DatabaseManager, cls).__new__(cls)
-        return cls._instance
+# Nombre maximal d'identifiants par clause IN (...) (limite de variables SQLite)
+TAILLE_LOT_IN = 500
 
-    def __init__(self, db_file=None):
-        """Initialise la connexion à la base de données."""
+# Invalidation d'une date hors format AAAA-MM-JJ : tout le cache de résultats est vidé
+_TOUT_LE_CACHE = ("*",)
+
+# Tables sources de la table de synthèse totaux_mensuels :
+# type -> (table, colonne du montant TTC, colonne du taux de TVA)
+SOURCES_TOTAUX = {
+    "depense": ("depenses", "ttc", "tva_id"),
+    "recette": ("recettes", "montant", "tva"),
+}
+
+TOTAUX_COLONNES = "annee, mois, type, taux, total_ttc, total_tva, nb_lignes"
+
+
+def totaux_recalcul(schema="main"):
+    """Requête de recalcul complet de totaux_mensuels depuis les lignes brutes d'une base (main ou attachée)."""
+    return "\nUNION ALL\n".join(
+        f"""
+        SELECT CAST(substr(date, 1, 4) AS INTEGER), CAST(substr(date, 6, 2) AS INTEGER), '{type_}',
+               COALESCE({taux}, 0), COALESCE(SUM({ttc}), 0), COALESCE(SUM(montant_tva), 0), COUNT(*)
+        FROM {schema}.{table}
+        GROUP BY 1, 2, 4
+        """
+        for type_, (table, ttc, taux) in SOURCES_TOTAUX.items()
+    )
+
+
+TOTAUX_RECALCUL = totaux_recalcul()
+
+# Archives des exercices clos : <dossier de la base>/archive/mlbdd_<année>.db, même schéma
+# pour depenses, recettes et totaux_mensuels (voir DatabaseManager.archiver_annee)
+ARCHIVE_DOSSIER = "archive"
+TABLES_ARCHIVEES = {
+    "depenses": DEPENSES_COLONNES,
+    "recettes": RECETTES_COLONNES,
+    "totaux_mensuels": TOTAUX_COLONNES,
+}
+# Lignes laissées dans la base à l'archivage : une dépense non réglée doit rester modifiable
+# et dans les fournisseurs à régler
+ARCHIVAGE_CONDITIONS = {"depenses": " AND validation = 'Oui'", "recettes": ""}
+# Archives attachées au plus à une connexion (SQLite en autorise 10 par défaut)
+MAX_ARCHIVES_ATTACHEES = 8
+
+
+def _triggers_totaux(type_):
+    """Génère les triggers qui tiennent totaux_mensuels à jour pour une table source."""
+    table, ttc, taux = SOURCES_TOTAUX[type_]
+
+    def ajout(ligne):
+        return f"""
+        INSERT INTO totaux_mensuels (annee, mois, type, taux, total_ttc, total_tva, nb_lignes)
+        VALUES (CAST(substr({ligne}.date, 1, 4) AS INTEGER), CAST(substr({ligne}.date, 6, 2) AS INTEGER),
+                '{type_}', COALESCE({ligne}.{taux}, 0), COALESCE({ligne}.{ttc}, 0),
+                COALESCE({ligne}.montant_tva, 0), 1)
+        ON CONFLICT (annee, mois, type, taux) DO UPDATE SET
+            total_ttc = total_ttc + excluded.total_ttc,
+            total_tva = total_tva + excluded.total_tva,
+            nb_lignes = nb_lignes + 1;"""
+
+    def retrait(ligne):
+        cle = (f"annee = CAST(substr({ligne}.date, 1, 4) AS INTEGER) "
+               f"AND mois = CAST(substr({ligne}.date, 6, 2) AS INTEGER) "
+               f"AND type = '{type_}' AND taux = COALESCE({ligne}.{taux}, 0)")
+        return f"""
+        UPDATE totaux_mensuels SET
+            total_ttc = total_ttc - COALESCE({ligne}.{ttc}, 0),
+            total_tva = total_tva - COALESCE({ligne}.montant_tva, 0),
+            nb_lignes = nb_lignes - 1
+        WHERE {cle};
+        DELETE FROM totaux_mensuels WHERE {cle} AND nb_lignes <= 0;"""
+
+    return f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_totaux_insert AFTER INSERT ON {table}
+    BEGIN{ajout("NEW")}
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_totaux_delete AFTER DELETE ON {table}
+    BEGIN{retrait("OLD")}
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_totaux_update
+    AFTER UPDATE OF date, {ttc}, {taux}, montant_tva ON {table}
+    BEGIN{retrait("OLD")}{ajout("NEW")}
+    END;
+    """
+
+
+# Migrations de schéma appliquées à la connexion, suivies par PRAGMA user_version.
+# Chaque entrée est un script SQL ; ne jamais modifier une entrée existante,
+# toujours en ajouter une nouvelle à la fin.
+MIGRATIONS = [
+    # 1 : index sur les dates pour les requêtes par période (date >= ? AND date < ?)
+    """
+    CREATE INDEX IF NOT EXISTS idx_depenses_date ON depenses(date);
+    CREATE INDEX IF NOT EXISTS idx_recettes_date ON recettes(date);
+    """,
+    # 2 : table de synthèse totaux_mensuels tenue à jour par triggers
+    """
+    CREATE TABLE IF NOT EXISTS totaux_mensuels (
+        annee INTEGER NOT NULL,
+        mois INTEGER NOT NULL,
+        type TEXT NOT NULL,
+        taux REAL NOT NULL,
+        total_ttc REAL NOT NULL DEFAULT 0,
+        total_tva REAL NOT NULL DEFAULT 0,
+        nb_lignes INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (annee, mois, type, taux)
+    ) WITHOUT ROWID;
+    DELETE FROM totaux_mensuels;
+    INSERT INTO totaux_mensuels (annee, mois, type, taux, total_ttc, total_tva, nb_lignes)
+    """ + TOTAUX_RECALCUL + ";" + _triggers_totaux("depense") + _triggers_totaux("recette"),
+]
+
+
+def profil_performance(nom=None):
+    """
+    Retourne les réglages d'un profil de DB_PROFILS.
+    :param nom: Nom du profil ; par défaut la variable d'environnement MLTVA_PROFIL, sinon DB_CONFIG["PROFIL"].
+    :raise ValueError: Si le profil n'existe pas.
+    """
+    nom = nom or os.environ.get("MLTVA_PROFIL") or DB_CONFIG["PROFIL"]
+    if nom not in DB_PROFILS:
+        raise ValueError(f"Profil de performance inconnu : {nom} (profils : {', '.join(DB_PROFILS)}).")
+    return DB_PROFILS[nom]
+
+
+def appliquer_pragmas(conn, profil, ecriture=True):
+    """
+    Applique un profil de performance à une connexion.
+    :param ecriture: Connexion d'écriture : applique aussi synchronous.
+    """
+    conn.execute(f"PRAGMA cache_size = -{profil['cache_mo'] * 1024}")
+    conn.execute(f"PRAGMA mmap_size = {profil['mmap_mo'] * 1024 * 1024}")
+    conn.execute(f"PRAGMA temp_store = {profil['temp_store']}")
+    conn.execute(f"PRAGMA busy_timeout = {profil['busy_timeout_ms']}")
+    if ecriture:
+        conn.execute(f"PRAGMA synchronous = {profil['synchronous']}")
+
+
+def period_bounds(mois, annee):
+    """
+    Retourne les bornes ISO [début, fin[ d'un mois.
+    :param mois: Numéro du mois (1-12).
+    :param annee: Année (int ou str).
+    :return: Tuple ('AAAA-MM-01', premier jour du mois suivant).
+    """
+    mois, annee = int(mois), int(annee)
+    debut = f"{annee:04d}-{mois:02d}-01"
+    if mois == 12:
+        fin = f"{annee + 1:04d}-01-01"
+    else:
+        fin = f"{annee:04d}-{mois + 1:02d}-01"
+    return debut, fin
+
+
+def bornes_mois(mois_debut, mois_fin, annee):
+    """Bornes ISO [début, fin[ des mois mois_debut à mois_fin (inclus, None : un seul mois) d'une année."""
+    return period_bounds(mois_debut, annee)[0], period_bounds(mois_fin or mois_debut, annee)[1]
+
+
+class CacheResultats:
+    """
+    Cache LRU des lectures par période, partagé par toutes les connexions d'un DatabaseManager.
+
+    Clés : (table, annee, mois, ...) pour les lignes et totaux d'un mois, et
+    ("totaux_mensuels", annee_debut, annee_fin) pour les totaux annuels. Les méthodes
+    d'écriture invalident les mois touchés (invalider()) ; une modification faite par un
+    autre processus est détectée par PRAGMA data_version et vide tout le cache.
+    """
+
+    def __init__(self, max_octets, data_version=None):
+        """
+        :param max_octets: Taille estimée maximale des résultats conservés.
+        :param data_version: Fonction retournant le PRAGMA data_version de la connexion d'écriture.
+        """
+        self.max_octets = max_octets
+        self.data_version = data_version
+        self.hits = 0
+        self.misses = 0
+        self.octets = 0
+        self.generation = 0  # Incrémentée à chaque invalidation
+        self._entrees = OrderedDict()  # clé -> (valeur, taille)
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self, cle):
+        """Retourne (True, copie de la valeur) si la clé est en cache, sinon (False, None)."""
+        if self.data_version is not None:
+            version = self.data_version()
+            if version != self._version:
+                self.vider()
+                self._version = version
+        with self._lock:
+            entree = self._entrees.get(cle)
+            if entree is None:
+                self.misses += 1
+                return False, None
+            self._entrees.move_to_end(cle)
+            self.hits += 1
+            return True, copy.copy(entree[0])
+
+    def put(self, cle, valeur, generation):
+        """Mémorise une valeur lue à la génération donnée ; ignorée si une invalidation a eu lieu depuis."""
+        taille = _taille_estimee(valeur)
+        with self._lock:
+            if generation != self.generation or taille > self.max_octets:
+                return
+            ancienne = self._entrees.pop(cle, None)
+            if ancienne is not None:
+                self.octets -= ancienne[1]
+            self._entrees[cle] = (copy.copy(valeur), taille)
+            self.octets += taille
+            while self.octets > self.max_octets:
+                _, (_, taille_evincee) = self._entrees.popitem(last=False)
+                self.octets -= taille_evincee
+
+    def invalider(self, table, annee, mois):
+        """Supprime les entrées d'un mois d'une table et les totaux annuels qui le couvrent."""
+        with self._lock:
+            self.generation += 1
+            for cle in list(self._entrees):
+                if cle[0] == table and cle[1:3] == (annee, mois) or \
+                        cle[0] == "totaux_mensuels" and cle[1] <= annee <= cle[2]:
+                    self.octets -= self._entrees.pop(cle)[1]
+
+    def vider(self):
+        with self._lock:
+            self.generation += 1
+            self._entrees.clear()
+            self.octets = 0
+
+    def stats(self):
+        """Retourne les compteurs du cache : hits, misses, entrees, octets."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entrees": len(self._entrees), "octets": self.octets}
+
+
+def _taille_estimee(valeur):
+    """Estime l'empreinte mémoire d'un résultat (liste de lignes, dict de totaux ou tuple)."""
+    if isinstance(valeur, dict):
+        return sys.getsizeof(valeur) + sum(_taille_estimee(k) + _taille_estimee(v) for k, v in valeur.items())
+    if isinstance(valeur, (list, tuple, sqlite3.Row)):
+        return sys.getsizeof(valeur) + sum(_taille_estimee(v) for v in valeur)
+    return sys.getsizeof(valeur)
+
+
+class DatabaseReader:
+    """
+    Accès en lecture à la base sur une connexion propre.
+
+    Les requêtes de lecture (périodes, totaux) sont définies ici et partagées par
+    DatabaseManager et par les lecteurs des threads de fond (voir query_service.py),
+    une connexion SQLite ne pouvant pas être utilisée par plusieurs threads.
+    """
+
+    def __init__(self, db_file=None, cache=None, profil=None):
+        """
+        Prépare l'accès à la base ; la connexion est ouverte à la première requête.
+        :param cache: CacheResultats partagé, ou None pour lire sans cache.
+        :param profil: Nom du profil de performance (DB_PROFILS), None pour le profil configuré.
+        """
         if db_file is None:
             db_file = DB_CONFIG["DEFAULT_PATH"]
         self.db_file = db_file
+        self.cache = cache
+        self.profil = profil
         self._conn = None
-        self._cursor = None
+        self._attachees = []  # Années des archives attachées à la connexion, la plus récente en dernier
+        self._archives = (None, ())  # (date de modification du dossier d'archives, années archivées)
 
     @property
     def conn(self):
@@ -27,43 +292,531 @@ class DatabaseManager:
             self._conn = self.create_connection()
         return self._conn
 
-    @property
-    def cursor(self):
-        """Propriété qui gère le Lazy Loading du curseur."""
-        if self._cursor is None:
-            self._cursor = self.conn.cursor()
-        return self._cursor
-
     def create_connection(self):
-        """Crée une connexion à la base de données SQLite."""
+        """Ouvre une connexion en lecture seule ; le schéma est migré par la connexion d'écriture."""
         try:
-            conn = sqlite3.connect(self.db_file)
+            uri = Path(self.db_file).resolve().as_uri() + "?mode=ro"
+            # Utilisée par un seul thread, mais fermée par celui qui ferme la base
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
             conn.row_factory = sqlite3.Row
-            # Optimisation des performances
-            conn.execute("PRAGMA synchronous = NORMAL")
-            conn.execute("PRAGMA journal_mode = WAL")
-            conn.execute("PRAGMA cache_size = -2000")  # 2MB de cache
-            print(ERROR_MESSAGES["DB_CONNECTION"])
+            appliquer_pragmas(conn, profil_performance(self.profil), ecriture=False)
             return conn
         except Error as e:
             print(ERROR_MESSAGES["DB_CONNECTION_ERROR"].format(e))
             return None
 
+    def interrupt(self):
+        """Interrompt la requête en cours sur cette connexion (appelable depuis un autre thread)."""
+        if self._conn is not None:
+            self._conn.interrupt()
+
     def close_connection(self):
         """Ferme la connexion à la base de données."""
-        if self._cursor is not None:
-            self._cursor.close()
-            self._cursor = None
         if self._conn is not None:
             self._conn.close()
             self._conn = None
+        self._attachees = []
+
+    # Archives des exercices clos
+    def chemin_archive(self, annee):
+        return os.path.join(os.path.dirname(os.path.abspath(self.db_file)), ARCHIVE_DOSSIER, f"mlbdd_{int(annee)}.db")
+
+    def annees_archivees(self):
+        """Années archivées dans le dossier d'archives, relu seulement s'il a changé."""
+        dossier = os.path.dirname(self.chemin_archive(0))
+        try:
+            modification = os.stat(dossier).st_mtime_ns
+        except FileNotFoundError:
+            return ()
+        if modification != self._archives[0]:
+            annees = sorted(
+                int(f[6:10]) for f in os.listdir(dossier)
+                if re.fullmatch(r"mlbdd_\d{4}\.db", f)
+            )
+            self._archives = (modification, tuple(annees))
+        return self._archives[1]
+
+    def source(self, table, annee_debut=None, annee_fin=None):
+        """
+        Retourne l'expression SQL à placer après FROM pour lire une table sur des années.
+
+        Sans archive concernée, c'est la table de la base. Sinon les archives nécessaires
+        sont attachées (ATTACH) à la connexion et une vue temporaire UNION ALL de la base et
+        de ces archives est retournée ; les filtres de la requête s'appliquent à chaque partie
+        et utilisent leurs index.
+        :param table: 'depenses', 'recettes' ou 'totaux_mensuels'.
+        :param annee_debut: Première année lue (incluse), None pour toutes.
+        :param annee_fin: Dernière année lue (incluse), None pour toutes.
+        """
+        annees = [
+            a for a in self.annees_archivees()
+            if (annee_debut is None or a >= int(annee_debut)) and (annee_fin is None or a <= int(annee_fin))
+        ]
+        if not annees:
+            return table
+        if len(annees) > MAX_ARCHIVES_ATTACHEES:
+            raise ValueError(f"Lecture limitée à {MAX_ARCHIVES_ATTACHEES} exercices archivés à la fois.")
+        self._attacher(annees)
+        vue = "_".join([table] + [str(a) for a in annees])
+        colonnes = TABLES_ARCHIVEES[table]
+        parties = [f"SELECT {colonnes} FROM main.{table}"]
+        parties += [f"SELECT {colonnes} FROM archive_{a}.{table}" for a in annees]
+        self.conn.execute(f"CREATE TEMP VIEW IF NOT EXISTS {vue} AS " + " UNION ALL ".join(parties))
+        return f"temp.{vue}"
+
+    def _attacher(self, annees):
+        """Attache les archives des années données, en détachant au besoin les moins récemment utilisées."""
+        conn = self.conn
+        for annee in annees:
+            if annee in self._attachees:
+                self._attachees.remove(annee)
+                self._attachees.append(annee)
+                continue
+            if len(self._attachees) >= MAX_ARCHIVES_ATTACHEES:
+                ancienne = next(a for a in self._attachees if a not in annees)
+                self._detacher(ancienne)
+            conn.execute(f"ATTACH DATABASE ? AS archive_{annee}", (self.chemin_archive(annee),))
+            self._attachees.append(annee)
+
+    def _detacher(self, annee):
+        """Détache une archive et supprime les vues temporaires qui la lisent."""
+        conn = self.conn
+        for (vue,) in conn.execute("SELECT name FROM temp.sqlite_master WHERE type = 'view'").fetchall():
+            conn.execute(f"DROP VIEW temp.{vue}")
+        conn.execute(f"DETACH DATABASE archive_{annee}")
+        self._attachees.remove(annee)
+
+    def _select(self, query, params=None, as_tuples=False, one=False):
+        """Exécute une requête SELECT ; les erreurs SQLite sont propagées."""
+        cursor = self.conn.cursor()
+        if as_tuples:
+            cursor.row_factory = None
+        cursor.execute(query, params or ())
+        return cursor.fetchone() if one else cursor.fetchall()
+
+    def _en_cache(self, cle, calcul, defaut):
+        """
+        Retourne le résultat de calcul() via le cache de résultats.
+        :param defaut: Valeur retournée, sans être mise en cache, si la lecture échoue.
+        """
+        if self.cache is None:
+            trouve = False
+        else:
+            trouve, valeur = self.cache.get(cle)
+            generation = self.cache.generation
+        if trouve:
+            return valeur
+        try:
+            valeur = calcul()
+        except Error as e:
+            print(ERROR_MESSAGES["DATABASE_ERROR"])
+            return defaut
+        if self.cache is not None:
+            self.cache.put(cle, valeur, generation)
+        return valeur
+
+    def fetch_all(self, query, params=None, as_tuples=False):
+        """
+        Exécute une requête SELECT et retourne toutes les lignes.
+        :param as_tuples: Retourne des tuples simples au lieu de sqlite3.Row (grilles volumineuses).
+        """
+        try:
+            return self._select(query, params, as_tuples)
+        except Error as e:
+            print(ERROR_MESSAGES["DATABASE_ERROR"])
+            return []
+
+    def fetch_one(self, query, params=None):
+        """Exécute une requête SELECT et retourne une seule ligne."""
+        try:
+            return self._select(query, params, one=True)  # Renvoie une seule ligne
+        except Error as e:
+            print(ERROR_MESSAGES["DATABASE_ERROR"])
+            return None  # Retourne None si une erreur se produit
+
+    def fetch_row_by_id(self, table, row_id):
+        """Retourne une ligne de 'depenses' ou 'recettes' sous forme de tuple, dans l'ordre des grilles."""
+        colonnes = DEPENSES_COLONNES if table == "depenses" else RECETTES_COLONNES
+        rows = self.fetch_all(f"SELECT {colonnes} FROM {table} WHERE id = ?", (row_id,), as_tuples=True)
+        return rows[0] if rows else None
+
+    # Lectures par période
+    def fetch_depenses_periode(self, mois, annee, as_tuples=False):
+        """Retourne les dépenses d'un mois, triées par date (parcours de idx_depenses_date)."""
+        def calcul():
+            query = f"""
+            SELECT {DEPENSES_COLONNES}
+            FROM {self.source("depenses", annee, annee)}
+            WHERE date >= ? AND date < ?
+            ORDER BY date, id
+            """
+            return self._select(query, period_bounds(mois, annee), as_tuples)
+
+        return self._en_cache(("depenses", int(annee), int(mois), "lignes", as_tuples), calcul, [])
+
+    def fetch_recettes_periode(self, mois, annee, as_tuples=False):
+        """Retourne les recettes d'un mois, triées par date (parcours de idx_recettes_date)."""
+        def calcul():
+            query = f"""
+            SELECT {RECETTES_COLONNES}
+            FROM {self.source("recettes", annee, annee)}
+            WHERE date >= ? AND date < ?
+            ORDER BY date, id
+            """
+            return self._select(query, period_bounds(mois, annee), as_tuples)
+
+        return self._en_cache(("recettes", int(annee), int(mois), "lignes", as_tuples), calcul, [])
+
+    # Agrégats lus dans la table de synthèse totaux_mensuels
+    def compter_periode(self, table, mois, annee, mois_fin=None):
+        """
+        Retourne le nombre de lignes de 'depenses' ou 'recettes' d'un mois, ou des mois
+        mois à mois_fin d'une année (parcours de l'index seul).
+        """
+        query = f"SELECT COUNT(*) FROM {self.source(table, annee, annee)} WHERE date >= ? AND date < ?"
+        return self._select(query, bornes_mois(mois, mois_fin, annee), as_tuples=True, one=True)[0]
+
+    def iter_periode(self, table, mois, annee, taille_lot=1000, mois_fin=None):
+        """
+        Parcourt les lignes de 'depenses' ou 'recettes' d'un mois (ou des mois mois à mois_fin)
+        par lots, triées par date, sans les charger toutes en mémoire ni passer par le cache
+        (rapports volumineux).
+        :return: Générateur de listes d'au plus taille_lot tuples, dans l'ordre des grilles.
+        """
+        query = f"""
+        SELECT {TABLES_ARCHIVEES[table]}
+        FROM {self.source(table, annee, annee)}
+        WHERE date >= ? AND date < ?
+        ORDER BY date, id
+        """
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(query, bornes_mois(mois, mois_fin, annee))
+        while True:
+            lot = cursor.fetchmany(taille_lot)
+            if not lot:
+                return
+            yield lot
+
+    def get_totaux_periode(self, type_, mois, annee):
+        """
+        Retourne les totaux d'un mois pour les dépenses ou les recettes.
+        :param type_: 'depense' ou 'recette'.
+        :return: Tuple (total_ttc, total_tva).
+        """
+        def calcul():
+            query = f"""
+            SELECT COALESCE(SUM(total_ttc), 0), COALESCE(SUM(total_tva), 0)
+            FROM {self.source("totaux_mensuels", annee, annee)}
+            WHERE annee = ? AND mois = ? AND type = ?
+            """
+            row = self._select(query, (int(annee), int(mois), type_), one=True)
+            return (float(row[0]), float(row[1])) if row else (0.0, 0.0)
+
+        table = SOURCES_TOTAUX[type_][0]
+        return self._en_cache((table, int(annee), int(mois), "totaux"), calcul, (0.0, 0.0))
+
+    def get_totaux_mensuels(self, annee_debut, annee_fin=None):
+        """
+        Retourne les totaux par mois d'une ou plusieurs années.
+        :param annee_debut: Première année (incluse).
+        :param annee_fin: Dernière année (incluse), par défaut annee_debut.
+        :return: dict {(annee, mois): (ttc_dep, tva_dep, ttc_rec, tva_rec)} ; les mois sans
+                 mouvement sont absents.
+        """
+        if annee_fin is None:
+            annee_fin = annee_debut
+        def calcul():
+            query = f"""
+            SELECT annee, mois, type, SUM(total_ttc) AS total_ttc, SUM(total_tva) AS total_tva
+            FROM {self.source("totaux_mensuels", annee_debut, annee_fin)}
+            WHERE annee BETWEEN ? AND ?
+            GROUP BY annee, mois, type
+            """
+            totaux = {}
+            for row in self._select(query, (int(annee_debut), int(annee_fin))):
+                valeurs = totaux.setdefault((row['annee'], row['mois']), [0.0, 0.0, 0.0, 0.0])
+                offset = 0 if row['type'] == "depense" else 2
+                valeurs[offset] = float(row['total_ttc'])
+                valeurs[offset + 1] = float(row['total_tva'])
+            return {cle: tuple(valeurs) for cle, valeurs in totaux.items()}
+
+        return self._en_cache(("totaux_mensuels", int(annee_debut), int(annee_fin)), calcul, {})
+
+    def verify_totaux_mensuels(self, tolerance=0.005):
+        """
+        Compare totaux_mensuels à un recalcul complet depuis depenses et recettes.
+        :return: Liste des écarts (annee, mois, type, taux, attendu, stocke), où attendu et
+                 stocke sont des tuples (total_ttc, total_tva, nb_lignes) ou None.
+        """
+        attendus = {tuple(row[:4]): tuple(row[4:]) for row in self.fetch_all(TOTAUX_RECALCUL)}
+        stockes = {
+            tuple(row[:4]): tuple(row[4:])
+            for row in self.fetch_all(
+                "SELECT annee, mois, type, taux, total_ttc, total_tva, nb_lignes FROM totaux_mensuels"
+            )
+        }
+        ecarts = []
+        for cle in sorted(attendus.keys() | stockes.keys()):
+            attendu, stocke = attendus.get(cle), stockes.get(cle)
+            if attendu and stocke and attendu[2] == stocke[2] and all(
+                abs(a - b) <= tolerance for a, b in zip(attendu[:2], stocke[:2])
+            ):
+                continue
+            ecarts.append((*cle, attendu, stocke))
+        return ecarts
+
+
+class DatabaseManager(DatabaseReader):
+    """
+    Point d'accès unique à la base (singleton).
+
+    Tient une connexion d'écriture, partagée par tous les threads sous un verrou, et au
+    plus DB_CONFIG["READERS"] + DB_CONFIG["TACHES_LONGUES"] connexions de lecture, une par
+    thread des deux pools de query_service.py (voir reader()). En
+    mode WAL, les lecteurs lisent pendant qu'une écriture est en cours. Instancier la
+    classe à nouveau (chaque fenêtre le fait) ne rouvre aucune connexion.
+    """
+
+    _instance = None
+
+    def __new__(cls, db_file=None):
+        if cls._instance is None:
+            cls._instance = super(DatabaseManager, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, db_file=None):
+        """
+        Initialise l'accès à la base lors de la première instanciation.
+        :param db_file: Chemin de la base ; None conserve la base déjà ouverte. Un autre
+                        chemin ferme les connexions en cours et bascule sur cette base.
+        """
+        if getattr(self, "_lock", None) is not None:
+            if db_file is not None and Path(db_file).resolve() != Path(self.db_file).resolve():
+                self.close_connection()
+                self.db_file = db_file
+                self.cache.vider()
+            return
+        self._preparer(db_file, CacheResultats(DB_CONFIG["CACHE_MAX_MO"] * 1024 * 1024, self._data_version))
+
+    def _preparer(self, db_file, cache, profil=None):
+        DatabaseReader.__init__(self, db_file, cache, profil)
+        self._lock = threading.RLock()  # Sérialise l'usage de la connexion d'écriture
+        self._transaction_depth = 0
+        self._a_invalider = set()  # (table, annee, mois) écrits dans la transaction en cours
+        self._lecteurs = threading.local()
+        self._readers = []
+        self.max_readers = DB_CONFIG["READERS"] + DB_CONFIG["TACHES_LONGUES"]
+        self.connexions_ouvertes = 0  # Compteur d'ouvertures (écriture et lecture)
+
+    def reader(self):
+        """
+        Retourne la connexion de lecture du thread courant, ouverte à la première demande.
+        :return: DatabaseReader propre au thread ; le gestionnaire lui-même (lectures sur la
+                 connexion d'écriture, sous verrou) quand les max_readers lecteurs sont attribués.
+        """
+        reader = getattr(self._lecteurs, "reader", None)
+        if reader is None or reader.db_file != self.db_file:
+            with self._lock:
+                if reader in self._readers:
+                    self._readers.remove(reader)  # Lecteur de l'ancienne base
+                if len(self._readers) >= self.max_readers:
+                    return self
+                reader = DatabaseReader(self.db_file, self.cache, self.profil)
+                self._readers.append(reader)
+                self.connexions_ouvertes += 1
+            self._lecteurs.reader = reader
+        return reader
+
+    def interrupt(self):
+        """Sans effet : une annulation ne doit jamais interrompre la connexion d'écriture."""
+
+    def create_connection(self):
+        """Crée une connexion à la base de données SQLite."""
+        try:
+            conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            self.connexions_ouvertes += 1
+            conn.row_factory = sqlite3.Row
+            # Taille de page fixée à la création seulement (avant journal_mode), jamais par le profil du poste
+            if conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+                conn.execute(f"PRAGMA page_size = {DB_CONFIG['PAGE_SIZE']}")
+            # Optimisation des performances
+            profil = profil_performance(self.profil)
+            appliquer_pragmas(conn, profil)
+            conn.execute(f"PRAGMA journal_mode = {profil['journal_mode']}")
+            self.apply_migrations(conn)
+            print(ERROR_MESSAGES["DB_CONNECTION"])
+            return conn
+        except Error as e:
+            print(ERROR_MESSAGES["DB_CONNECTION_ERROR"].format(e))
+            return None
+
+    def apply_migrations(self, conn):
+        """Applique les migrations de schéma manquantes (voir MIGRATIONS)."""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for numero, script in enumerate(MIGRATIONS[version:], start=version + 1):
+            try:
+                # Script et numéro de version dans la même transaction : tout ou rien
+                conn.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {numero};\nCOMMIT;")
+                print(f"Migration de schéma {numero} appliquée.")
+            except Error as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                print(ERROR_MESSAGES["MIGRATION_ERROR"].format(numero, e))
+                break
+
+    def close_connection(self):
+        """
+        Ferme la connexion d'écriture et toutes les connexions de lecture ; chacune est
+        rouverte à sa prochaine utilisation.
+        """
+        with self._lock:
+            # Lecteurs d'abord : seule la dernière connexion, si elle écrit, supprime le journal WAL
+            for reader in self._readers:
+                reader.close_connection()
+            super().close_connection()
+
+    @contextmanager
+    def hors_ligne(self):
+        """
+        Suspend tout accès à la base le temps du bloc, pour en remplacer le fichier :
+
+            with db.hors_ligne():
+                os.replace(nouveau_fichier, db.db_file)
+
+        Attend la fin des écritures en cours, ferme toutes les connexions et vérifie qu'aucun
+        journal WAL ne subsiste (base ouverte par un autre processus). En sortie, le cache est
+        vidé et les connexions sont rouvertes à la demande, migrations comprises.
+        :raise RuntimeError: Si une transaction est ouverte ou si la base est utilisée ailleurs.
+        """
+        with self._lock:
+            if self._transaction_depth:
+                raise RuntimeError("Impossible de suspendre la base pendant une transaction.")
+            self.close_connection()
+            wal = Path(f"{self.db_file}-wal")
+            if wal.exists() and wal.stat().st_size:
+                raise RuntimeError("La base est ouverte par un autre processus.")
+            try:
+                yield self
+            finally:
+                self.cache.vider()
+
+    @contextmanager
+    def connexion_exclusive(self):
+        """
+        Réserve la connexion d'écriture, hors transaction, le temps du bloc, pour les
+        commandes qui ne peuvent pas s'exécuter dans une transaction (VACUUM, checkpoint) :
+
+            with db.connexion_exclusive() as conn:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        :raise RuntimeError: Si une transaction est ouverte.
+        """
+        with self._lock:
+            if self._transaction_depth or self.conn.in_transaction:
+                raise RuntimeError("Opération impossible pendant une transaction.")
+            yield self.conn
+
+    @contextmanager
+    def ecrivain_dedie(self, profil):
+        """
+        Connexion d'écriture distincte de celle de l'application, le temps du bloc, avec son
+        propre profil de performance (import massif) ; les saisies faites pendant ce temps
+        passent par la connexion partagée, qui garde le profil configuré :
+
+            with db.ecrivain_dedie("import_massif") as ecrivain:
+                ecrivain.insert_depenses_bulk(lignes)
+
+        Les deux connexions écrivent tour à tour (verrou SQLite, busy_timeout) ; le cache de
+        résultats est partagé et invalidé de la même façon.
+        :param profil: Nom du profil (DB_PROFILS) ; le mode de journal reste celui du profil configuré.
+        """
+        ecrivain = object.__new__(type(self))
+        ecrivain._preparer(self.db_file, self.cache, self.profil)
+        ecrivain.max_readers = 0  # Lectures sur sa propre connexion
+        try:
+            ecrivain.conn
+            ecrivain.appliquer_profil(profil)
+            yield ecrivain
+        finally:
+            ecrivain.close_connection()
+
+    def appliquer_profil(self, nom=None):
+        """
+        Change de profil de performance (DB_PROFILS), par exemple le temps d'un import massif,
+        sur la connexion d'écriture ; les lecteurs l'appliquent à leur prochaine ouverture.
+        :param nom: Nom du profil, None pour revenir au profil configuré.
+        """
+        profil = profil_performance(nom)
+        with self._lock:
+            self.profil = nom
+            for reader in self._readers:
+                reader.profil = nom
+            if self._conn is not None:
+                appliquer_pragmas(self._conn, profil)
+
+    def _select(self, query, params=None, as_tuples=False, one=False):
+        with self._lock:
+            return super()._select(query, params, as_tuples, one)
+
+    def source(self, table, annee_debut=None, annee_fin=None):
+        with self._lock:
+            return super().source(table, annee_debut, annee_fin)
+
+    def iter_periode(self, table, mois, annee, taille_lot=1000, mois_fin=None):
+        # Connexion d'écriture réservée jusqu'à la fin du parcours
+        with self._lock:
+            yield from super().iter_periode(table, mois, annee, taille_lot, mois_fin)
+
+    def _data_version(self):
+        """
+        PRAGMA data_version de la connexion d'écriture : change quand un autre processus écrit.
+        Si la connexion est occupée par un autre thread, la dernière version connue est retournée
+        plutôt que de bloquer la lecture.
+        """
+        if not self._lock.acquire(blocking=False):
+            return self.cache._version
+        try:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+        finally:
+            self._lock.release()
+
+    def _invalider(self, table, *dates):
+        """
+        Invalide le cache des mois des dates ISO données pour une table. Dans une transaction,
+        l'invalidation est différée à sa fin pour qu'un lecteur ne remette pas en cache l'état
+        d'avant le commit. Une date qui n'est pas au format AAAA-MM vide tout le cache : appelée
+        après l'écriture, l'invalidation ne doit jamais lever.
+        """
+        for date in {str(d)[:7] for d in dates if d}:
+            try:
+                cle = (table, int(date[:4]), int(date[5:7]))
+            except ValueError:
+                cle = _TOUT_LE_CACHE
+            if self._transaction_depth:
+                self._a_invalider.add(cle)
+            elif cle is _TOUT_LE_CACHE:
+                self.cache.vider()
+            else:
+                self.cache.invalider(*cle)
+
+    def _vider_invalidations(self):
+        if _TOUT_LE_CACHE in self._a_invalider:
+            self.cache.vider()
+        else:
+            for cle in self._a_invalider:
+                self.cache.invalider(*cle)
+        self._a_invalider.clear()
+
+    def cache_stats(self):
+        """Retourne les compteurs du cache de résultats (hits, misses, entrees, octets)."""
+        return self.cache.stats()
 
     def load_periode(self):
         """Charge les valeurs de la table 'periode' pour l'id = 1."""
         query = "SELECT mois, annee FROM periode WHERE id = 1"
         try:
-            self.cursor.execute(query)
-            result = self.cursor.fetchone()
+            result = self.fetch_one(query)
             if result:
                 return str(result['mois']), str(result['annee'])
             else:
@@ -81,45 +834,62 @@ class DatabaseManager:
         """
         return self.execute_query(query, (1, mois, annee))
 
-    def fetch_all(self, query, params=None):
-        """Exécute une requête SELECT et retourne toutes les lignes."""
-        try:
-            cursor = self.conn.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            return cursor.fetchall()
-        except Error as e:
-            print(ERROR_MESSAGES["DATABASE_ERROR"])
-            return []
-
-    def fetch_one(self, query, params=None):
-        """Exécute une requête SELECT et retourne une seule ligne."""
-        try:
-            cursor = self.conn.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            return cursor.fetchone()  # Renvoie une seule ligne
-        except Error as e:
-            print(ERROR_MESSAGES["DATABASE_ERROR"])
-            return None  # Retourne None si une erreur se produit
-
     def execute_query(self, query, params=None):
         """Exécute une requête SQL (INSERT, UPDATE, DELETE)."""
+        return self.execute_write(query, params) is not None
+
+    def execute_write(self, query, params=None):
+        """
+        Exécute une requête d'écriture et retourne le curseur (lastrowid, rowcount), ou None en cas d'erreur.
+        Dans un bloc transaction(), la requête n'est pas validée seule et l'erreur est propagée.
+        """
         try:
-            cursor = self.conn.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            self.conn.commit()
-            return True
+            with self._lock:
+                cursor = self.conn.cursor()
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                if not self._transaction_depth:
+                    self.conn.commit()
+            return cursor
         except Error as e:
+            if self._transaction_depth:
+                raise
             print(ERROR_MESSAGES["DATABASE_ERROR"])
-            return False
+            return None
+
+    @contextmanager
+    def transaction(self):
+        """
+        Regroupe les écritures du bloc en une seule transaction :
+
+            with db.transaction():
+                db.insert_depense(...)
+                db.update_validation_status(...)
+
+        Un seul commit en sortie de bloc ; une exception annule tout le bloc et est propagée.
+        Un bloc imbriqué rejoint la transaction englobante. La connexion d'écriture reste
+        réservée au thread appelant pendant tout le bloc, et le verrou d'écriture SQLite est
+        pris dès l'ouverture (BEGIN IMMEDIATE) : une autre connexion d'écriture (voir
+        ecrivain_dedie) ne peut rien valider entre les lectures et les écritures du bloc.
+        """
+        with self._lock:
+            if not self._transaction_depth and not self.conn.in_transaction:
+                self.conn.execute("BEGIN IMMEDIATE")
+            self._transaction_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._transaction_depth -= 1
+                if not self._transaction_depth:
+                    self.conn.rollback()
+                    self._vider_invalidations()
+                raise
+            self._transaction_depth -= 1
+            if not self._transaction_depth:
+                self.conn.commit()
+                self._vider_invalidations()
 
     def __del__(self):
         """Destructeur qui ferme la connexion à la base de données."""
@@ -127,54 +897,291 @@ class DatabaseManager:
 
     # Méthodes pour gérer les dépenses
     def insert_depense(self, date, fournisseur, ttc, tva_id, montant_tva, validation, commentaire):
-        """Insère une nouvelle dépense dans la table 'depenses'."""
+        """
+        Insère une nouvelle dépense dans la table 'depenses'.
+        :return: La ligne insérée (tuple dans l'ordre de DEPENSES_COLONNES), ou None en cas d'erreur.
+        """
         query = """
         INSERT INTO depenses (date, fournisseur, ttc, tva_id, montant_tva, validation, commentaire)
         VALUES (?, ?, ?, ?, ?, ?, ?)
         """
-        return self.execute_query(query, (date, fournisseur, ttc, tva_id, montant_tva, validation, commentaire))
+        cursor = self.execute_write(query, (date, fournisseur, ttc, tva_id, montant_tva, validation, commentaire))
+        if cursor is None:
+            return None
+        self._invalider("depenses", date)
+        return self.fetch_row_by_id("depenses", cursor.lastrowid)
 
     def update_depense(self, id, date, fournisseur, ttc, tva_id, montant_tva, validation, commentaire):
-        """Met à jour une dépense existante dans la table 'depenses'."""
+        """
+        Met à jour une dépense existante dans la table 'depenses'.
+        :return: La ligne après modification, ou None en cas d'erreur.
+        """
         query = """
         UPDATE depenses
         SET date=?, fournisseur=?, ttc=?, tva_id=?, montant_tva=?, validation=?, commentaire=?
         WHERE id=?
         """
-        return self.execute_query(query, (date, fournisseur, ttc, tva_id, montant_tva, validation, commentaire, id))
+        ancienne = self.fetch_row_by_id("depenses", id)
+        cursor = self.execute_write(query, (date, fournisseur, ttc, tva_id, montant_tva, validation, commentaire, id))
+        if cursor is None:
+            return None
+        self._invalider("depenses", date, ancienne[1] if ancienne else None)
+        return self.fetch_row_by_id("depenses", id)
 
     def delete_depense(self, id):
-        """Supprime une dépense existante de la table 'depenses'."""
+        """
+        Supprime une dépense existante de la table 'depenses'.
+        :return: La ligne supprimée, ou None en cas d'erreur.
+        """
+        ligne = self.fetch_row_by_id("depenses", id)
         query = "DELETE FROM depenses WHERE id=?"
-        return self.execute_query(query, (id,))
+        if not ligne or not self.execute_query(query, (id,)):
+            return None
+        self._invalider("depenses", ligne[1])
+        return ligne
 
     def update_validation_status(self, item_id, status):
-        """Met à jour l'état de validation d'une dépense."""
+        """
+        Met à jour l'état de validation d'une dépense.
+        :return: La ligne après modification, ou None en cas d'erreur.
+        """
         query = "UPDATE depenses SET validation = ? WHERE id = ?"
-        return self.execute_query(query, (status, item_id))  # Utilisez des paramètres pour éviter les injections SQL
+        cursor = self.execute_write(query, (status, item_id))  # Utilisez des paramètres pour éviter les injections SQL
+        ligne = self.fetch_row_by_id("depenses", item_id) if cursor else None
+        if ligne:
+            self._invalider("depenses", ligne[1])
+        return ligne
+
+    def insert_depenses_bulk(self, lignes, fetch_rows=True):
+        """
+        Insère plusieurs dépenses en une seule transaction (executemany).
+        :param lignes: Tuples (date, fournisseur, ttc, tva_id, montant_tva, validation, commentaire).
+        :param fetch_rows: Retourne les lignes insérées ; sinon seulement leur nombre.
+        :return: Liste des lignes insérées (ordre de DEPENSES_COLONNES) ou nombre de lignes,
+                 None en cas d'erreur (aucune ligne n'est alors insérée).
+        """
+        query = """
+        INSERT INTO depenses (date, fournisseur, ttc, tva_id, montant_tva, validation, commentaire)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+        return self._insert_bulk("depenses", query, lignes, fetch_rows)
+
+    def update_validation_status_bulk(self, item_ids, status):
+        """
+        Met à jour l'état de validation de plusieurs dépenses en une seule transaction.
+        :param item_ids: Identifiants des dépenses.
+        :return: Nombre de lignes modifiées, ou None en cas d'erreur (aucune n'est alors modifiée).
+        """
+        item_ids = list(item_ids)
+        try:
+            modifiees = 0
+            with self.transaction():
+                for debut in range(0, len(item_ids), TAILLE_LOT_IN):
+                    lot = item_ids[debut:debut + TAILLE_LOT_IN]
+                    marqueurs = ', '.join('?' * len(lot))
+                    dates = self.conn.execute(f"SELECT DISTINCT date FROM depenses WHERE id IN ({marqueurs})", lot)
+                    self._invalider("depenses", *(row[0] for row in dates))
+                    query = f"UPDATE depenses SET validation = ? WHERE id IN ({marqueurs})"
+                    modifiees += self.execute_write(query, (status, *lot)).rowcount
+            return modifiees
+        except Error as e:
+            if self._transaction_depth:
+                raise
+            print(ERROR_MESSAGES["DATABASE_ERROR"])
+            return None
 
     # Méthodes pour gérer les recettes
     def insert_recette(self, date, client, paiement, numero_facture, montant, tva_rate, montant_tva, commentaire):
-        """Insère une nouvelle recette dans la table 'recettes'."""
+        """
+        Insère une nouvelle recette dans la table 'recettes'.
+        :return: La ligne insérée (tuple dans l'ordre de RECETTES_COLONNES), ou None en cas d'erreur.
+        """
         query = """
         INSERT INTO recettes (date, client, paiement, numero_facture, montant, tva, montant_tva, commentaire)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """
-        return self.execute_query(query, (date, client, paiement, numero_facture, montant, tva_rate, montant_tva, commentaire))
+        cursor = self.execute_write(query, (date, client, paiement, numero_facture, montant, tva_rate, montant_tva, commentaire))
+        if cursor is None:
+            return None
+        self._invalider("recettes", date)
+        return self.fetch_row_by_id("recettes", cursor.lastrowid)
 
     def update_recette(self, recette_id, date, client, paiement, numero_facture, montant, tva_rate, montant_tva, commentaire):
-        """Met à jour une recette existante dans la table 'recettes'."""
+        """
+        Met à jour une recette existante dans la table 'recettes'.
+        :return: La ligne après modification, ou None en cas d'erreur.
+        """
         query = """
         UPDATE recettes
         SET date=?, client=?, paiement=?, numero_facture=?, montant=?, tva=?, montant_tva=?, commentaire=?
         WHERE id=?
         """
-        return self.execute_query(query, (date, client, paiement, numero_facture, montant, tva_rate, montant_tva, commentaire, recette_id))
+        ancienne = self.fetch_row_by_id("recettes", recette_id)
+        cursor = self.execute_write(query, (date, client, paiement, numero_facture, montant, tva_rate, montant_tva, commentaire, recette_id))
+        if cursor is None:
+            return None
+        self._invalider("recettes", date, ancienne[1] if ancienne else None)
+        return self.fetch_row_by_id("recettes", recette_id)
 
     def delete_recette(self, recette_id):
-        """Supprime une recette existante de la table 'recettes'."""
+        """
+        Supprime une recette existante de la table 'recettes'.
+        :return: La ligne supprimée, ou None en cas d'erreur.
+        """
+        ligne = self.fetch_row_by_id("recettes", recette_id)
         query = "DELETE FROM recettes WHERE id=?"
-        return self.execute_query(query, (recette_id,))
+        if not ligne or not self.execute_query(query, (recette_id,)):
+            return None
+        self._invalider("recettes", ligne[1])
+        return ligne
+
+    def insert_recettes_bulk(self, lignes, fetch_rows=True):
+        """
+        Insère plusieurs recettes en une seule transaction (executemany).
+        :param lignes: Tuples (date, client, paiement, numero_facture, montant, tva_rate, montant_tva, commentaire).
+        :param fetch_rows: Retourne les lignes insérées ; sinon seulement leur nombre.
+        :return: Liste des lignes insérées (ordre de RECETTES_COLONNES) ou nombre de lignes,
+                 None en cas d'erreur (aucune ligne n'est alors insérée).
+        """
+        query = """
+        INSERT INTO recettes (date, client, paiement, numero_facture, montant, tva, montant_tva, commentaire)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        return self._insert_bulk("recettes", query, lignes, fetch_rows)
+
+    def _insert_bulk(self, table, query, lignes, fetch_rows):
+        colonnes = DEPENSES_COLONNES if table == "depenses" else RECETTES_COLONNES
+        try:
+            with self.transaction():
+                # Verrou d'écriture pris par transaction() : aucune autre connexion ne peut insérer
+                # avant la fin du bloc, les lignes insérées sont celles au-delà de l'id maximal courant
+                dernier_id = self.conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                lignes = lignes if isinstance(lignes, list) else list(lignes)
+                nombre = self.conn.executemany(query, lignes).rowcount
+                self._invalider(table, *(ligne[0] for ligne in lignes))
+                if not fetch_rows:
+                    return nombre
+                cursor = self.conn.cursor()
+                cursor.row_factory = None
+                return cursor.execute(
+                    f"SELECT {colonnes} FROM {table} WHERE id > ? ORDER BY id", (dernier_id,)
+                ).fetchall()
+        except Error as e:
+            if self._transaction_depth:
+                raise
+            print(ERROR_MESSAGES["DATABASE_ERROR"])
+            return None
+
+    def rebuild_totaux_mensuels(self):
+        """Recalcule entièrement totaux_mensuels depuis depenses et recettes."""
+        try:
+            with self.transaction():
+                self.conn.execute("DELETE FROM totaux_mensuels")
+                self.conn.execute(
+                    "INSERT INTO totaux_mensuels (annee, mois, type, taux, total_ttc, total_tva, nb_lignes)"
+                    + TOTAUX_RECALCUL
+                )
+            self.cache.vider()
+            return True
+        except Error as e:
+            print(ERROR_MESSAGES["DATABASE_ERROR"])
+            return False
+
+    def archiver_annee(self, annee):
+        """
+        Déplace un exercice clos de la base vers son archive (voir chemin_archive).
+
+        Les dépenses réglées et les recettes de l'année sont copiées, avec leur id, dans
+        l'archive, créée au besoin avec le schéma de la base, puis supprimées de la base ; les
+        totaux mensuels de l'archive sont recalculés. Les dépenses non réglées restent dans la
+        base (ARCHIVAGE_CONDITIONS). Tout est fait dans une seule transaction. Archiver à
+        nouveau une année déjà archivée y ajoute les lignes saisies ou réglées depuis.
+        :raise ValueError: Si l'année n'est pas close (année en cours ou à venir).
+        :return: dict {table: nombre de lignes archivées}.
+        """
+        annee = int(annee)
+        if annee >= datetime.now().year:
+            raise ValueError(f"L'exercice {annee} n'est pas clos.")
+        chemin = self.chemin_archive(annee)
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        debut, fin = f"{annee:04d}-01-01", f"{annee + 1:04d}-01-01"
+        with self._lock:
+            # ATTACH est impossible dans une transaction
+            self.conn.execute("ATTACH DATABASE ? AS archivage", (chemin,))
+            try:
+                archivees = {}
+                with self.transaction():
+                    for table in TABLES_ARCHIVEES:
+                        sql = self.conn.execute(
+                            "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+                        ).fetchone()[0]
+                        self.conn.execute(re.sub(
+                            r"^CREATE TABLE\s+(IF NOT EXISTS\s+)?", "CREATE TABLE IF NOT EXISTS archivage.", sql
+                        ))
+                    for table in ("depenses", "recettes"):
+                        self.conn.execute(
+                            f"CREATE INDEX IF NOT EXISTS archivage.idx_{table}_date ON {table}(date)"
+                        )
+                        colonnes = TABLES_ARCHIVEES[table]
+                        condition = f"date >= ? AND date < ?{ARCHIVAGE_CONDITIONS[table]}"
+                        # Une ligne déjà archivée et revenue dans la base (restauration) y est remplacée
+                        archivees[table] = self.conn.execute(
+                            f"INSERT OR REPLACE INTO archivage.{table} ({colonnes}) "
+                            f"SELECT {colonnes} FROM main.{table} WHERE {condition}", (debut, fin)
+                        ).rowcount
+                        # Les triggers retirent ces lignes des totaux mensuels de la base
+                        self.conn.execute(f"DELETE FROM main.{table} WHERE {condition}", (debut, fin))
+                    self.conn.execute("DELETE FROM archivage.totaux_mensuels")
+                    self.conn.execute(
+                        f"INSERT INTO archivage.totaux_mensuels ({TOTAUX_COLONNES})" + totaux_recalcul("archivage")
+                    )
+            finally:
+                self.conn.execute("DETACH DATABASE archivage")
+            self.cache.vider()
+        print(f"Exercice {annee} archivé dans {chemin} : {archivees['depenses']} dépense(s), "
+              f"{archivees['recettes']} recette(s).")
+        return archivees
+
+    def reconcilier_archives(self):
+        """
+        Remet les archives en accord avec la base après une restauration : les archives ne font
+        pas partie des sauvegardes, si bien qu'une sauvegarde antérieure à un archivage remet
+        dans la base des lignes encore présentes dans l'archive, que les lectures (source)
+        compteraient deux fois. Ces lignes sont retirées de l'archive (la base restaurée fait
+        foi) et ses totaux mensuels recalculés. Le compteur AUTOINCREMENT de la base est porté
+        au-delà des id archivés, pour qu'une nouvelle écriture ne reprenne pas l'id d'une
+        ligne archivée après la sauvegarde.
+        :return: dict {année: nombre de lignes retirées de l'archive}, années modifiées seulement.
+        """
+        retirees = {}
+        with self._lock:
+            for annee in self.annees_archivees():
+                # ATTACH est impossible dans une transaction
+                self.conn.execute("ATTACH DATABASE ? AS archivage", (self.chemin_archive(annee),))
+                try:
+                    with self.transaction():
+                        n = 0
+                        for table in ("depenses", "recettes"):
+                            n += self.conn.execute(
+                                f"DELETE FROM archivage.{table} WHERE id IN (SELECT id FROM main.{table})"
+                            ).rowcount
+                            self.conn.execute(
+                                "UPDATE sqlite_sequence SET seq = max(seq, "
+                                f"(SELECT coalesce(max(id), 0) FROM archivage.{table})) WHERE name = ?", (table,)
+                            )
+                        if n:
+                            self.conn.execute("DELETE FROM archivage.totaux_mensuels")
+                            self.conn.execute(
+                                f"INSERT INTO archivage.totaux_mensuels ({TOTAUX_COLONNES})" + totaux_recalcul("archivage")
+                            )
+                            retirees[annee] = n
+                finally:
+                    self.conn.execute("DETACH DATABASE archivage")
+            if retirees:
+                self.cache.vider()
+        for annee, n in retirees.items():
+            print(f"Archive {annee} : {n} ligne(s) présentes dans la base restaurée retirées de l'archive.")
+        return retirees
 
     def contact_exists(self, nom):
         """Vérifie si un contact existe déjà dans la table 'contacts'."""
@@ -212,4 +1219,25 @@ class DatabaseManager:
     def delete_contact(self, contact_id):
         """Supprime un contact de la table 'contacts'."""
         query = "DELETE FROM contacts WHERE id = ?"
-        return self.execute_query(query, (contact_id,))
\ No newline at end of file
+        return self.execute_query(query, (contact_id,))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Contrôle de la table de synthèse totaux_mensuels.")
+    parser.add_argument("--db", default=DB_CONFIG["DEFAULT_PATH"], help="Chemin de la base de données")
+    parser.add_argument("--reconstruire", action="store_true", help="Recalcule la table après vérification")
+    parser.add_argument("--archiver", type=int, metavar="ANNEE", help="Archive un exercice clos avant le contrôle")
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    if args.archiver:
+        db.archiver_annee(args.archiver)
+    ecarts = db.verify_totaux_mensuels()
+    for annee, mois, type_, taux, attendu, stocke in ecarts:
+        print(f"Écart {annee}-{mois:02d} {type_} {taux}% : attendu {attendu}, stocké {stocke}")
+    print(f"{len(ecarts)} écart(s) détecté(s).")
+    if args.reconstruire:
+        if db.rebuild_totaux_mensuels():
+            print(f"Table reconstruite, {len(db.verify_totaux_mensuels())} écart(s) restant(s).")
@@ -1,7 +1,8 @@
 # gestion_forniseur_a_regler.py
 
-from PySide6.QtWidgets import QDialog, QTableWidgetItem, QMessageBox, QVBoxLayout, QHBoxLayout, QFileDialog
+from PySide6.QtWidgets import QDialog, QMessageBox, QVBoxLayout, QHBoxLayout, QFileDialog
 from ui.ui_gestion_forniseur_a_regler import Ui_Dialog
+from ui.table_model import RowTableModel, format_iso_date
 from database import DatabaseManager
 from datetime import datetime
 from reportlab.lib.pagesizes import letter
@@ -10,6 +11,17 @@ from reportlab.lib import colors
 from reportlab.platypus import Table, TableStyle, SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet
 from pdf_generator import PDFGenerator  # Importer la classe PDFGenerator
+from query_service import QueryService
+from ui.export_pdf_dialog import ExportPDFDialog
+
+
+def format_montant(value):
+    """Formate un montant à la française : '1 234,56 €'."""
+    try:
+        return f"{float(value):,.2f} €".replace(',', ' ').replace('.', ',')
+    except (ValueError, TypeError):
+        return str(value)
+
 
 class GestionFournisseurARegler(QDialog):
     def __init__(self):
@@ -19,10 +31,16 @@ class GestionFournisseurARegler(QDialog):
 
         # Initialisation de la base de données
         self.db_manager = DatabaseManager()
-        self.pdf_generator = PDFGenerator(self.db_manager)  # Créer une instance de PDFGenerator
+        self.model = RowTableModel(
+            ["Repère", "Date", "Fournisseur", "TTC"],
+            formatters={1: format_iso_date, 3: format_montant},
+            parent=self,
+        )
+        self.ui.tableWidget_a_regler.setModel(self.model)
 
         # Charger les données dans le tableau
         self.load_depenses()
+        QueryService.instance().database_replaced.connect(self.load_depenses)
 
         # Connexion des boutons
         self.ui.pushButtonValider.clicked.connect(self.on_valider_clicked)
@@ -46,79 +64,66 @@ class GestionFournisseurARegler(QDialog):
     def load_depenses(self):
         """Charge les dépenses dans le tableau où la validation n'est pas 'Oui'."""
         try:
-            # Exclure la colonne 'validation' de la requête
+            # Base courante seulement : les exercices archivés ne sont plus modifiables
             query = "SELECT id, date, fournisseur, ttc FROM depenses WHERE validation != 'Oui'"
-            rows = self.db_manager.fetch_all(query)
-
-            self.ui.tableWidget_a_regler.setRowCount(0)  # Réinitialiser le tableau
-            total_ttc = 0.0  # Initialiser la somme des montants ttc
-
-            for row_number, row_data in enumerate(rows):
-                self.ui.tableWidget_a_regler.insertRow(row_number)
-                for column_number, data in enumerate(row_data):
-                    if column_number == 1:  # Colonne date
-                        try:
-                            formatted_date = datetime.strptime(str(data), "%Y-%m-%d").strftime("%d/%m/%Y")
-                        except (ValueError, TypeError):
-                            formatted_date = str(data)
-                        item = QTableWidgetItem(formatted_date)
-                    elif column_number == 2:  # Colonne fournisseur
-                        item = QTableWidgetItem(str(data))
-                    elif column_number == 3:  # Colonne ttc
-                        try:
-                            formatted_ttc = f"{float(data):,.2f} €".replace(',', ' ').replace('.', ',')
-                        except (ValueError, TypeError):
-                            formatted_ttc = str(data)
-                        item = QTableWidgetItem(formatted_ttc)
-                    else:
-                        item = QTableWidgetItem(str(data))
-                    self.ui.tableWidget_a_regler.setItem(row_number, column_number, item)
+            rows = self.db_manager.fetch_all(query, as_tuples=True)
+            self.model.set_rows(rows)
 
+            self.total_ttc = 0.0  # Initialiser la somme des montants ttc
+            for row in rows:
                 try:
-                    total_ttc += float(row_data['ttc']) if row_data['ttc'] is not None else 0.0
+                    self.total_ttc += float(row[3]) if row[3] is not None else 0.0
                 except (ValueError, TypeError):
                     pass
 
             # Mettre à jour le champ lineEdittotalttc avec la somme formatée
-            self.ui.lineEdittotalttc.setText(f"{total_ttc:,.2f} €".replace(',', ' ').replace('.', ','))
+            self.ui.lineEdittotalttc.setText(format_montant(self.total_ttc))
 
             # Redimensionner la colonne 'fournisseur' pour s'adapter au contenu
             self.ui.tableWidget_a_regler.resizeColumnToContents(2)  # Index de la colonne 'fournisseur'
 
-            # Cacher la colonne 'validation' (index 4)
-            self.ui.tableWidget_a_regler.setColumnHidden(4, True)
-
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur lors du chargement des dépenses : {str(e)}")
 
     def on_valider_clicked(self):
         """Méthode appelée lorsque le bouton 'Valider' est cliqué."""
-        selected_rows = self.ui.tableWidget_a_regler.selectedItems()
-        
+        selected_rows = self.ui.tableWidget_a_regler.selectionModel().selectedRows()
+
         if not selected_rows:
             QMessageBox.warning(self, "Avertissement", "Aucune ligne sélectionnée.")
             return
 
         # Collecte des indices de lignes uniques
-        row_indices = set(item.row() for item in selected_rows)
+        row_indices = set(index.row() for index in selected_rows)
 
         try:
-            for row_index in row_indices:
-                # Récupérer l'ID de la ligne sélectionnée
-                item_id = self.ui.tableWidget_a_regler.item(row_index, 0).text()  # Supposons que l'ID est dans la première colonne
-                # Mettre à jour l'état de validation dans la base de données
-                self.db_manager.update_validation_status(item_id, 'Oui')  # Assurez-vous que cette méthode est bien implémentée
-
-            self.load_depenses()  # Recharge les données pour refléter les changements
-            # QMessageBox.information(self, "Information", "Validation effectuée pour les lignes sélectionnées.")  # Ligne supprimée
+            # Une seule transaction pour toutes les lignes sélectionnées
+            item_ids = [self.model.row_values(row_index)[0] for row_index in row_indices]
+            modifiees = self.db_manager.update_validation_status_bulk(item_ids, 'Oui')
+            if modifiees is None:
+                QMessageBox.critical(self, "Erreur", "Erreur lors de la validation des lignes sélectionnées.")
+                return
+            if modifiees < len(item_ids):
+                # Lignes disparues entre-temps (supprimées ou archivées) : la liste est relue
+                self.load_depenses()
+                QMessageBox.warning(self, "Avertissement",
+                                    f"{len(item_ids) - modifiees} ligne(s) n'ont pas pu être validées.")
+                return
+
+            # Les lignes réglées quittent la liste, du bas vers le haut pour garder les positions valides
+            for row_index in sorted(row_indices, reverse=True):
+                old_row = self.model.remove_row(row_index)
+                try:
+                    self.total_ttc -= float(old_row[3] or 0)
+                except (ValueError, TypeError):
+                    pass
+
+            self.ui.lineEdittotalttc.setText(format_montant(self.total_ttc))
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur lors de la validation : {str(e)}")
 
     def export_pdf(self):
         """Génère un rapport PDF des dépenses."""
-        query = "SELECT id, date, fournisseur, ttc FROM depenses WHERE validation != 'Oui'"
-        rows = self.db_manager.fetch_all(query)
-
         # Définir un nom de fichier par défaut
         default_filename = "fournisseur_a_regler.pdf"
 
@@ -129,6 +134,18 @@ class GestionFournisseurARegler(QDialog):
         if not pdf_file:  # Vérifier si l'utilisateur a annulé le dialogue
             return
 
+        # Lecture et génération hors du thread de l'interface, fenêtre d'avancement non modale
+        self.export_pdf_dialog = ExportPDFDialog(self, pdf_file, self, self.ui.pushButton_export_pdf)
+        self.export_pdf_dialog.lancer(lambda reader, progression: self.build_pdf(reader, pdf_file, progression))
+
+    def build_pdf(self, reader, pdf_file, progression=None):
+        """
+        Lit les dépenses non réglées et génère le PDF (exécuté dans un thread de fond).
+        :param progression: Avancement du rendu, voir RapportFlux.
+        """
+        query = "SELECT id, date, fournisseur, ttc FROM depenses WHERE validation != 'Oui'"
+        rows = reader.fetch_all(query)
+
         # Préparer les données pour le PDF
         data = [['ID', 'Date', 'Fournisseur', 'TTC']]
         total_ttc = 0.0  # Initialiser le total TTC
@@ -151,7 +168,13 @@ class GestionFournisseurARegler(QDialog):
         data.append(['', '', 'Total TTC :', f"{total_ttc:,.2f} €"])
 
         # Générer le PDF en utilisant PDFGenerator
-        self.pdf_generator.generate_pdf(data, pdf_file)
+        return PDFGenerator(reader).generate_pdf(data, pdf_file, progression)
+
+    def done(self, result):
+        QueryService.instance().cancel(self)
+        QueryService.instance().database_replaced.disconnect(self.load_depenses)
+        super().done(result)
+
 
 if __name__ == "__main__":
     import sys
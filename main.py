@@ -1,9 +1,11 @@
 import sys
 import os
+import multiprocessing
 from PySide6.QtWidgets import QApplication, QSplashScreen
 from PySide6.QtGui import QPixmap
 from PySide6.QtCore import Qt, QTimer
 from ui.main_window import MainWindow
+from utils.backup import nettoyer_sauvegardes
 
 
 def load_stylesheet(app):
@@ -27,10 +29,15 @@ def show_splash_screen():
 
 
 if __name__ == "__main__":
+    # Processus de rendu des exports PDF par lot (utils/export_lot.py) dans l'exécutable compilé
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     load_stylesheet(app)
     splash = show_splash_screen()
     window = MainWindow()
     window.show()
     splash.finish(window)
-    sys.exit(app.exec())
\ No newline at end of file
+    code = app.exec()
+    # Rétention des sauvegardes, une fois la fenêtre fermée
+    nettoyer_sauvegardes()
+    sys.exit(code)
\ No newline at end of file
@@ -1,40 +1,206 @@
+import hashlib
 import os
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfgen import canvas
 from datetime import datetime
+from itertools import chain, repeat
+from constants import PDF_CONFIG
+from pdf_modeles import RegistreModeles
+from utils.cache_rapports import CacheRapports
+
+# Version du code de mise en page, à incrémenter à chaque modification du rendu : les rapports
+# en cache produits par une version précédente ne sont plus repris (les déclarations de
+# pdf_modeles.py font aussi partie de la clé)
+VERSION_MODELE = 2
+
+# Mise en page en flux du rapport fiscal (voir RapportFlux)
+MARGE = 36  # Marge de 30 points et marge intérieure du cadre Platypus (6 points)
+HAUTEUR_LIGNE = 20  # Police 10 et marges de 4 points, comme les tableaux Platypus
+LIGNES_PAR_LOT = 1000  # Lignes lues à la fois dans la base
+_FIN = object()
+
+
+class RapportFlux:
+    """
+    Rapport PDF dessiné directement sur le canvas, page après page.
+
+    Les lignes des tableaux arrivent d'un itérateur et sont dessinées par tranches de
+    hauteur fixe, une par page, en-tête de colonnes répété : seule la tranche en cours est
+    mise en forme à la fois et le temps de rendu est proportionnel au nombre de lignes.
+    Sans chemin, rien n'est dessiné : la même mise en page, alimentée par des compteurs,
+    donne le nombre de pages (premier passage), si bien que « Page n sur N » est écrit
+    directement sur chaque page. Polices, couleurs et logo viennent du registre des
+    modèles (pdf_modeles.py).
+    """
+
+    def __init__(self, chemin=None, total_pages=0, pagesize=A4, registre=None, progression=None, total_lignes=0):
+        """
+        :param progression: Appelée à chaque page terminée avec (lignes, total_lignes, pages,
+                            total_pages) ; peut lever une exception pour interrompre le rendu,
+                            auquel cas le fichier n'est pas écrit.
+        :param total_lignes: Nombre de lignes du rapport, donné par le premier passage (lignes).
+        """
+        self.registre = registre or RegistreModeles.instance()
+        self.largeur, self.hauteur = pagesize
+        self.total_pages = total_pages
+        self.total_lignes = total_lignes
+        self.progression = progression
+        self.canvas = canvas.Canvas(chemin, pagesize=pagesize, pageCompression=1) if chemin else None
+        self.page = 1
+        self.lignes = 0  # Lignes de tableaux mises en page, en-têtes de colonnes exclus
+        self.y = self.hauteur - MARGE
+
+    def titre(self, lignes, logo=None):
+        """Titre centré, à droite du logo (chemin) s'il existe (bloc d'en-tête de la première page)."""
+        style = self.registre.style_texte("titre")
+        hauteur_titre = style["interligne"] * len(lignes)
+        if logo:
+            hauteur = max(1.5 * inch, hauteur_titre) + 3 + 20
+            x = MARGE + (self.largeur - 2 * MARGE - 6 * inch) / 2
+            milieu = self.y - 3 - max(1.5 * inch, hauteur_titre) / 2
+            if self.canvas:
+                self.registre.dessiner_image(self.canvas, logo, x + 0.25 * inch, milieu - 0.75 * inch,
+                                             1.5 * inch, 1.5 * inch)
+            centre = x + 4 * inch
+        else:
+            hauteur = hauteur_titre + style["espace_apres"]
+            milieu = self.y - hauteur_titre / 2
+            centre = self.largeur / 2
+        if self.canvas:
+            self.canvas.setFont(style["police"], style["taille"])
+            self.canvas.setFillColor(self.registre.couleur(style["couleur"]))
+            for i, ligne in enumerate(lignes):
+                self.canvas.drawCentredString(centre, milieu + hauteur_titre / 2 - style["interligne"] * (i + 1) + 5, ligne)
+        self.y -= hauteur + 20
+
+    def sous_titre(self, texte):
+        style = self.registre.style_texte("sous_titre")
+        if self.y < self.hauteur - MARGE:
+            self.y -= 20
+        if self.canvas:
+            self.canvas.setFont(style["police"], style["taille"])
+            self.canvas.setFillColor(self.registre.couleur(style["couleur"]))
+            self.canvas.drawString(MARGE, self.y - style["taille"], texte)
+        self.y -= style["interligne"] + style["espace_apres"]
+
+    def tableau(self, entetes, largeurs, alignements, lignes, total=None, gras=False, style="standard"):
+        """
+        Dessine un tableau par tranches d'une page.
+        :param entetes: Libellés des colonnes, répétés en haut de chaque tranche.
+        :param alignements: 'C' ou 'R' par colonne.
+        :param lignes: Itérateur de lignes de textes (n'importe quelles valeurs au premier passage).
+        :param total: Dernière ligne, sur fond clair et en gras.
+        :param gras: Toutes les lignes en gras.
+        :param style: Nom du style de tableau (pdf_modeles.STYLES_TABLEAUX).
+        """
+        style = self.registre.style_tableau(style)
+        x = MARGE + (self.largeur - 2 * MARGE - sum(largeurs)) / 2
+        lignes = iter(lignes)
+        suivante = next(lignes, _FIN)
+        while True:
+            capacite = int((self.y - MARGE) // HAUTEUR_LIGNE) - 1  # En-tête de colonnes compris
+            if capacite < 1:
+                self.saut_de_page()
+                continue
+            tranche = []
+            while suivante is not _FIN and len(tranche) < capacite:
+                tranche.append(suivante)
+                suivante = next(lignes, _FIN)
+            # Le total suit la dernière ligne, sur la page suivante si celle-ci est pleine
+            avec_total = suivante is _FIN and total is not None and len(tranche) < capacite
+            if avec_total:
+                tranche.append(total)
+            if self.canvas:
+                self._dessiner_tranche(x, entetes, largeurs, alignements, tranche, avec_total, gras, style)
+            self.y -= HAUTEUR_LIGNE * (len(tranche) + 1)
+            self.lignes += len(tranche)
+            if suivante is _FIN and (total is None or avec_total):
+                return
+            self.saut_de_page()
+
+    def _dessiner_tranche(self, x, entetes, largeurs, alignements, tranche, avec_total, gras, style):
+        c = self.canvas
+        taille = style["taille"]
+        xs = [x]
+        for largeur in largeurs:
+            xs.append(xs[-1] + largeur)
+        haut = self.y
+        ys = [haut - HAUTEUR_LIGNE * i for i in range(len(tranche) + 2)]
+        c.setFillColor(self.registre.couleur(style["entete_fond"]))
+        c.rect(xs[0], ys[1], xs[-1] - xs[0], HAUTEUR_LIGNE, stroke=0, fill=1)
+        if avec_total:
+            c.setFillColor(self.registre.couleur(style["total_fond"]))
+            c.rect(xs[0], ys[-1], xs[-1] - xs[0], HAUTEUR_LIGNE, stroke=0, fill=1)
+        c.setFillColor(self.registre.couleur(style["entete_texte"]))
+        c.setFont(style["entete_police"], taille)
+        self._ecrire_ligne(xs, ys[1] + 7, entetes, alignements, style["entete_police"], taille, style["marge_x"])
+        c.setFillColor(colors.black)
+        police = style["police_grasse"] if gras else style["police"]
+        c.setFont(police, taille)
+        for i, ligne in enumerate(tranche):
+            if avec_total and i == len(tranche) - 1:
+                police = style["police_grasse"]
+                c.setFont(police, taille)
+            self._ecrire_ligne(xs, ys[i + 2] + 7, ligne, alignements, police, taille, style["marge_x"])
+        c.setLineWidth(style["grille"])
+        c.setStrokeColor(colors.black)
+        c.grid(xs, ys)
+
+    def _ecrire_ligne(self, xs, y, textes, alignements, police, taille, marge):
+        c = self.canvas
+        for i, texte in enumerate(textes):
+            largeur = xs[i + 1] - xs[i] - 2 * marge
+            texte = tronquer(str(texte), largeur, police, taille)
+            if alignements[i] == 'R':
+                c.drawRightString(xs[i + 1] - marge, y, texte)
+            else:
+                c.drawCentredString((xs[i] + xs[i + 1]) / 2, y, texte)
+
+    def saut_de_page(self):
+        if self.canvas:
+            style = self.registre.style_texte("pied_de_page")
+            self.canvas.setFont(style["police"], style["taille"])
+            self.canvas.setFillColor(self.registre.couleur(style["couleur"]))
+            self.canvas.drawRightString(7.5 * inch, 0.5 * inch, f"Page {self.page} sur {self.total_pages}")
+            self.canvas.showPage()
+        if self.progression:
+            self.progression((self.lignes, self.total_lignes, self.page, self.total_pages))
+        self.page += 1
+        self.y = self.hauteur - MARGE
+
+    def enregistrer(self):
+        """Termine la dernière page et écrit le fichier."""
+        self.saut_de_page()
+        self.page -= 1
+        if self.canvas:
+            self.canvas.save()
+
+
+def tronquer(texte, largeur, police, taille):
+    """Raccourcit un texte (avec '...') pour qu'il tienne dans la largeur d'une cellule."""
+    if pdfmetrics.stringWidth(texte, police, taille) <= largeur:
+        return texte
+    while texte and pdfmetrics.stringWidth(texte + "...", police, taille) > largeur:
+        texte = texte[:-1]
+    return texte + "..."
 
-class NumberedCanvas(canvas.Canvas):
-    def __init__(self, *args, **kwargs):
-        canvas.Canvas.__init__(self, *args, **kwargs)
-        self._saved_page_states = []
-        self._pageNumber = 0
-
-    def showPage(self):
-        self._saved_page_states.append(dict(self.__dict__))
-        self._startPage()
-        self._pageNumber += 1
-
-    def save(self):
-        num_pages = len(self._saved_page_states)
-        for state in self._saved_page_states:
-            self.__dict__.update(state)
-            self.draw_page_number(num_pages)
-            canvas.Canvas.showPage(self)
-        canvas.Canvas.save(self)
-        # Forcer l'ouverture à la première page avec une action plus spécifique
-        self._doc.Catalog.OpenAction = f'<< /S /XYZ /Left 0 /Top 1000 /Zoom 1.0 /Page 1 >>'
-
-    def draw_page_number(self, page_count):
-        self.setFont("Helvetica", 9)
-        self.drawRightString(7.5*inch, 0.5*inch, f"Page {self._pageNumber} sur {page_count}")
 
 class PDFGenerator:
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, cache=True, registre=None):
+        """
+        :param cache: CacheRapports à utiliser, True pour le cache partagé du dossier de la
+                      base (PDF_CONFIG["CACHE_DOSSIER"]), False pour toujours générer.
+        :param registre: RegistreModeles des styles et images, celui du processus par défaut.
+        """
         self.db_manager = db_manager
+        self.registre = registre or RegistreModeles.instance()
+        if cache is True:
+            dossier = os.path.dirname(os.path.abspath(db_manager.db_file))
+            cache = CacheRapports.instance(os.path.join(dossier, PDF_CONFIG["CACHE_DOSSIER"]))
+        self.cache = cache or None
         self.mois_noms = {
             1: "Janvier", 2: "Février", 3: "Mars", 4: "Avril",
             5: "Mai", 6: "Juin", 7: "Juillet", 8: "Août",
@@ -60,289 +226,210 @@ class PDFGenerator:
         except (ValueError, TypeError):
             return 0.0
 
-    def generate_ddf(self, mois, annee, output_path):
-        """Génère un PDF pour les dépenses et recettes."""
+    def generate_ddf(self, mois, annee, output_path, mois_fin=None, progression=None):
+        """
+        Génère le PDF des dépenses et recettes d'un mois, ou des mois mois à mois_fin d'une
+        année (trimestre), voir RapportFlux.
+
+        Les lignes de la période sont lues une seule fois, par lots de LIGNES_PAR_LOT, et
+        les deux passages portent sur ces mêmes lignes : mise en page à blanc pour compter
+        les pages, puis rendu. Une écriture faite pendant l'export ne peut donc pas fausser
+        « Page n sur N ».
+        Si ces lignes, les totaux, le modèle et le logo n'ont pas changé depuis un rendu
+        précédent, le PDF en cache est copié sans nouveau rendu (voir _empreinte).
+        :param progression: Avancement du rendu page par page, voir RapportFlux.
+        """
         try:
-            # Obtenir le chemin absolu du dossier du script
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            print(f"Dossier du script : {script_dir}")
-            
-            # Créer le dossier data s'il n'existe pas
-            data_dir = os.path.join(script_dir, "data")
-            print(f"Dossier data : {data_dir}")
-            
-            if not os.path.exists(data_dir):
-                os.makedirs(data_dir)
-                print(f"Dossier 'data' créé à : {data_dir}")
-
-            # Nom du fichier PDF
+            logo = self._logo("ddf")
+            mois_fin = mois_fin or mois
             nom_mois = self.mois_noms.get(mois, str(mois))
-            pdf_filename = f"donnees_fiscales_{nom_mois}_{annee}.pdf"
+            if mois_fin != mois:
+                nom_mois = f"{nom_mois} à {self.mois_noms.get(mois_fin, str(mois_fin))}"
             pdf_path = output_path  # Utiliser le chemin passé en argument
             print(f"Chemin complet du fichier PDF : {pdf_path}")
 
-            # Créer le document PDF avec le canvas personnalisé
-            doc = SimpleDocTemplate(
-                pdf_path,
-                pagesize=A4,
-                rightMargin=30,
-                leftMargin=30,
-                topMargin=30,
-                bottomMargin=30,
-                pageCompression=1
+            # Totaux lus dans la table de synthèse totaux_mensuels, cumulés sur la période
+            totaux = tuple(
+                tuple(map(sum, zip(*(self.db_manager.get_totaux_periode(type_, m, annee)
+                                     for m in range(mois, mois_fin + 1)))))
+                for type_ in ("depense", "recette")
             )
 
-            # Récupérer les dépenses
-            query_depenses = """
-            SELECT date, fournisseur, ttc, tva_id, montant_tva, validation, commentaire
-            FROM depenses
-            WHERE strftime('%m', date) = ? AND strftime('%Y', date) = ?
-            ORDER BY date
-            """
-            depenses = self.db_manager.fetch_all(query_depenses, (f"{mois:02d}", annee))
-
-            # Récupérer les recettes
-            query_recettes = """
-            SELECT date, client, montant, tva, montant_tva, commentaire
-            FROM recettes
-            WHERE strftime('%m', date) = ? AND strftime('%Y', date) = ?
-            ORDER BY date
-            """
-            recettes = self.db_manager.fetch_all(query_recettes, (f"{mois:02d}", annee))
-
-            # Calculer les totaux
-            total_depenses_ttc = sum(self.safe_float(d['ttc']) for d in depenses)
-            total_depenses_tva = sum(self.safe_float(d['montant_tva']) for d in depenses)
-            total_recettes = sum(self.safe_float(r['montant']) for r in recettes)
-            total_recettes_tva = sum(self.safe_float(r['montant_tva']) for r in recettes)
-
-            styles = getSampleStyleSheet()
-            elements = []
-
-            # Style personnalisé pour le titre principal
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=20,
-                spaceAfter=30,
-                textColor=colors.HexColor('#1a237e'),  # Bleu foncé
-                alignment=1,  # Centré
-                fontName='Helvetica-Bold',
-                leading=24
+            depenses = list(self.db_manager.iter_periode("depenses", mois, annee, LIGNES_PAR_LOT, mois_fin))
+            recettes = list(self.db_manager.iter_periode("recettes", mois, annee, LIGNES_PAR_LOT, mois_fin))
+
+            # Rapport déjà généré pour ces mêmes lignes : copie du PDF en cache. La clé est
+            # calculée sur les lignes et totaux rendus ci-dessous, jamais sur une autre lecture
+            cle = self._empreinte(logo, ("ddf", int(annee), mois, mois_fin, totaux),
+                                  chain(["depenses"], depenses, ["recettes"], recettes))
+            if self._depuis_cache(cle, pdf_path):
+                return pdf_path
+
+            nb_depenses = sum(map(len, depenses))
+            nb_recettes = sum(map(len, recettes))
+
+            # Premier passage : nombre de pages
+            plan = RapportFlux(registre=self.registre)
+            self._mettre_en_page(plan, nom_mois, annee, logo, totaux,
+                                 repeat(None, nb_depenses), repeat(None, nb_recettes))
+            plan.enregistrer()
+
+            # Second passage : rendu des mêmes lignes
+            print(f"Début de la génération du PDF ({nb_depenses + nb_recettes} lignes, {plan.page} pages)...")
+            rapport = RapportFlux(pdf_path, total_pages=plan.page, registre=self.registre,
+                                  progression=progression, total_lignes=plan.lignes)
+            self._mettre_en_page(
+                rapport, nom_mois, annee, logo, totaux,
+                (self._ligne_depense(row) for lot in depenses for row in lot),
+                (self._ligne_recette(row) for lot in recettes for row in lot),
             )
+            rapport.enregistrer()
+            print("Génération du PDF terminée")
+            self._mettre_en_cache(cle, pdf_path)
 
-            # Style personnalisé pour les sous-titres
-            subtitle_style = ParagraphStyle(
-                'CustomSubtitle',
-                parent=styles['Heading2'],
-                fontSize=16,
-                spaceBefore=20,
-                spaceAfter=10,
-                textColor=colors.HexColor('#283593'),  # Bleu plus clair
-                alignment=0,  # Aligné à gauche
-                fontName='Helvetica-Bold',
-                leading=20
-            )
+            # Vérifier que le fichier a bien été créé
+            if not os.path.exists(pdf_path):
+                raise Exception("Le fichier PDF n'a pas été créé correctement")
+            return pdf_path
 
-            # En-tête avec logo et titre
-            logo_path = os.path.join(data_dir, "logo.jpg")
-            if os.path.exists(logo_path):
-                # Créer un tableau pour l'en-tête
-                header_data = [
-                    [Image(logo_path, width=1.5*inch, height=1.5*inch), 
-                     Paragraph(f"Document de Données Fiscales<br/>Période : {nom_mois} {annee}", title_style)]
-                ]
-                header_table = Table(header_data, colWidths=[2*inch, 4*inch])
-                header_table.setStyle(TableStyle([
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 20),
-                ]))
-                elements.append(header_table)
-            else:
-                # Si pas de logo, afficher juste le titre
-                elements.append(Paragraph(f"Document de Données Fiscales<br/>Période : {nom_mois} {annee}", title_style))
-            
-            elements.append(Spacer(1, 20))
-
-            # Tableau des dépenses
-            depenses_data = [['Date', 'Fournisseur', 'TTC', 'Taux TVA', 'TVA']]
-            for depense in depenses:
-                depenses_data.append([
-                    self.format_date(depense['date']),
-                    depense['fournisseur'],
-                    f"{self.safe_float(depense['ttc']):.2f} €",
-                    f"{depense['tva_id']}%",
-                    f"{self.safe_float(depense['montant_tva']):.2f} €"
-                ])
-            depenses_data.append(['', '', f"{total_depenses_ttc:.2f} €", '', f"{total_depenses_tva:.2f} €"])
-
-            depenses_table = Table(depenses_data, colWidths=[1.2*inch, 2.5*inch, 1.2*inch, 1*inch, 1.2*inch])
-            depenses_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1a237e')),  # Bleu foncé pour l'en-tête
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#e8eaf6')),  # Bleu très clair pour le total
-                ('TEXTCOLOR', (0, -1), (-1, -1), colors.black),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('ALIGN', (0, -1), (-1, -1), 'CENTER'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('ALIGN', (2, 0), (4, -1), 'RIGHT'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 4),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ]))
-            elements.append(Paragraph("DÉPENSES", subtitle_style))
-            elements.append(depenses_table)
-            elements.append(PageBreak())
-
-            # Tableau des recettes
-            recettes_data = [['Date', 'Client', 'Montant', 'Taux TVA', 'TVA']]
-            for recette in recettes:
-                recettes_data.append([
-                    self.format_date(recette['date']),
-                    recette['client'],
-                    f"{self.safe_float(recette['montant']):.2f} €",
-                    f"{recette['tva']}%",
-                    f"{self.safe_float(recette['montant_tva']):.2f} €"
-                ])
-            recettes_data.append(['', '', f"{total_recettes:.2f} €", '', f"{total_recettes_tva:.2f} €"])
-
-            recettes_table = Table(recettes_data, colWidths=[1.2*inch, 2.5*inch, 1.2*inch, 1*inch, 1.2*inch])
-            recettes_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1a237e')),  # Bleu foncé pour l'en-tête
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#e8eaf6')),  # Bleu très clair pour le total
-                ('TEXTCOLOR', (0, -1), (-1, -1), colors.black),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('ALIGN', (0, -1), (-1, -1), 'CENTER'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('ALIGN', (2, 0), (4, -1), 'RIGHT'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 4),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ]))
-            elements.append(Paragraph("RECETTES", subtitle_style))
-            elements.append(recettes_table)
-            elements.append(PageBreak())
-
-            # Tableau du bilan
-            bilan_data = [
-                ['Total Dépenses TTC', f"{total_depenses_ttc:.2f} €"],
-                ['Total Dépenses TVA', f"{total_depenses_tva:.2f} €"],
-                ['Total Recettes', f"{total_recettes:.2f} €"],
-                ['Total Recettes TVA', f"{total_recettes_tva:.2f} €"],
-                ['Solde', f"{(total_recettes - total_depenses_ttc):.2f} €"],
-                ['TVA à payer', f"{(total_recettes_tva - total_depenses_tva):.2f} €"]
-            ]
-
-            bilan_table = Table(bilan_data, colWidths=[3*inch, 1.5*inch])
-            bilan_table.setStyle(TableStyle([
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 4),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1a237e')),  # Bleu foncé pour l'en-tête
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ]))
-            elements.append(Paragraph("BILAN", subtitle_style))
-            elements.append(bilan_table)
-
-            # Créer le document avec le canvas personnalisé
-            print("Début de la génération du PDF...")
-            try:
-                doc.build(elements, canvasmaker=NumberedCanvas)
-                print("Génération du PDF terminée")
-                
-                # Vérifier que le fichier a bien été créé
-                if os.path.exists(pdf_path):
-                    print(f"Le fichier PDF a été créé avec succès à : {pdf_path}")
-                    return pdf_path
-                else:
-                    print(f"Le fichier n'existe pas à l'emplacement attendu : {pdf_path}")
-                    raise Exception("Le fichier PDF n'a pas été créé correctement")
-            except Exception as build_error:
-                print(f"Erreur lors de la création du PDF : {str(build_error)}")
-                raise build_error
-                
         except Exception as e:
             print(f"Erreur lors de la génération du PDF : {str(e)}")
             raise Exception(f"Erreur lors de la génération du PDF : {str(e)}")
 
-    def generate_pdf(self, data, output_file):
-        """Génère un PDF simple avec les données fournies."""
+    def generate_synthese_annuelle(self, annee, output_path):
+        """
+        Génère le PDF de synthèse d'une année : un tableau des douze mois (totaux lus dans
+        totaux_mensuels) et leur total.
+        """
         try:
-            # Créer le document PDF
-            doc = SimpleDocTemplate(
-                output_file,
-                pagesize=A4,
-                rightMargin=30,
-                leftMargin=30,
-                topMargin=30,
-                bottomMargin=30
-            )
+            mensuels = self.db_manager.get_totaux_mensuels(annee)
+            logo = self._logo("synthese_annuelle")
+            cle = self._empreinte(logo, ("synthese", int(annee), sorted(mensuels.items())))
+            if self._depuis_cache(cle, output_path):
+                return output_path
+            lignes = []
+            cumul = [0.0, 0.0, 0.0, 0.0]
+            for mois in range(1, 13):
+                valeurs = mensuels.get((int(annee), mois), (0.0, 0.0, 0.0, 0.0))
+                cumul = [a + b for a, b in zip(cumul, valeurs)]
+                lignes.append(self._ligne_synthese(self.mois_noms[mois], valeurs))
+
+            rapport = RapportFlux(output_path, total_pages=1, registre=self.registre)
+            rapport.titre([self.registre.modele("synthese_annuelle")["titre"], f"Année : {annee}"], logo)
+            rapport.sous_titre("TOTAUX MENSUELS")
+            rapport.tableau(*self.registre.colonnes("synthese_annuelle", "mois"),
+                            lignes, self._ligne_synthese("Total", cumul))
+            rapport.enregistrer()
+            print(f"Synthèse annuelle {annee} générée : {output_path}")
+            self._mettre_en_cache(cle, output_path)
+            return output_path
 
-            # Styles
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=20,
-                spaceAfter=30,
-                textColor=colors.HexColor('#1a237e'),
-                alignment=1,
-                fontName='Helvetica-Bold',
-                leading=24
-            )
+        except Exception as e:
+            print(f"Erreur lors de la génération du PDF : {str(e)}")
+            raise Exception(f"Erreur lors de la génération du PDF : {str(e)}")
 
-            # Éléments du document
-            elements = []
-
-            # Titre
-            title = Paragraph("Dépenses à Régler", title_style)
-            elements.append(title)
-            elements.append(Spacer(1, 20))
-
-            # Tableau
-            table = Table(data, colWidths=[50, 100, 185, 80])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1a237e')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 4),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ]))
-
-            elements.append(table)
-
-            # Construire le PDF
-            doc.build(elements)
+    def _empreinte(self, logo, parametres, lots=()):
+        """
+        Clé de cache d'un rapport : SHA-256 de la version du modèle et de ses déclarations,
+        de la date du logo, des paramètres (période, totaux) et des lots de lignes lus dans la
+        base. Toute écriture dans la période (ajout, modification, suppression) change les
+        lignes, donc la clé.
+        """
+        empreinte = hashlib.sha256(repr(
+            (VERSION_MODELE, self.registre.empreinte(), os.path.getmtime(logo) if logo else None, parametres)
+        ).encode("utf-8"))
+        if self.cache is not None:
+            for lot in lots:
+                empreinte.update(repr(lot).encode("utf-8"))
+        return empreinte.hexdigest()
+
+    def _depuis_cache(self, cle, output_path):
+        if self.cache is None or not self.cache.obtenir(cle, output_path):
+            return False
+        print(f"PDF repris du cache : {output_path}")
+        return True
+
+    def _mettre_en_cache(self, cle, output_path):
+        if self.cache is None:
+            return
+        try:
+            self.cache.ranger(cle, output_path)
+        except OSError as e:
+            print(f"Mise en cache du PDF impossible : {e}")
+
+    def _ligne_synthese(self, libelle, valeurs):
+        ttc_dep, tva_dep, ttc_rec, tva_rec = valeurs
+        return [libelle, f"{ttc_dep:.2f} €", f"{tva_dep:.2f} €", f"{ttc_rec:.2f} €",
+                f"{tva_rec:.2f} €", f"{(tva_rec - tva_dep):.2f} €"]
+
+    def _logo(self, modele):
+        """Chemin du logo déclaré par le modèle (pdf_modeles.py), ou None s'il n'existe pas."""
+        return self.registre.chemin_image(self.registre.modele(modele)["logo"])
+
+    def _mettre_en_page(self, rapport, nom_mois, annee, logo, totaux, depenses, recettes):
+        """Enchaîne les sections du rapport fiscal ; identique aux deux passages."""
+        (total_depenses_ttc, total_depenses_tva), (total_recettes, total_recettes_tva) = totaux
+
+        rapport.titre([self.registre.modele("ddf")["titre"], f"Période : {nom_mois} {annee}"], logo)
+        rapport.sous_titre("DÉPENSES")
+        rapport.tableau(*self.registre.colonnes("ddf", "depenses"), depenses,
+                        ['', '', f"{total_depenses_ttc:.2f} €", '', f"{total_depenses_tva:.2f} €"])
+        rapport.saut_de_page()
+
+        rapport.sous_titre("RECETTES")
+        rapport.tableau(*self.registre.colonnes("ddf", "recettes"), recettes,
+                        ['', '', f"{total_recettes:.2f} €", '', f"{total_recettes_tva:.2f} €"])
+        rapport.saut_de_page()
+
+        # Tableau du bilan, la première ligne sert d'en-tête
+        _, largeurs, alignements = self.registre.colonnes("ddf", "bilan")
+        rapport.sous_titre("BILAN")
+        rapport.tableau(
+            ['Total Dépenses TTC', f"{total_depenses_ttc:.2f} €"], largeurs, alignements,
+            [
+                ['Total Dépenses TVA', f"{total_depenses_tva:.2f} €"],
+                ['Total Recettes', f"{total_recettes:.2f} €"],
+                ['Total Recettes TVA', f"{total_recettes_tva:.2f} €"],
+                ['Solde', f"{(total_recettes - total_depenses_ttc):.2f} €"],
+                ['TVA à payer', f"{(total_recettes_tva - total_depenses_tva):.2f} €"],
+            ],
+            gras=True,
+        )
+
+    def _ligne_depense(self, row):
+        # id, date, fournisseur, ttc, tva_id, montant_tva, validation, commentaire
+        return [self.format_date(row[1]), row[2], f"{self.safe_float(row[3]):.2f} €",
+                f"{row[4]}%", f"{self.safe_float(row[5]):.2f} €"]
+
+    def _ligne_recette(self, row):
+        # id, date, client, paiement, numero_facture, montant, tva, montant_tva, commentaire
+        return [self.format_date(row[1]), row[2], f"{self.safe_float(row[5]):.2f} €",
+                f"{row[6]}%", f"{self.safe_float(row[7]):.2f} €"]
+
+    def generate_pdf(self, data, output_file, progression=None):
+        """
+        Génère le PDF des fournisseurs à régler (modèle "fournisseurs_a_regler"), en flux
+        comme le rapport fiscal (voir RapportFlux).
+        :param data: Lignes du tableau, la première étant l'en-tête.
+        :param progression: Avancement du rendu page par page, voir RapportFlux.
+        """
+        try:
+            modele = self.registre.modele("fournisseurs_a_regler")
+            _, largeurs, alignements = self.registre.colonnes("fournisseurs_a_regler", "depenses")
+
+            # Premier passage : nombre de pages, puis rendu
+            plan = RapportFlux(registre=self.registre)
+            plan.titre([modele["titre"]])
+            plan.tableau(data[0], largeurs, alignements, data[1:])
+            plan.enregistrer()
+
+            rapport = RapportFlux(output_file, total_pages=plan.page, registre=self.registre,
+                                  progression=progression, total_lignes=plan.lignes)
+            rapport.titre([modele["titre"]])
+            rapport.tableau(data[0], largeurs, alignements, data[1:])
+            rapport.enregistrer()
             return True
 
         except Exception as e:
             print(f"Erreur lors de la génération du PDF : {str(e)}")
-            return False 
\ No newline at end of file
+            return False
@@ -0,0 +1,151 @@
+import hashlib
+import os
+import threading
+from reportlab import rl_config
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+
+# Flux du PDF écrits en binaire plutôt qu'en ASCII85 : sans son extension C, ReportLab encode
+# en Python pur le logo et le contenu des pages de chaque document (réglage public, pour tout
+# le processus)
+rl_config.useA85 = 0
+
+# Modèles des rapports PDF, déclarés une fois sous forme de données et partagés par tous les
+# rapports (pdf_generator.py) ; les objets ReportLab correspondants sont construits une seule
+# fois par processus par RegistreModeles.
+
+# Styles de texte : police, taille, couleur, interligne, alignement (0 gauche, 1 centre), espace après
+STYLES = {
+    "titre": {"police": "Helvetica-Bold", "taille": 20, "couleur": "#1a237e", "interligne": 24,
+              "alignement": 1, "espace_apres": 30},
+    "sous_titre": {"police": "Helvetica-Bold", "taille": 16, "couleur": "#283593", "interligne": 20,
+                   "alignement": 0, "espace_apres": 10},
+    "pied_de_page": {"police": "Helvetica", "taille": 9, "couleur": "#000000", "interligne": 11,
+                     "alignement": 2, "espace_apres": 0},
+}
+
+# Styles de tableaux : en-tête de colonnes foncé, ligne de total sur fond clair, grille noire
+STYLES_TABLEAUX = {
+    "standard": {
+        "entete_fond": "#1a237e", "entete_texte": "#f5f5f5", "entete_police": "Helvetica-Bold",
+        "police": "Helvetica", "police_grasse": "Helvetica-Bold", "taille": 10, "total_fond": "#e8eaf6",
+        "grille": 1, "marge_x": 6, "marge_y": 4,
+    },
+}
+
+# Images, relatives au dossier de l'application
+IMAGES = {
+    "logo": os.path.join("data", "Logo.jpg"),
+}
+
+# Rapports : titre, logo et tableaux ; chaque colonne est (libellé, largeur en points, alignement 'C' ou 'R')
+MODELES = {
+    "ddf": {
+        "titre": "Document de Données Fiscales",
+        "logo": "logo",
+        "tableaux": {
+            "depenses": {"style": "standard", "colonnes": [
+                ("Date", 1.2*inch, "C"), ("Fournisseur", 2.5*inch, "C"), ("TTC", 1.2*inch, "R"),
+                ("Taux TVA", 1*inch, "C"), ("TVA", 1.2*inch, "R"),
+            ]},
+            "recettes": {"style": "standard", "colonnes": [
+                ("Date", 1.2*inch, "C"), ("Client", 2.5*inch, "C"), ("Montant", 1.2*inch, "R"),
+                ("Taux TVA", 1*inch, "C"), ("TVA", 1.2*inch, "R"),
+            ]},
+            # Libellés calculés : la première ligne du bilan sert d'en-tête
+            "bilan": {"style": "standard", "colonnes": [("", 3*inch, "C"), ("", 1.5*inch, "R")]},
+        },
+    },
+    "synthese_annuelle": {
+        "titre": "Synthèse Fiscale Annuelle",
+        "logo": "logo",
+        "tableaux": {
+            "mois": {"style": "standard", "colonnes": [
+                ("Mois", 1*inch, "C"), ("Dépenses TTC", 1.2*inch, "R"), ("TVA Dépenses", 1.2*inch, "R"),
+                ("Recettes", 1.2*inch, "R"), ("TVA Recettes", 1.2*inch, "R"), ("TVA à payer", 1.1*inch, "R"),
+            ]},
+        },
+    },
+    "fournisseurs_a_regler": {
+        "titre": "Dépenses à Régler",
+        "logo": None,
+        "tableaux": {
+            "depenses": {"style": "standard", "colonnes": [
+                ("ID", 50, "C"), ("Date", 100, "C"), ("Fournisseur", 185, "R"), ("TTC", 80, "C"),
+            ]},
+        },
+    },
+}
+
+class RegistreModeles:
+    """
+    Registre des styles et images des rapports, partagé par tout le processus.
+
+    Les couleurs sont construites à partir de STYLES et STYLES_TABLEAUX à la première
+    demande, puis réutilisées. Les images sont dessinées par leur chemin (canvas.drawImage),
+    que ReportLab n'enregistre qu'une fois par document ; le JPEG y est recopié tel quel,
+    sans encodage ASCII85 (rl_config.useA85). Les objets construits ne sont jamais modifiés
+    et peuvent servir à plusieurs threads.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        """Retourne le registre partagé du processus."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self, images=None):
+        """:param images: Chemins des images par nom, IMAGES par défaut."""
+        self.dossier = os.path.dirname(os.path.abspath(__file__))
+        self.images = images if images is not None else IMAGES
+        self._objets = {}
+        self._lock = threading.RLock()  # Une fabrique peut demander un autre objet (couleur)
+
+    def _construire(self, cle, fabrique):
+        with self._lock:
+            if cle not in self._objets:
+                self._objets[cle] = fabrique()
+            return self._objets[cle]
+
+    def modele(self, nom):
+        return MODELES[nom]
+
+    def empreinte(self):
+        """SHA-256 des déclarations, pour la clé du cache des rapports (utils/cache_rapports.py)."""
+        return self._construire("empreinte", lambda: hashlib.sha256(
+            repr((STYLES, STYLES_TABLEAUX, MODELES, self.images)).encode("utf-8")).hexdigest())
+
+    def colonnes(self, modele, tableau):
+        """:return: (libellés, largeurs, alignements) des colonnes d'un tableau d'un modèle."""
+        libelles, largeurs, alignements = zip(*MODELES[modele]["tableaux"][tableau]["colonnes"])
+        return list(libelles), list(largeurs), list(alignements)
+
+    def couleur(self, valeur):
+        return self._construire(("couleur", valeur), lambda: colors.HexColor(valeur))
+
+    def style_texte(self, nom):
+        """Style de texte brut (dict de STYLES), pour le dessin direct sur le canvas."""
+        return STYLES[nom]
+
+    def style_tableau(self, nom):
+        """Style de tableau brut (dict de STYLES_TABLEAUX), pour le dessin direct sur le canvas."""
+        return STYLES_TABLEAUX[nom]
+
+    def chemin_image(self, nom):
+        """:return: Chemin absolu de l'image, ou None si elle n'est pas déclarée ou n'existe pas."""
+        if nom is None or nom not in self.images:
+            return None
+        chemin = os.path.join(self.dossier, self.images[nom])
+        return chemin if os.path.exists(chemin) else None
+
+    def dessiner_image(self, c, chemin, x, y, largeur, hauteur):
+        """
+        Dessine une image sur le canvas (API publique canvas.drawImage) : l'image n'est écrite
+        qu'une fois dans le document, même dessinée sur plusieurs pages.
+        """
+        c.drawImage(chemin, x, y, largeur, hauteur)
@@ -0,0 +1,219 @@
+import threading
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+from database import DatabaseManager
+from constants import DB_CONFIG
+
+INTERVALLE_PROGRESSION_MS = 100  # Relevé de l'avancement des tâches par le thread de l'interface
+_AUCUNE = object()
+
+
+class TacheAnnulee(Exception):
+    """Levée par progression() dans une tâche annulée : la tâche s'arrête à son prochain point d'avancement."""
+
+
+class QueryTask(QRunnable):
+    """Exécute une tâche de lecture sur le lecteur du thread et signale le résultat au service."""
+
+    def __init__(self, service, request_id, job, with_progress=False):
+        super().__init__()
+        self.service = service
+        self.request_id = request_id
+        self.job = job
+        self.with_progress = with_progress
+        self.cancelled = False
+        self._reader = None
+        self._progression = _AUCUNE
+        self._lock = threading.Lock()
+
+    def run(self):
+        with self._lock:
+            if self.cancelled:
+                return
+            self._reader = reader = self.service.db_manager.reader()
+        result, error = None, None
+        try:
+            if self.with_progress:
+                result = self.job(reader, self.progress)
+            else:
+                result = self.job(reader)
+        except Exception as e:
+            error = e
+        finally:
+            with self._lock:
+                self._reader = None
+        if not self.cancelled:
+            self.service.task_done.emit(self.request_id, result, error)
+
+    def progress(self, value):
+        """
+        Note une avancée de la tâche, relevée par le thread de l'interface (seule la plus
+        récente est transmise).
+        :raise TacheAnnulee: Si la tâche a été annulée ; son résultat serait de toute façon ignoré.
+        """
+        if self.cancelled:
+            raise TacheAnnulee("Tâche annulée")
+        with self._lock:
+            self._progression = value
+
+    def take_progress(self):
+        """:return: Dernière avancée notée depuis le relevé précédent, ou _AUCUNE."""
+        with self._lock:
+            value, self._progression = self._progression, _AUCUNE
+            return value
+
+    def cancel(self):
+        """Annule la tâche : ignorée si elle n'a pas démarré, interrompue si elle est en cours."""
+        with self._lock:
+            self.cancelled = True
+            if self._reader is not None:
+                self._reader.interrupt()
+
+
+class QueryService(QObject):
+    """
+    Exécute les lectures SQLite hors du thread de l'interface.
+
+    Chaque tâche est une fonction job(reader) appelée dans un thread du pool avec la
+    connexion de lecture de ce thread (DatabaseManager.reader()) ; son résultat est
+    remis à on_result dans le thread de l'interface. Une nouvelle demande sur un même
+    canal (par exemple la fenêtre qui charge sa période) remplace la précédente, dont
+    le résultat est ignoré. Les tâches longues (long_running) ont leur propre pool : un
+    rendu de PDF ou un import n'occupe jamais les threads des lectures interactives.
+    """
+
+    task_done = Signal(int, object, object)
+    # Émis après le remplacement du fichier de la base (restauration) : les fenêtres rechargent
+    database_replaced = Signal()
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        """Retourne le service partagé de l'application."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, db_file=None, max_threads=None, parent=None):
+        super().__init__(parent)
+        self.db_manager = DatabaseManager(db_file)
+        # Un thread par connexion de lecture ; threads conservés : chacun garde sa connexion ouverte
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads or DB_CONFIG["READERS"])
+        self.pool.setExpiryTimeout(-1)
+        self.pool_longues = QThreadPool(self)
+        self.pool_longues.setMaxThreadCount(DB_CONFIG["TACHES_LONGUES"])
+        self.pool_longues.setExpiryTimeout(-1)
+        self._next_id = 0
+        self._requests = {}  # request_id -> (tâche, canal, on_result, on_error, on_progress)
+        self._channels = {}  # canal -> request_id en cours
+        self.task_done.connect(self._on_task_done)
+        # Avancement relevé périodiquement plutôt qu'émis par les threads du pool : une tâche
+        # qui avance vite (une page de PDF toutes les quelques ms) n'inonde pas la boucle d'événements
+        self._progress_timer = QTimer(self)
+        self._progress_timer.setInterval(INTERVALLE_PROGRESSION_MS)
+        self._progress_timer.timeout.connect(self._on_progress_timer)
+
+    def submit(self, job, on_result=None, on_error=None, channel=None, on_progress=None, long_running=False):
+        """
+        Lance une lecture en arrière-plan.
+        :param job: Fonction job(reader) exécutée dans un thread du pool.
+        :param on_result: Appelée avec le résultat, dans le thread de l'interface.
+        :param on_error: Appelée avec l'exception levée par job ; à défaut, l'erreur est affichée en console.
+        :param channel: Clé identifiant le demandeur ; annule la demande précédente du même canal.
+        :param on_progress: Si fourni, job est appelée comme job(reader, progression) ; chaque
+                            appel progression(valeur) est remis à on_progress dans le thread de l'interface
+                            (la dernière valeur, toutes les INTERVALLE_PROGRESSION_MS au plus).
+                            Après annulation, progression lève TacheAnnulee, ce qui arrête la tâche.
+        :param long_running: Tâche longue (PDF, export par lot, import, archivage, sauvegarde),
+                             exécutée sur le pool des tâches longues.
+        :return: Identifiant de la demande.
+        """
+        if channel is not None:
+            self.cancel(channel)
+        self._next_id += 1
+        task = QueryTask(self, self._next_id, job, with_progress=on_progress is not None)
+        self._requests[self._next_id] = (task, channel, on_result, on_error, on_progress)
+        if channel is not None:
+            self._channels[channel] = self._next_id
+        if on_progress is not None and not self._progress_timer.isActive():
+            self._progress_timer.start()
+        (self.pool_longues if long_running else self.pool).start(task)
+        return self._next_id
+
+    def cancel(self, channel):
+        """Annule la demande en cours d'un canal ; retourne True s'il y en avait une."""
+        request_id = self._channels.pop(channel, None)
+        entry = self._requests.pop(request_id, None)
+        if entry is None:
+            return False
+        entry[0].cancel()
+        return True
+
+    def cancel_all(self):
+        """Annule toutes les demandes en cours ; wait_for_done() attend ensuite la fin des tâches interrompues."""
+        for task, *_ in self._requests.values():
+            task.cancel()
+        self._requests.clear()
+        self._channels.clear()
+
+    def is_pending(self, channel):
+        """Indique si une demande du canal est en attente de résultat."""
+        return channel in self._channels
+
+    def has_pending(self):
+        """Indique si une demande, tous canaux confondus, est en attente de résultat."""
+        return bool(self._requests)
+
+    def call_when_done(self, callback):
+        """
+        Appelle callback dans le thread de l'interface dès qu'aucune demande n'est en attente
+        et qu'aucune tâche ne tourne encore (tâches annulées comprises), sans bloquer la boucle
+        d'événements comme wait_for_done : l'état est relevé toutes les INTERVALLE_PROGRESSION_MS.
+        """
+        timer = QTimer(self)
+        timer.setInterval(INTERVALLE_PROGRESSION_MS)
+
+        def relever():
+            if self._requests or self.pool.activeThreadCount() or self.pool_longues.activeThreadCount():
+                return
+            timer.stop()
+            timer.deleteLater()
+            callback()
+
+        timer.timeout.connect(relever)
+        timer.start()
+
+    def wait_for_done(self, msecs=-1):
+        """Attend la fin des tâches des deux pools (fermeture de l'application, scripts)."""
+        return self.pool_longues.waitForDone(msecs) and self.pool.waitForDone(msecs)
+
+    def _on_task_done(self, request_id, result, error):
+        entry = self._requests.pop(request_id, None)
+        if entry is None:
+            return  # Demande annulée ou remplacée entre-temps
+        task, channel, on_result, on_error, on_progress = entry
+        if channel is not None and self._channels.get(channel) == request_id:
+            del self._channels[channel]
+        if on_progress is not None:
+            # Dernière avancée pas encore relevée, avant le résultat
+            value = task.take_progress()
+            if value is not _AUCUNE:
+                on_progress(value)
+        if error is not None:
+            if on_error is not None:
+                on_error(error)
+            else:
+                print(f"Erreur lors de la requête en arrière-plan : {error}")
+        elif on_result is not None:
+            on_result(result)
+
+    def _on_progress_timer(self):
+        suivies = [(task, on_progress) for task, _, _, _, on_progress in self._requests.values() if on_progress]
+        if not suivies:
+            self._progress_timer.stop()
+            return
+        for task, on_progress in suivies:
+            value = task.take_progress()
+            if value is not _AUCUNE and not task.cancelled:
+                on_progress(value)
@@ -164,6 +164,9 @@ TTC recettes, TVA recettes, solde, TVA à reverser.</p>
   <li>Choisir l'emplacement et le nom du fichier dans la boîte de dialogue</li>
   <li>Le PDF est généré avec les dépenses, recettes et totaux du mois</li>
 </ol>
+<p>La génération se fait en arrière-plan : la saisie reste possible. Pour un long rapport, une
+fenêtre indique les lignes mises en page et la page en cours ; <b>Annuler</b> arrête la génération
+sans créer le fichier. Une fois le PDF écrit, l'application propose de l'ouvrir.</p>
 """,
 
     "Sauvegardes": """
@@ -1,12 +1,96 @@
 from PySide6.QtWidgets import QDialog, QMessageBox, QLineEdit, QComboBox
 from PySide6.QtCore import Qt, QEvent, QDate
-from util import calculate_tva, handle_exception
+from util import calculate_tva, convert_month_to_number, handle_exception
 from ui.aide_dialog import AideDialog
+from database import period_bounds
+from query_service import QueryService
+from constants import ERROR_MESSAGES
 
 
 class GestionBase(QDialog):
     """Classe de base commune à GestionDepenses et GestionRecettes."""
 
+    # Colonnes (montant TTC, montant TVA) des lignes du modèle, définies par les sous-classes
+    TOTAL_COLUMNS = (None, None)
+    # Lecture de la période (méthode de DatabaseReader) et type de totaux_mensuels
+    FETCH_PERIODE = None
+    TYPE_TOTAUX = None
+    TABLE = None
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Base restaurée : la période affichée est relue
+        QueryService.instance().database_replaced.connect(self.charger_periode)
+
+    def charger_periode(self):
+        """Lit en arrière-plan les lignes et les totaux de la période affichée."""
+        mois, annee = convert_month_to_number(self.mois), self.annee
+        self.periode_bornes = period_bounds(mois, annee)
+        fetch, type_ = self.FETCH_PERIODE, self.TYPE_TOTAUX
+
+        def job(reader):
+            rows = getattr(reader, fetch)(mois, annee, as_tuples=True)
+            return rows, reader.get_totaux_periode(type_, mois, annee)
+
+        QueryService.instance().submit(
+            job,
+            self.on_periode_chargee,
+            lambda e: handle_exception(e, "Erreur lors du chargement de la période"),
+            channel=self,
+        )
+
+    def done(self, result):
+        QueryService.instance().cancel(self)
+        QueryService.instance().database_replaced.disconnect(self.charger_periode)
+        super().done(result)
+
+    def on_periode_chargee(self, resultat):
+        rows, (self.total_ttc, self.total_montant_tva) = resultat
+        self.model.set_rows(rows)
+        self.update_totals(self.total_ttc, self.total_montant_tva)
+
+    def ligne_archivee(self):
+        """
+        Indique, avec un message, si la ligne sélectionnée vient d'un exercice archivé : la
+        grille d'une année archivée lit aussi l'archive, mais les écritures ne portent que sur
+        la base courante.
+        """
+        if self.db_manager.fetch_row_by_id(self.TABLE, self.selected_row_id) is not None:
+            return False
+        QMessageBox.warning(self, "Attention", ERROR_MESSAGES["ARCHIVED_ROW"])
+        return True
+
+    def in_periode(self, row):
+        """Indique si une ligne (date ISO en colonne 1) appartient à la période affichée."""
+        debut, fin = self.periode_bornes
+        return debut <= row[1] < fin
+
+    def apply_row_change(self, old=None, new=None, row=None):
+        """
+        Répercute une écriture sur la grille et les totaux, sans recharger la période.
+        :param old: Valeurs de la ligne avant l'écriture (None pour un ajout).
+        :param new: Valeurs de la ligne après l'écriture (None pour une suppression).
+        :param row: Position de la ligne dans le modèle quand old est fourni.
+        """
+        if QueryService.instance().is_pending(self):
+            # Lecture lancée avant l'écriture : on la relance pour qu'elle l'inclue
+            self.charger_periode()
+            return
+        ttc_col, tva_col = self.TOTAL_COLUMNS
+        if old is not None:
+            self.total_ttc -= float(old[ttc_col] or 0)
+            self.total_montant_tva -= float(old[tva_col] or 0)
+        if new is not None and self.in_periode(new):
+            self.total_ttc += float(new[ttc_col] or 0)
+            self.total_montant_tva += float(new[tva_col] or 0)
+            if old is not None:
+                self.model.update_row(row, new)
+            else:
+                self.model.insert_row(new)
+        elif old is not None:
+            self.model.remove_row(row)
+        self.update_totals(self.total_ttc, self.total_montant_tva)
+
     def eventFilter(self, obj, event):
         if event.type() == QEvent.KeyPress:
             if event.key() in (Qt.Key_Return, Qt.Key_Enter):
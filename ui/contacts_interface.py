@@ -1,8 +1,10 @@
-from PySide6.QtWidgets import QMainWindow, QMessageBox, QTableWidgetItem
+from PySide6.QtWidgets import QMainWindow, QMessageBox
 from PySide6.QtCore import QEvent, Qt
 from ui.ui_contacts_manager import Ui_ContactsManager
 from ui.aide_dialog import AideDialog
+from ui.table_model import RowTableModel
 from database import DatabaseManager
+from query_service import QueryService
 
 
 class ContactsManager(QMainWindow):
@@ -12,13 +14,17 @@ class ContactsManager(QMainWindow):
         self.ui.setupUi(self)
         self.db_manager = DatabaseManager()
         self._contacts_loaded = False
+        self.model = RowTableModel(["Nom", "Prénom", "Téléphone", "Email"], parent=self)
+        self.ui.contacts_table.setModel(self.model)
+        self.ui.contacts_table.verticalHeader().setVisible(False)
 
         self.ui.add_button.clicked.connect(self.add_contact)
         self.ui.edit_button.clicked.connect(self.edit_contact)
         self.ui.delete_button.clicked.connect(self.delete_contact)
-        self.ui.contacts_table.cellClicked.connect(self.fill_inputs)
+        self.ui.contacts_table.clicked.connect(lambda index: self.fill_inputs(index.row(), index.column()))
         self.ui.pushButton_quitter.clicked.connect(self.close)
         self.ui.contacts_table.installEventFilter(self)
+        QueryService.instance().database_replaced.connect(self.on_base_remplacee)
 
     def eventFilter(self, obj, event):
         if obj == self.ui.contacts_table and event.type() == QEvent.Show and not self._contacts_loaded:
@@ -26,19 +32,19 @@ class ContactsManager(QMainWindow):
             self._contacts_loaded = True
         return super().eventFilter(obj, event)
 
+    def on_base_remplacee(self):
+        if self._contacts_loaded:
+            self.load_contacts()
+
     def load_contacts(self):
-        contacts = self.db_manager.fetch_all("SELECT nom, prenom, telephone, email FROM contacts")
-        self.ui.contacts_table.setRowCount(len(contacts))
-        self.ui.contacts_table.verticalHeader().setVisible(False)
-        for row_index, row_data in enumerate(contacts):
-            for column_index, item in enumerate(row_data):
-                self.ui.contacts_table.setItem(row_index, column_index, QTableWidgetItem(str(item)))
+        contacts = self.db_manager.fetch_all("SELECT nom, prenom, telephone, email FROM contacts", as_tuples=True)
+        self.model.set_rows(contacts)
 
     def fill_inputs(self, row, column):
-        self.ui.name_input.setText(self.ui.contacts_table.item(row, 0).text())
-        self.ui.prenom_input.setText(self.ui.contacts_table.item(row, 1).text())
-        self.ui.telephone_input.setText(self.ui.contacts_table.item(row, 2).text())
-        self.ui.email_input.setText(self.ui.contacts_table.item(row, 3).text())
+        self.ui.name_input.setText(self.model.text(row, 0))
+        self.ui.prenom_input.setText(self.model.text(row, 1))
+        self.ui.telephone_input.setText(self.model.text(row, 2))
+        self.ui.email_input.setText(self.model.text(row, 3))
 
     def add_contact(self):
         nom = self.ui.name_input.text()
@@ -58,7 +64,7 @@ class ContactsManager(QMainWindow):
             QMessageBox.warning(self, "Erreur", "Erreur lors de l'ajout du contact.")
 
     def edit_contact(self):
-        selected_row = self.ui.contacts_table.currentRow()
+        selected_row = self.ui.contacts_table.currentIndex().row()
         if selected_row < 0:
             QMessageBox.warning(self, "Erreur", "Veuillez sélectionner un contact à modifier.")
             return
@@ -66,7 +72,7 @@ class ContactsManager(QMainWindow):
         if not nom:
             QMessageBox.warning(self, "Erreur", "Le nom est obligatoire.")
             return
-        contact_id = self.db_manager.get_contact_id(self.ui.contacts_table.item(selected_row, 0).text())
+        contact_id = self.db_manager.get_contact_id(self.model.text(selected_row, 0))
         success = self.db_manager.update_contact(
             contact_id, nom,
             self.ui.prenom_input.text(),
@@ -80,11 +86,11 @@ class ContactsManager(QMainWindow):
             QMessageBox.warning(self, "Erreur", "Erreur lors de la modification du contact.")
 
     def delete_contact(self):
-        selected_row = self.ui.contacts_table.currentRow()
+        selected_row = self.ui.contacts_table.currentIndex().row()
         if selected_row < 0:
             QMessageBox.warning(self, "Erreur", "Veuillez sélectionner un contact à supprimer.")
             return
-        contact_name = self.ui.contacts_table.item(selected_row, 0).text()
+        contact_name = self.model.text(selected_row, 0)
         response = QMessageBox.question(self, "Confirmation",
                                         f"Êtes-vous sûr de vouloir supprimer le contact '{contact_name}' ?",
                                         QMessageBox.Yes | QMessageBox.No)
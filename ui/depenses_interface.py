@@ -1,7 +1,9 @@
 from PySide6.QtWidgets import QDialog, QTableWidgetItem, QMessageBox, QLineEdit, QComboBox, QVBoxLayout, QTableWidget, QLabel, QHBoxLayout, QPushButton
 from PySide6.QtCore import Qt, QEvent, QDate
+from PySide6.QtGui import QColor
 from ui.ui_gestion_depenses import Ui_Dialog
 from ui.base_gestion import GestionBase
+from ui.table_model import RowTableModel, format_iso_date
 from util import (
     PeriodeManager,
     convert_month_to_number,
@@ -11,7 +13,7 @@ from util import (
     configure_fournisseur_combobox,
     handle_exception,
 )
-from database import DatabaseManager
+from database import DatabaseManager, period_bounds
 from datetime import datetime
 from constants import ERROR_MESSAGES, UI_CONFIG
 from calculette import CalculetteDialog
@@ -41,13 +43,27 @@ COLUMN_WIDTHS = {
 COLUMN_HEADERS = ["Repère", "Date", "Fournisseur", "TTC", "Taux TVA", "Montant TVA", "Validation", "Commentaire"]
 
 
+def validation_color(value):
+    if value == "Non":
+        return QColor(Qt.red)
+    if value == "Oui":
+        return QColor(Qt.green)
+    return None
+
+
 class GestionDepenses(GestionBase):
+    TOTAL_COLUMNS = (TABLE_COLUMNS["TTC"], TABLE_COLUMNS["TVA_AMOUNT"])
+    FETCH_PERIODE = "fetch_depenses_periode"
+    TYPE_TOTAUX = "depense"
+    TABLE = "depenses"
+
     def __init__(self):
         super().__init__()
         self.ui = Ui_Dialog()
         self.ui.setupUi(self)
 
         self.selected_row_id = None
+        self.selected_row = None
         self.periode_manager = PeriodeManager()
         self.mois, self.annee = self.periode_manager.get_periode()
         self.db_manager = DatabaseManager("data/mlbdd.db")
@@ -68,7 +84,7 @@ class GestionDepenses(GestionBase):
         self._connect_buttons()
         self.ui.lineEditMontant.textChanged.connect(self.calculate_tva)
         self.ui.comboBoxTVA.currentTextChanged.connect(self.calculate_tva)
-        self.ui.tableWidget.cellClicked.connect(self.load_selected_row)
+        self.ui.tableWidget.clicked.connect(lambda index: self.load_selected_row(index.row()))
         self.ui.push_calculettettc.clicked.connect(self.calculate_and_update)
         self.ui.pushButtonValider.setDefault(True)
         self.ui.quitterButton.setAutoDefault(False)
@@ -94,8 +110,14 @@ class GestionDepenses(GestionBase):
 
     def configure_table(self):
         try:
-            self.ui.tableWidget.setColumnCount(len(COLUMN_HEADERS))
-            self.ui.tableWidget.setHorizontalHeaderLabels(COLUMN_HEADERS)
+            self.model = RowTableModel(
+                COLUMN_HEADERS,
+                formatters={TABLE_COLUMNS["DATE"]: format_iso_date},
+                foregrounds={TABLE_COLUMNS["VALIDATION"]: validation_color},
+                sort_key=lambda row: (row[TABLE_COLUMNS["DATE"]], row[TABLE_COLUMNS["REPERE"]]),
+                parent=self,
+            )
+            self.ui.tableWidget.setModel(self.model)
             self.ui.tableWidget.verticalHeader().setVisible(False)
             self.set_column_widths()
         except Exception as e:
@@ -119,36 +141,7 @@ class GestionDepenses(GestionBase):
 
     def load_depenses(self):
         try:
-            mois_numerique = convert_month_to_number(self.mois)
-            query = """
-            SELECT id, date, fournisseur, ttc, tva_id, montant_tva, validation, commentaire
-            FROM depenses
-            WHERE strftime('%m', date) = ? AND strftime('%Y', date) = ?
-            """
-            rows = self.db_manager.fetch_all(query, (f"{mois_numerique:02d}", self.annee))
-            self.ui.tableWidget.setRowCount(0)
-            total_ttc = 0.0
-            total_montant_tva = 0.0
-            for row_number, row_data in enumerate(rows):
-                self.ui.tableWidget.insertRow(row_number)
-                for column_number, data in enumerate(row_data):
-                    if column_number == TABLE_COLUMNS["DATE"] and isinstance(data, str):
-                        try:
-                            data = datetime.strptime(data, "%Y-%m-%d").strftime("%d/%m/%Y")
-                        except ValueError:
-                            pass
-                    item = QTableWidgetItem(str(data or ""))
-                    if column_number == TABLE_COLUMNS["VALIDATION"]:
-                        if data == "Non":
-                            item.setForeground(Qt.red)
-                        elif data == "Oui":
-                            item.setForeground(Qt.green)
-                    self.ui.tableWidget.setItem(row_number, column_number, item)
-                    if column_number == TABLE_COLUMNS["TTC"]:
-                        total_ttc += float(data or 0)
-                    elif column_number == TABLE_COLUMNS["TVA_AMOUNT"]:
-                        total_montant_tva += float(data or 0)
-            self.update_totals(total_ttc, total_montant_tva)
+            self.charger_periode()
         except Exception as e:
             handle_exception(e, "Erreur lors du chargement des dépenses")
 
@@ -205,15 +198,16 @@ class GestionDepenses(GestionBase):
     def check_duplicate_expense(self, ttc, fournisseur):
         try:
             month_number = convert_month_to_number(self.mois)
-            query = """
-            SELECT * FROM depenses
-            WHERE ttc = ? AND fournisseur = ? AND strftime('%m', date) = ? AND strftime('%Y', date) = ?
-            """
-            duplicates_current = self.db_manager.fetch_all(query, (ttc, fournisseur, f"{month_number:02d}", self.annee))
             previous_month = month_number - 1 if month_number > 1 else 12
-            previous_year = self.annee if month_number > 1 else self.annee - 1
-            duplicates_previous = self.db_manager.fetch_all(query, (ttc, fournisseur, f"{previous_month:02d}", previous_year))
-            return duplicates_current + duplicates_previous
+            previous_year = int(self.annee) if month_number > 1 else int(self.annee) - 1
+            # Mois précédent et mois courant en un seul parcours de l'index sur la date
+            debut, _ = period_bounds(previous_month, previous_year)
+            _, fin = period_bounds(month_number, self.annee)
+            query = f"""
+            SELECT * FROM {self.db_manager.source("depenses", previous_year, self.annee)}
+            WHERE ttc = ? AND fournisseur = ? AND date >= ? AND date < ?
+            """
+            return self.db_manager.fetch_all(query, (ttc, fournisseur, debut, fin))
         except Exception as e:
             handle_exception(e, "Erreur lors de la vérification des doublons")
             return []
@@ -246,13 +240,21 @@ class GestionDepenses(GestionBase):
         duplicate_dialog.exec()
 
     def add_duplicate_expenses(self, duplicates, dialog):
+        lignes = []
         for row_data in duplicates:
             row_data = list(row_data)
             if len(row_data) < 8:
                 QMessageBox.warning(self, "Erreur", "Les données de doublon sont incomplètes.")
                 continue
-            date, fournisseur, ttc, tva_id, montant_tva, validation, commentaire = row_data[1:8]
-            self.db_manager.insert_depense(date, fournisseur, ttc, tva_id, montant_tva, validation, commentaire)
+            # date, fournisseur, ttc, tva_id, montant_tva, validation, commentaire
+            lignes.append(tuple(row_data[1:8]))
+        # Une seule transaction pour tous les doublons
+        new_rows = self.db_manager.insert_depenses_bulk(lignes)
+        if new_rows is None:
+            QMessageBox.critical(self, "Erreur", ERROR_MESSAGES["DATABASE_ERROR"])
+            return
+        for new_row in new_rows:
+            self.apply_row_change(new=new_row)
         QMessageBox.information(self, "Succès", "Les doublons ont été ajoutés avec succès.")
         dialog.accept()
 
@@ -275,10 +277,10 @@ class GestionDepenses(GestionBase):
                 if response == QMessageBox.Yes:
                     self.db_manager.insert_fournisseur(fournisseur)
                     configure_fournisseur_combobox(self.ui.comboBoxFournisseur, self.db_manager)
-            success = self.db_manager.insert_depense(*depense_data)
-            if success:
+            new_row = self.db_manager.insert_depense(*depense_data)
+            if new_row:
                 QMessageBox.information(self, "Succès", ERROR_MESSAGES["ADD_SUCCESS"])
-                self.load_depenses()
+                self.apply_row_change(new=new_row)
                 self.clear_fields()
             else:
                 QMessageBox.critical(self, "Erreur", ERROR_MESSAGES["DATABASE_ERROR"])
@@ -295,20 +297,22 @@ class GestionDepenses(GestionBase):
             self.ui.lineEditComentaire.clear()
             self.ui.checkBoxValidation.setChecked(False)
             self.selected_row_id = None
+            self.selected_row = None
             self.ui.pushButtonValider.setEnabled(True)
         except Exception as e:
             handle_exception(e, "Erreur lors de la réinitialisation des champs")
 
     def load_selected_row(self, row):
         try:
-            self.selected_row_id = self.ui.tableWidget.item(row, 0).text()
-            self.ui.lineEditDate.setText(self.ui.tableWidget.item(row, 1).text())
-            self.ui.comboBoxFournisseur.setCurrentText(self.ui.tableWidget.item(row, 2).text())
-            self.ui.lineEditMontant.setText(self.ui.tableWidget.item(row, 3).text())
-            self.ui.comboBoxTVA.setCurrentText(f"{self.ui.tableWidget.item(row, 4).text()}%")
-            self.ui.lineEditMontantTVA.setText(self.ui.tableWidget.item(row, 5).text())
-            self.ui.checkBoxValidation.setChecked(self.ui.tableWidget.item(row, 6).text() == "Oui")
-            self.ui.lineEditComentaire.setText(self.ui.tableWidget.item(row, 7).text())
+            self.selected_row = row
+            self.selected_row_id = self.model.text(row, TABLE_COLUMNS["REPERE"])
+            self.ui.lineEditDate.setText(self.model.text(row, TABLE_COLUMNS["DATE"]))
+            self.ui.comboBoxFournisseur.setCurrentText(self.model.text(row, TABLE_COLUMNS["FOURNISSEUR"]))
+            self.ui.lineEditMontant.setText(self.model.text(row, TABLE_COLUMNS["TTC"]))
+            self.ui.comboBoxTVA.setCurrentText(f"{self.model.text(row, TABLE_COLUMNS['TVA_RATE'])}%")
+            self.ui.lineEditMontantTVA.setText(self.model.text(row, TABLE_COLUMNS["TVA_AMOUNT"]))
+            self.ui.checkBoxValidation.setChecked(self.model.text(row, TABLE_COLUMNS["VALIDATION"]) == "Oui")
+            self.ui.lineEditComentaire.setText(self.model.text(row, TABLE_COLUMNS["COMMENTAIRE"]))
             self.ui.pushButtonValider.setEnabled(False)
         except Exception as e:
             handle_exception(e, "Erreur lors du chargement de la ligne sélectionnée")
@@ -317,16 +321,18 @@ class GestionDepenses(GestionBase):
         if not self.selected_row_id:
             QMessageBox.warning(self, "Attention", ERROR_MESSAGES["NO_SELECTION"])
             return
+        if self.ligne_archivee():
+            return
         if not self.validate_fields():
             return
         try:
             depense_data = self._get_depense_data()
             if not depense_data:
                 return
-            success = self.db_manager.update_depense(self.selected_row_id, *depense_data)
-            if success:
+            new_row = self.db_manager.update_depense(self.selected_row_id, *depense_data)
+            if new_row:
                 QMessageBox.information(self, "Succès", ERROR_MESSAGES["UPDATE_SUCCESS"])
-                self.load_depenses()
+                self.apply_row_change(self.model.row_values(self.selected_row), new_row, self.selected_row)
                 self.clear_fields()
             else:
                 QMessageBox.critical(self, "Erreur", ERROR_MESSAGES["DATABASE_ERROR"])
@@ -337,21 +343,23 @@ class GestionDepenses(GestionBase):
         if not self.selected_row_id:
             QMessageBox.warning(self, "Attention", ERROR_MESSAGES["NO_SELECTION"])
             return
+        if self.ligne_archivee():
+            return
         try:
-            row = self.ui.tableWidget.currentRow()
+            row = self.selected_row
             confirmation_message = (
                 f"Êtes-vous sûr de vouloir supprimer cette dépense ?\n\n"
-                f"Date : {self.ui.tableWidget.item(row, 1).text()}\n"
-                f"Fournisseur : {self.ui.tableWidget.item(row, 2).text()}\n"
-                f"Montant : {self.ui.tableWidget.item(row, 3).text()}"
+                f"Date : {self.model.text(row, TABLE_COLUMNS['DATE'])}\n"
+                f"Fournisseur : {self.model.text(row, TABLE_COLUMNS['FOURNISSEUR'])}\n"
+                f"Montant : {self.model.text(row, TABLE_COLUMNS['TTC'])}"
             )
             reply = QMessageBox.question(self, "Confirmation de suppression", confirmation_message,
                                          QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
             if reply == QMessageBox.Yes:
-                success = self.db_manager.delete_depense(self.selected_row_id)
-                if success:
+                old_row = self.db_manager.delete_depense(self.selected_row_id)
+                if old_row:
                     QMessageBox.information(self, "Succès", ERROR_MESSAGES["DELETE_SUCCESS"])
-                    self.load_depenses()
+                    self.apply_row_change(old=old_row, row=row)
                     self.clear_fields()
                 else:
                     QMessageBox.critical(self, "Erreur", ERROR_MESSAGES["DATABASE_ERROR"])
@@ -0,0 +1,56 @@
+from datetime import datetime
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QGridLayout, QLabel, QComboBox, QSpinBox, QDialogButtonBox, QMessageBox
+)
+from ui.synthese_interface import MOIS_NOMS
+
+
+class PlageExportDialog(QDialog):
+    """
+    Choix de la plage de périodes d'un export PDF par lot (mois et année de début et de fin,
+    bornes incluses), comme les arguments de python -m utils.export_lot.
+    """
+
+    def __init__(self, mois, annee, parent=None):
+        """
+        :param mois: Numéro du mois de fin proposé (1-12) ; la plage proposée commence en janvier.
+        :param annee: Année proposée pour le début et la fin.
+        """
+        super().__init__(parent)
+        self.setWindowTitle("Exporter les PDF d'une période")
+
+        layout = QVBoxLayout(self)
+        grille = QGridLayout()
+        self.mois_debut, self.annee_debut = self._periode(grille, 0, "Du mois de :", 1, annee)
+        self.mois_fin, self.annee_fin = self._periode(grille, 1, "Au mois de :", mois, annee)
+        layout.addLayout(grille)
+
+        boutons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        boutons.accepted.connect(self.accept)
+        boutons.rejected.connect(self.reject)
+        layout.addWidget(boutons)
+
+    @staticmethod
+    def _periode(grille, ligne, libelle, mois, annee):
+        combo = QComboBox()
+        combo.addItems(MOIS_NOMS)
+        combo.setCurrentIndex(mois - 1)
+        spin = QSpinBox()
+        spin.setRange(1900, datetime.now().year)
+        spin.setValue(annee)
+        grille.addWidget(QLabel(libelle), ligne, 0)
+        grille.addWidget(combo, ligne, 1)
+        grille.addWidget(spin, ligne, 2)
+        return combo, spin
+
+    def plage(self):
+        """:return: (mois_debut, annee_debut, mois_fin, annee_fin), arguments de taches_export."""
+        return (self.mois_debut.currentIndex() + 1, self.annee_debut.value(),
+                self.mois_fin.currentIndex() + 1, self.annee_fin.value())
+
+    def accept(self):
+        mois_debut, annee_debut, mois_fin, annee_fin = self.plage()
+        if (annee_debut, mois_debut) > (annee_fin, mois_fin):
+            QMessageBox.warning(self, "Export des PDF", "La période de fin précède la période de début.")
+            return
+        super().accept()
@@ -0,0 +1,88 @@
+import os
+from PySide6.QtWidgets import QProgressDialog, QMessageBox
+from PySide6.QtGui import QDesktopServices
+from PySide6.QtCore import Qt, QUrl
+from query_service import QueryService
+
+
+class ExportPDFDialog(QProgressDialog):
+    """
+    Avancement d'un export PDF rendu en arrière-plan (QueryService).
+
+    La fenêtre n'est pas modale : la saisie continue pendant le rendu. Elle affiche les
+    lignes mises en page et les pages produites (progression de RapportFlux), le bouton
+    Annuler interrompt le rendu à la page suivante sans écrire le fichier, et une fois le
+    PDF écrit, propose de l'ouvrir avec le lecteur du système.
+    """
+
+    def __init__(self, parent, chemin, canal, bouton=None):
+        """
+        :param chemin: Fichier PDF à produire.
+        :param canal: Canal QueryService du rendu, annulé par le bouton Annuler.
+        :param bouton: Bouton d'export, désactivé pendant le rendu.
+        """
+        super().__init__("Préparation du PDF...", "Annuler", 0, 0, parent)
+        self.chemin = chemin
+        self.canal = canal
+        self.bouton = bouton
+        self.setWindowTitle(f"Export PDF : {os.path.basename(chemin)}")
+        self.setWindowModality(Qt.NonModal)
+        self.setMinimumDuration(300)
+        self.setAutoReset(False)
+        self.setAutoClose(False)
+        self.canceled.connect(self.annuler)
+
+    def lancer(self, job):
+        """
+        Soumet le rendu à QueryService.
+        :param job: Appelée comme job(reader, progression) dans un thread de fond ; retourne
+                    une valeur vraie si le PDF a été écrit.
+        """
+        if self.bouton:
+            self.bouton.setEnabled(False)
+        self.setValue(0)
+        QueryService.instance().submit(
+            job,
+            on_result=self.on_termine,
+            on_error=self.on_erreur,
+            on_progress=self.on_progression,
+            channel=self.canal,
+            long_running=True,
+        )
+
+    def on_progression(self, etat):
+        lignes, total_lignes, pages, total_pages = etat
+        self.setMaximum(max(total_lignes, 1))
+        self.setLabelText(f"{lignes} / {total_lignes} lignes mises en page\n"
+                          f"Page {pages} sur {total_pages}")
+        self.setValue(min(lignes, total_lignes))
+
+    def on_termine(self, resultat):
+        self._fermer()
+        if not resultat:
+            QMessageBox.warning(self.parent(), "Attention", "Le fichier PDF n'a pas pu être généré.")
+            return
+        reply = QMessageBox.question(
+            self.parent(), "Succès",
+            f"Le fichier PDF a été généré avec succès : {self.chemin}\n\nL'ouvrir maintenant ?",
+            QMessageBox.Yes | QMessageBox.No,
+        )
+        if reply == QMessageBox.Yes:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(self.chemin))
+
+    def on_erreur(self, e):
+        self._fermer()
+        QMessageBox.warning(self.parent(), "Attention", str(e))
+
+    def annuler(self):
+        """Bouton Annuler ou fermeture de la fenêtre : le rendu s'arrête à la page suivante."""
+        QueryService.instance().cancel(self.canal)
+        print(f"Export PDF annulé : {self.chemin}")
+        self._fermer()
+
+    def _fermer(self):
+        if self.bouton:
+            self.bouton.setEnabled(True)
+        self.canceled.disconnect(self.annuler)
+        self.close()
+        self.deleteLater()
@@ -1,20 +1,27 @@
 import os
-from PySide6.QtWidgets import QMainWindow, QMessageBox, QFileDialog
+from datetime import datetime
+from PySide6.QtWidgets import QMainWindow, QMessageBox, QFileDialog, QInputDialog, QProgressDialog
 from PySide6.QtGui import QPixmap
-from PySide6.QtCore import QEvent
+from PySide6.QtCore import Qt, QEvent, QTimer
 from ui.ui_main_window import Ui_MainWindow
-from database import DatabaseManager
+from database import ARCHIVE_DOSSIER, DatabaseManager
 from ui.depenses_interface import GestionDepenses
 from ui.recettes_interface import GestionRecettes
 from ui.contacts_interface import ContactsManager
 from constants import DB_CONFIG, ERROR_MESSAGES, UI_CONFIG
 from util import convert_month_to_number
 from pdf_generator import PDFGenerator
+from query_service import QueryService
 from gestion_forniseur_a_regler import GestionFournisseurARegler
 from utils.backup import backup_database
+from utils.export_lot import exporter_lot, taches_export
+from utils.importation import importer_fichier
+from utils.maintenance import DELAI_INACTIVITE_S, maintenir_base
 from ui.restore_dialog import RestoreDialog
 from ui.synthese_interface import SyntheseDialog
 from ui.aide_dialog import AideDialog
+from ui.export_pdf_dialog import ExportPDFDialog
+from ui.export_lot_dialog import PlageExportDialog
 
 
 class MainWindow(QMainWindow):
@@ -24,7 +31,17 @@ class MainWindow(QMainWindow):
         self.ui.setupUi(self)
 
         self.db_manager = DatabaseManager()
-        self.pdf_generator = PDFGenerator(self.db_manager)
+        self._sauvegarde_terminee = False
+        self._fermeture_en_cours = False
+        QueryService.instance().database_replaced.connect(self.load_periode)
+
+        # Maintenance de la base après DELAI_INACTIVITE_S sans saisie ; relancé à chaque saisie
+        self.timer_maintenance = QTimer(self)
+        self.timer_maintenance.setSingleShot(True)
+        self.timer_maintenance.setInterval(DELAI_INACTIVITE_S * 1000)
+        self.timer_maintenance.timeout.connect(self.lancer_maintenance)
+        self.timer_maintenance.start()
+        self.suivre_saisie(self)
 
         self.load_periode()
         self._connect_buttons()
@@ -38,6 +55,22 @@ class MainWindow(QMainWindow):
         self.action_synthese.triggered.connect(self.open_synthese)
         self.ui.menuConfig.addAction(self.action_synthese)
 
+        self.action_verifier_totaux = QAction("Vérifier les totaux...", self)
+        self.action_verifier_totaux.triggered.connect(self.verifier_totaux)
+        self.ui.menuConfig.addAction(self.action_verifier_totaux)
+
+        self.action_export_lot = QAction("Exporter les PDF d'une période...", self)
+        self.action_export_lot.triggered.connect(self.exporter_pdf_lot)
+        self.ui.menuConfig.addAction(self.action_export_lot)
+
+        self.action_importer = QAction("Importer des écritures...", self)
+        self.action_importer.triggered.connect(self.importer_ecritures)
+        self.ui.menuConfig.addAction(self.action_importer)
+
+        self.action_archiver = QAction("Archiver un exercice...", self)
+        self.action_archiver.triggered.connect(self.archiver_exercice)
+        self.ui.menuConfig.addAction(self.action_archiver)
+
         self.action_restaurer = QAction("Restaurer une sauvegarde...", self)
         self.action_restaurer.triggered.connect(self.open_restore_dialog)
         self.ui.menuConfig.addAction(self.action_restaurer)
@@ -47,7 +80,21 @@ class MainWindow(QMainWindow):
         action_aide.triggered.connect(self.open_aide)
         self.ui.menuAide.addAction(action_aide)
 
+    def suivre_saisie(self, fenetre):
+        """
+        Relance le délai d'inactivité à chaque saisie dans la fenêtre. Le filtre est posé sur
+        sa QWindow, qui ne reçoit guère que les évènements d'entrée, et non sur l'application
+        entière, dont chaque évènement passerait sinon par Python.
+        :param fenetre: Fenêtre de premier niveau (QWidget).
+        :return: La fenêtre.
+        """
+        fenetre.winId()
+        fenetre.windowHandle().installEventFilter(self)
+        return fenetre
+
     def eventFilter(self, obj, event):
+        if event.type() in (QEvent.KeyPress, QEvent.MouseButtonPress, QEvent.Wheel):
+            self.timer_maintenance.start()
         if obj == self.ui.labellogo and event.type() == QEvent.Show and not self._logo_loaded:
             self.load_logo()
             self._logo_loaded = True
@@ -99,9 +146,83 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, "Erreur", f"Erreur lors de la sauvegarde de la période : {str(e)}")
 
     def closeEvent(self, event):
+        if self._sauvegarde_terminee:
+            event.accept()
+            return
+        event.ignore()
+        if self._fermeture_en_cours:
+            return
+        self._fermeture_en_cours = True
+        service = QueryService.instance()
         self.save_periode()
-        backup_database()
-        event.accept()
+        self.setEnabled(False)
+        self.timer_maintenance.stop()
+        self.progress_sauvegarde = QProgressDialog("Sauvegarde de la base...", None, 0, 100, self)
+        self.progress_sauvegarde.setWindowTitle("Fermeture")
+        self.progress_sauvegarde.setWindowModality(Qt.WindowModal)
+        self.progress_sauvegarde.setMinimumDuration(300)
+        if service.has_pending():
+            if service.is_pending("import"):
+                texte = "Import interrompu après le lot en cours (les lots écrits sont conservés)..."
+            elif service.is_pending("archivage"):
+                texte = "Fin de l'archivage en cours..."
+            else:
+                texte = "Arrêt des tâches en cours..."
+            self.progress_sauvegarde.setLabelText(texte)
+            self.progress_sauvegarde.setRange(0, 0)
+            self.progress_sauvegarde.show()
+        # La maintenance forcée peut reconstruire la base hors ligne, ce qui ferme les lecteurs :
+        # les exports et lectures encore en cours sont annulés, puis attendus sans bloquer la fenêtre
+        service.cancel_all()
+        service.call_when_done(self.lancer_sauvegarde)
+
+    def lancer_sauvegarde(self):
+        self.progress_sauvegarde.setLabelText("Sauvegarde de la base...")
+        self.progress_sauvegarde.setRange(0, 100)
+        # La rétention des sauvegardes est appliquée après la fermeture de la fenêtre (main.py)
+        QueryService.instance().submit(
+            lambda reader, progression: self.maintenir_et_sauvegarder(progression),
+            on_result=self.on_sauvegarde_terminee,
+            on_error=self.on_sauvegarde_erreur,
+            on_progress=self.on_sauvegarde_progression,
+            channel="sauvegarde",
+            long_running=True,
+        )
+
+    def maintenir_et_sauvegarder(self, progression):
+        """Maintenance complète puis sauvegarde, dans un thread de fond : la copie part d'une base compacte."""
+        try:
+            maintenir_base(self.db_manager, forcer=True)
+        except Exception as e:
+            print(f"Maintenance de la base impossible : {e}")
+        return backup_database(progression=lambda copiees, total: progression((copiees, total)), nettoyer=False)
+
+    def lancer_maintenance(self):
+        service = QueryService.instance()
+        # Pas pendant une autre tâche de fond (import, export, sauvegarde...) : reportée
+        if service.has_pending():
+            self.timer_maintenance.start()
+            return
+        service.submit(
+            lambda reader: maintenir_base(self.db_manager),
+            on_error=lambda e: print(f"Maintenance de la base impossible : {e}"),
+            channel="maintenance",
+            long_running=True,
+        )
+
+    def on_sauvegarde_progression(self, avancement):
+        copiees, total = avancement
+        self.progress_sauvegarde.setValue(int(copiees * 100 / total) if total else 100)
+
+    def on_sauvegarde_terminee(self, _=None):
+        self.progress_sauvegarde.close()
+        self._sauvegarde_terminee = True
+        self.close()
+
+    def on_sauvegarde_erreur(self, e):
+        self.progress_sauvegarde.close()
+        QMessageBox.warning(self, "Sauvegarde", f"La sauvegarde automatique a échoué :\n{str(e)}")
+        self.on_sauvegarde_terminee()
 
     def on_export_pdf_clicked(self):
         try:
@@ -121,15 +242,82 @@ class MainWindow(QMainWindow):
                 "PDF Files (*.pdf);;All Files (*)", options=options
             )
             if pdf_filename:
-                self.pdf_generator.generate_ddf(mois_numerique, annee, pdf_filename)
-                QMessageBox.information(self, "Succès", f"Le fichier PDF a été généré avec succès : {pdf_filename}")
+                # Lecture et mise en page hors du thread de l'interface, fenêtre d'avancement non modale
+                self.export_pdf_dialog = ExportPDFDialog(self, pdf_filename, "export_pdf", self.ui.pushButton_export_pdf)
+                self.export_pdf_dialog.lancer(
+                    lambda reader, progression: PDFGenerator(reader).generate_ddf(
+                        mois_numerique, annee, pdf_filename, progression=progression),
+                )
         except Exception as e:
             QMessageBox.warning(self, "Attention", str(e))
 
+    def exporter_pdf_lot(self):
+        mois_courant, annee_courante = self.db_manager.load_periode()
+        dialogue = PlageExportDialog(convert_month_to_number(mois_courant), int(annee_courante), self)
+        if dialogue.exec() != PlageExportDialog.Accepted:
+            return
+        dossier = QFileDialog.getExistingDirectory(self, "Dossier de destination des PDF")
+        if not dossier:
+            return
+        taches = taches_export(*dialogue.plage())
+        self.action_export_lot.setEnabled(False)
+        self.progress_export_lot = QProgressDialog("Génération des PDF...", "Annuler", 0, len(taches), self)
+        self.progress_export_lot.setWindowTitle("Export des PDF")
+        # Non modale : la saisie continue pendant l'export
+        self.progress_export_lot.setWindowModality(Qt.NonModal)
+        self.progress_export_lot.setMinimumDuration(300)
+        self.progress_export_lot.canceled.connect(self.on_export_lot_annule)
+        # Le thread de fond attend le pool de processus de rendu (un par cœur)
+        QueryService.instance().submit(
+            lambda reader, progression: exporter_lot(
+                taches, dossier, self.db_manager.db_file, progression=lambda *etat: progression(etat)),
+            on_result=self.on_export_lot_termine,
+            on_error=self.on_export_lot_erreur,
+            on_progress=self.on_export_lot_progression,
+            channel="export_lot",
+            long_running=True,
+        )
+
+    def on_export_lot_progression(self, etat):
+        faits, total, nom, duree, erreur = etat
+        self.progress_export_lot.setLabelText(f"{nom} ({faits}/{total})")
+        self.progress_export_lot.setValue(faits)
+
+    def on_export_lot_annule(self):
+        # Les PDF déjà en cours de rendu sont terminés, les suivants abandonnés (exporter_lot) :
+        # l'action reste désactivée jusqu'à ce que la tâche ait rendu son thread (call_when_done),
+        # pour qu'un nouvel export ne démarre pas un second pool de processus à côté du premier
+        service = QueryService.instance()
+        service.cancel("export_lot")
+        self.statusBar().showMessage("Export des PDF annulé : fin des PDF en cours...")
+        service.call_when_done(self.on_export_lot_arrete)
+
+    def on_export_lot_arrete(self):
+        self.action_export_lot.setEnabled(True)
+        self.statusBar().showMessage("Export des PDF annulé.", 5000)
+
+    def on_export_lot_termine(self, resultat):
+        self.action_export_lot.setEnabled(True)
+        self.progress_export_lot.canceled.disconnect(self.on_export_lot_annule)
+        self.progress_export_lot.close()
+        details = "\n".join(f"{os.path.basename(chemin)} : {duree * 1000:.0f} ms" for chemin, duree in resultat["fichiers"])
+        erreurs = "".join(f"\n{nom} : {message}" for nom, message in resultat["erreurs"])
+        QMessageBox.information(
+            self, "Export des PDF",
+            f"{len(resultat['fichiers'])} PDF générés en {resultat['duree']:.1f} s "
+            f"({resultat['processus']} processus) :\n\n{details}" + (f"\n\nErreurs :{erreurs}" if erreurs else ""),
+        )
+
+    def on_export_lot_erreur(self, e):
+        self.action_export_lot.setEnabled(True)
+        self.progress_export_lot.canceled.disconnect(self.on_export_lot_annule)
+        self.progress_export_lot.close()
+        QMessageBox.warning(self, "Export des PDF", f"Export impossible : {str(e)}")
+
     def on_depenses_clicked(self):
         try:
             self.save_periode()
-            self.gestion_depenses_window = GestionDepenses()
+            self.gestion_depenses_window = self.suivre_saisie(GestionDepenses())
             self.gestion_depenses_window.exec()
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur lors de l'ouverture de la fenêtre des dépenses : {str(e)}")
@@ -137,25 +325,124 @@ class MainWindow(QMainWindow):
     def on_recettes_clicked(self):
         try:
             self.save_periode()
-            self.gestion_recettes_window = GestionRecettes()
+            self.gestion_recettes_window = self.suivre_saisie(GestionRecettes())
             self.gestion_recettes_window.exec()
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur lors de l'ouverture de la fenêtre des recettes : {str(e)}")
 
     def open_contacts_manager(self):
-        self.contacts_manager = ContactsManager()
+        self.contacts_manager = self.suivre_saisie(ContactsManager())
         self.contacts_manager.show()
 
     def open_synthese(self):
         dialog = SyntheseDialog(self)
         dialog.exec()
 
+    def verifier_totaux(self):
+        ecarts = self.db_manager.verify_totaux_mensuels()
+        if not ecarts:
+            QMessageBox.information(self, "Totaux", "Les totaux mensuels sont cohérents avec les écritures.")
+            return
+        periodes = sorted({f"{mois:02d}/{annee}" for annee, mois, *_ in ecarts})
+        reply = QMessageBox.question(
+            self, "Totaux",
+            f"{len(ecarts)} écart(s) détecté(s) sur : {', '.join(periodes)}.\n\nRecalculer les totaux ?",
+            QMessageBox.Yes | QMessageBox.No,
+        )
+        if reply == QMessageBox.Yes:
+            if self.db_manager.rebuild_totaux_mensuels():
+                QMessageBox.information(self, "Totaux", "Les totaux mensuels ont été recalculés.")
+            else:
+                QMessageBox.critical(self, "Erreur", ERROR_MESSAGES["DATABASE_ERROR"])
+
+    def importer_ecritures(self):
+        chemin, _ = QFileDialog.getOpenFileName(
+            self, "Importer des écritures", "",
+            "Fichiers CSV ou Excel (*.csv *.txt *.xlsx);;All Files (*)"
+        )
+        if not chemin:
+            return
+        tables = {"Dépenses": "depenses", "Recettes": "recettes"}
+        choix, ok = QInputDialog.getItem(self, "Importer des écritures", "Table de destination :", list(tables), 0, False)
+        if not ok:
+            return
+        # Lecture du fichier et écriture par lots hors du thread de l'interface
+        self.action_importer.setEnabled(False)
+        self.statusBar().showMessage(f"Import de {os.path.basename(chemin)} en cours...")
+        # Annulable entre deux lots (fermeture de l'application) : progression lève alors TacheAnnulee
+        QueryService.instance().submit(
+            lambda reader, progression: importer_fichier(chemin, tables[choix], progression=progression),
+            self.on_import_termine,
+            self.on_import_erreur,
+            channel="import",
+            long_running=True,
+            on_progress=lambda lignes: self.statusBar().showMessage(
+                f"Import de {os.path.basename(chemin)} : {lignes} ligne(s) lue(s)..."),
+        )
+
+    def on_import_termine(self, rapport):
+        self.action_importer.setEnabled(True)
+        self.statusBar().clearMessage()
+        message = rapport.resume()
+        if rapport.erreurs:
+            details = "\n".join(f"Ligne {numero} : {erreur}" for numero, erreur in rapport.erreurs[:20])
+            suite = "\n..." if rapport.nb_erreurs > 20 else ""
+            message += f"\n\n{details}{suite}"
+        QMessageBox.information(self, "Import", message)
+
+    def on_import_erreur(self, e):
+        self.action_importer.setEnabled(True)
+        self.statusBar().clearMessage()
+        QMessageBox.warning(self, "Import", f"Import impossible : {str(e)}")
+
+    def archiver_exercice(self):
+        derniere_close = datetime.now().year - 1
+        annee, ok = QInputDialog.getInt(
+            self, "Archiver un exercice", "Année close à archiver :", derniere_close, 1900, derniere_close
+        )
+        if not ok:
+            return
+        reply = QMessageBox.question(
+            self, "Archiver un exercice",
+            f"Les écritures de {annee} seront déplacées dans data/{ARCHIVE_DOSSIER}/mlbdd_{annee}.db.\n"
+            "Elles resteront consultables mais ne pourront plus être modifiées. Les dépenses "
+            "non réglées restent dans la base jusqu'à leur règlement.\n\nContinuer ?",
+            QMessageBox.Yes | QMessageBox.No,
+        )
+        if reply != QMessageBox.Yes:
+            return
+        self.action_archiver.setEnabled(False)
+        self.statusBar().showMessage(f"Archivage de l'exercice {annee} en cours...")
+        QueryService.instance().submit(
+            lambda reader: self.db_manager.archiver_annee(annee),
+            lambda archivees: self.on_archivage_termine(annee, archivees),
+            self.on_archivage_erreur,
+            channel="archivage",
+            long_running=True,
+        )
+
+    def on_archivage_termine(self, annee, archivees):
+        self.action_archiver.setEnabled(True)
+        self.statusBar().clearMessage()
+        QueryService.instance().database_replaced.emit()
+        QMessageBox.information(
+            self, "Archivage",
+            f"Exercice {annee} archivé : {archivees['depenses']} dépense(s), {archivees['recettes']} recette(s).\n\n"
+            f"Les archives ne font pas partie des sauvegardes quotidiennes : copiez le fichier "
+            f"mlbdd_{annee}.db du dossier data/{ARCHIVE_DOSSIER} sur un support externe.",
+        )
+
+    def on_archivage_erreur(self, e):
+        self.action_archiver.setEnabled(True)
+        self.statusBar().clearMessage()
+        QMessageBox.warning(self, "Archivage", f"Archivage impossible : {str(e)}")
+
     def open_restore_dialog(self):
         dialog = RestoreDialog(self)
         dialog.exec()
 
     def open_gestion_fournisseur(self):
-        self.gestion_fournisseur_window = GestionFournisseurARegler()
+        self.gestion_fournisseur_window = self.suivre_saisie(GestionFournisseurARegler())
         self.gestion_fournisseur_window.exec()
 
     def open_aide(self):
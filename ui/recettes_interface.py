@@ -1,7 +1,8 @@
-from PySide6.QtWidgets import QDialog, QTableWidgetItem, QMessageBox, QLineEdit, QComboBox
+from PySide6.QtWidgets import QDialog, QMessageBox, QLineEdit, QComboBox
 from PySide6.QtCore import Qt, QEvent, QDate
 from ui.ui_gestion_Recettes import Ui_Dialog
 from ui.base_gestion import GestionBase
+from ui.table_model import RowTableModel, format_iso_date
 from util import (
     PeriodeManager,
     convert_month_to_number,
@@ -16,6 +17,11 @@ from constants import UI_CONFIG
 
 
 class GestionRecettes(GestionBase):
+    TOTAL_COLUMNS = (5, 7)
+    FETCH_PERIODE = "fetch_recettes_periode"
+    TYPE_TOTAUX = "recette"
+    TABLE = "recettes"
+
     def __init__(self):
         super().__init__()
         self.ui = Ui_Dialog()
@@ -25,6 +31,7 @@ class GestionRecettes(GestionBase):
         self.mois, self.annee = self.periode_manager.get_periode()
         self.db_manager = DatabaseManager("data/mlbdd.db")
         self.selected_row_id = None
+        self.selected_row = None
 
         self.configure_table()
         self.ui.calendarWidget.setVisible(False)
@@ -45,7 +52,7 @@ class GestionRecettes(GestionBase):
         self.ui.push_calculettettc.clicked.connect(self.calculate_and_update)
         self.ui.lineEditMontant.textChanged.connect(self.calculate_tva)
         self.ui.comboBoxTVA.currentTextChanged.connect(self.calculate_tva)
-        self.ui.tableWidget.cellClicked.connect(self.load_selected_row)
+        self.ui.tableWidget.clicked.connect(lambda index: self.load_selected_row(index.row()))
 
         self.ui.pushButtonValider.setDefault(True)
         self.ui.quitterButton.setAutoDefault(False)
@@ -57,10 +64,13 @@ class GestionRecettes(GestionBase):
         self.ui.lineEditDate.setFocus()
 
     def configure_table(self):
-        self.ui.tableWidget.setColumnCount(9)
-        self.ui.tableWidget.setHorizontalHeaderLabels(
-            ["Repère", "Date", "Client", "Paiement", "N° Facture", "Montant", "Taux TVA", "Montant TVA", "Commentaire"]
+        self.model = RowTableModel(
+            ["Repère", "Date", "Client", "Paiement", "N° Facture", "Montant", "Taux TVA", "Montant TVA", "Commentaire"],
+            formatters={1: format_iso_date},
+            sort_key=lambda row: (row[1], row[0]),
+            parent=self,
         )
+        self.ui.tableWidget.setModel(self.model)
         self.ui.tableWidget.verticalHeader().setVisible(False)
         widths = [50, 100, 185, 80, 80, 100, 80, 100, 400]
         for col, width in enumerate(widths):
@@ -74,27 +84,9 @@ class GestionRecettes(GestionBase):
         self.load_recettes()
 
     def load_recettes(self):
-        mois_numerique = convert_month_to_number(self.mois)
-        query = """
-        SELECT id, date, client, paiement, numero_facture, montant, tva, montant_tva, commentaire
-        FROM recettes
-        WHERE strftime('%m', date) = ? AND strftime('%Y', date) = ?
-        """
-        rows = self.db_manager.fetch_all(query, (f"{mois_numerique:02d}", self.annee))
-        self.ui.tableWidget.setRowCount(0)
-        total_montant = 0.0
-        total_montant_tva = 0.0
-        for row_number, row_data in enumerate(rows):
-            self.ui.tableWidget.insertRow(row_number)
-            for column_number, data in enumerate(row_data):
-                if column_number == 1 and isinstance(data, str):
-                    try:
-                        data = datetime.strptime(data, "%Y-%m-%d").strftime("%d/%m/%Y")
-                    except ValueError:
-                        pass
-                self.ui.tableWidget.setItem(row_number, column_number, QTableWidgetItem(str(data or "")))
-            total_montant += float(row_data[5] or 0)
-            total_montant_tva += float(row_data[7] or 0)
+        self.charger_periode()
+
+    def update_totals(self, total_montant, total_montant_tva):
         self.ui.lineEdimontanttotal.setText(f"{total_montant:.2f}")
         self.ui.lineEdittotalmontanttva.setText(f"{total_montant_tva:.2f}")
 
@@ -137,12 +129,12 @@ class GestionRecettes(GestionBase):
                 if response == QMessageBox.Yes:
                     self.db_manager.insert_client(client)
                     configure_fournisseur_combobox(self.ui.comboBoxFournisseur, self.db_manager)
-            success = self.db_manager.insert_recette(
+            new_row = self.db_manager.insert_recette(
                 formatted_date, client, paiement, numero_facture, montant, tva_rate, montant_tva, commentaire
             )
-            if success:
+            if new_row:
                 QMessageBox.information(self, "Succès", "La recette a été ajoutée avec succès.")
-                self.load_recettes()
+                self.apply_row_change(new=new_row)
                 self.clear_fields()
         except Exception as e:
             handle_exception(e, "Erreur lors de l'ajout de la recette")
@@ -157,23 +149,25 @@ class GestionRecettes(GestionBase):
         self.ui.lineEditMontantTVA.clear()
         self.ui.lineEditComentaire.clear()
         self.selected_row_id = None
+        self.selected_row = None
         self.ui.pushButtonValider.setEnabled(True)
 
     def load_selected_row(self, row):
         try:
-            self.selected_row_id = self.ui.tableWidget.item(row, 0).text()
-            paiement = self.ui.tableWidget.item(row, 3).text()
-            self.ui.lineEditDate.setText(self.ui.tableWidget.item(row, 1).text())
-            self.ui.comboBoxFournisseur.setCurrentText(self.ui.tableWidget.item(row, 2).text())
+            self.selected_row = row
+            self.selected_row_id = self.model.text(row, 0)
+            paiement = self.model.text(row, 3)
+            self.ui.lineEditDate.setText(self.model.text(row, 1))
+            self.ui.comboBoxFournisseur.setCurrentText(self.model.text(row, 2))
             if paiement in ["null", "chèque", "virement"]:
                 self.ui.comboBoxpayment.setCurrentText(paiement)
             else:
                 self.ui.comboBoxpayment.setCurrentIndex(-1)
-            self.ui.lineEditnfacture.setText(self.ui.tableWidget.item(row, 4).text())
-            self.ui.lineEditMontant.setText(self.ui.tableWidget.item(row, 5).text())
-            self.ui.comboBoxTVA.setCurrentText(f"{self.ui.tableWidget.item(row, 6).text()}%")
-            self.ui.lineEditMontantTVA.setText(self.ui.tableWidget.item(row, 7).text())
-            self.ui.lineEditComentaire.setText(self.ui.tableWidget.item(row, 8).text())
+            self.ui.lineEditnfacture.setText(self.model.text(row, 4))
+            self.ui.lineEditMontant.setText(self.model.text(row, 5))
+            self.ui.comboBoxTVA.setCurrentText(f"{self.model.text(row, 6)}%")
+            self.ui.lineEditMontantTVA.setText(self.model.text(row, 7))
+            self.ui.lineEditComentaire.setText(self.model.text(row, 8))
             self.ui.pushButtonValider.setEnabled(False)
         except Exception as e:
             handle_exception(e, "Erreur lors du chargement de la ligne sélectionnée")
@@ -182,6 +176,8 @@ class GestionRecettes(GestionBase):
         if not self.selected_row_id:
             QMessageBox.warning(self, "Erreur", "Aucune ligne sélectionnée.")
             return
+        if self.ligne_archivee():
+            return
         try:
             date_obj = datetime.strptime(self.ui.lineEditDate.text(), "%d/%m/%Y")
             formatted_date = date_obj.strftime("%Y-%m-%d")
@@ -192,11 +188,11 @@ class GestionRecettes(GestionBase):
             tva_rate = float(self.ui.comboBoxTVA.currentText().strip('%'))
             montant_tva = float(self.ui.lineEditMontantTVA.text())
             commentaire = self.ui.lineEditComentaire.text()
-            success = self.db_manager.update_recette(
+            new_row = self.db_manager.update_recette(
                 self.selected_row_id, formatted_date, client, paiement, numero_facture, montant, tva_rate, montant_tva, commentaire
             )
-            if success:
-                self.load_recettes()
+            if new_row:
+                self.apply_row_change(self.model.row_values(self.selected_row), new_row, self.selected_row)
                 self.clear_fields()
         except Exception as e:
             handle_exception(e, "Erreur lors de la modification de la recette")
@@ -205,20 +201,22 @@ class GestionRecettes(GestionBase):
         if not self.selected_row_id:
             QMessageBox.warning(self, "Erreur", "Aucune ligne sélectionnée.")
             return
+        if self.ligne_archivee():
+            return
         try:
-            row = self.ui.tableWidget.currentRow()
+            row = self.selected_row
             confirmation_message = (
                 f"Êtes-vous sûr de vouloir supprimer cette recette ?\n\n"
-                f"Date : {self.ui.tableWidget.item(row, 1).text()}\n"
-                f"Client : {self.ui.tableWidget.item(row, 2).text()}\n"
-                f"Montant : {self.ui.tableWidget.item(row, 5).text()}"
+                f"Date : {self.model.text(row, 1)}\n"
+                f"Client : {self.model.text(row, 2)}\n"
+                f"Montant : {self.model.text(row, 5)}"
             )
             reply = QMessageBox.question(self, "Confirmation de suppression", confirmation_message,
                                          QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
             if reply == QMessageBox.Yes:
-                success = self.db_manager.delete_recette(self.selected_row_id)
-                if success:
-                    self.load_recettes()
+                old_row = self.db_manager.delete_recette(self.selected_row_id)
+                if old_row:
+                    self.apply_row_change(old=old_row, row=row)
                     self.clear_fields()
         except Exception as e:
             handle_exception(e, "Erreur lors de la suppression de la recette")
@@ -1,102 +1,158 @@
 import os
-import shutil
+import threading
 from datetime import datetime
 from PySide6.QtWidgets import (
-    QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
-    QPushButton, QLabel, QMessageBox, QHeaderView
+    QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QComboBox, QLineEdit,
+    QPushButton, QLabel, QMessageBox, QHeaderView, QProgressDialog, QApplication
 )
 from PySide6.QtCore import Qt
-from utils.backup import backup_database, BACKUP_DIR, DB_SOURCE
+from database import DatabaseManager
+from query_service import QueryService, TacheAnnulee
+from utils.backup import backup_database, restaurer_a_chaud, BACKUP_DIR, DB_SOURCE
+from utils.catalogue import TYPES, lire_catalogue
+from utils.comparaison import CATEGORIES, TABLES, ComparaisonSauvegarde
+
+NOM_ROLE = Qt.UserRole + 1  # Nom du fichier de sauvegarde, porté par la première colonne
+
+
+class _Item(QTableWidgetItem):
+    """Cellule triée selon sa clé (Qt.UserRole) plutôt que selon le texte affiché."""
+
+    def __init__(self, texte, cle=None):
+        super().__init__(texte)
+        self.setData(Qt.UserRole, texte if cle is None else cle)
+
+    def __lt__(self, other):
+        return self.data(Qt.UserRole) < other.data(Qt.UserRole)
+
+
+def _format_date(valeur):
+    """Affiche une date ISO 'AAAA-MM-JJ' au format 'JJ/MM/AAAA'."""
+    return f"{valeur[8:10]}/{valeur[5:7]}/{valeur[0:4]}" if valeur else ""
+
+
+def _format_taille(octets):
+    if octets < 1024 * 1024:
+        return f"{octets / 1024:.0f} Ko"
+    return f"{octets / (1024 * 1024):.1f} Mo"
 
 
 class RestoreDialog(QDialog):
+    """
+    Liste des sauvegardes lue dans le catalogue (utils/catalogue.py), sans ouvrir les
+    fichiers de sauvegarde ; tri par colonne et filtre par type ou par texte.
+    """
+
+    COLONNES = ["Période", "Type", "Créée le", "Taille", "Dépenses", "Recettes",
+                "Dernière dépense", "Dernière recette"]
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Restaurer une sauvegarde")
-        self.setMinimumSize(500, 400)
+        self.setMinimumSize(800, 400)
         self.setModal(True)
 
         layout = QVBoxLayout(self)
 
         layout.addWidget(QLabel("Sélectionnez la sauvegarde à restaurer :"))
 
+        filtre_layout = QHBoxLayout()
+        self.type_combo = QComboBox()
+        self.type_combo.addItems(["Tous les types", *TYPES.values()])
+        self.recherche = QLineEdit()
+        self.recherche.setPlaceholderText("Filtrer (période, date...)")
+        filtre_layout.addWidget(self.type_combo)
+        filtre_layout.addWidget(self.recherche)
+        layout.addLayout(filtre_layout)
+
         self.table = QTableWidget()
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(["Fichier", "Type", "Date"])
+        self.table.setColumnCount(len(self.COLONNES))
+        self.table.setHorizontalHeaderLabels(self.COLONNES)
         self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SingleSelection)
         self.table.setEditTriggers(QTableWidget.NoEditTriggers)
         self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
         self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
-        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
-        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)
         layout.addWidget(self.table)
 
         button_layout = QHBoxLayout()
+        self.apercu_button = QPushButton("Aperçu des différences...")
+        self.apercu_button.setEnabled(False)
         self.restore_button = QPushButton("Restaurer")
         self.restore_button.setEnabled(False)
         cancel_button = QPushButton("Annuler")
+        button_layout.addWidget(self.apercu_button)
         button_layout.addWidget(self.restore_button)
         button_layout.addWidget(cancel_button)
         layout.addLayout(button_layout)
 
         self.restore_button.clicked.connect(self.restore)
+        self.apercu_button.clicked.connect(self.apercu)
         cancel_button.clicked.connect(self.reject)
-        self.table.selectionModel().selectionChanged.connect(
-            lambda: self.restore_button.setEnabled(len(self.table.selectedItems()) > 0)
-        )
+        self.type_combo.currentIndexChanged.connect(self._filtrer)
+        self.recherche.textChanged.connect(self._filtrer)
+        self.table.selectionModel().selectionChanged.connect(self._selection_changee)
 
         self._load_backups()
 
     def _load_backups(self):
-        if not os.path.exists(BACKUP_DIR):
-            return
+        entrees = lire_catalogue(BACKUP_DIR)
 
-        backups = []
-        for f in os.listdir(BACKUP_DIR):
-            if not f.startswith("mlbdd_") or not f.endswith(".db"):
-                continue
-            name = f[6:-3]  # strip "mlbdd_" and ".db"
-            if len(name) == 10:   # 2026-05-02
-                btype = "Journalier"
-                try:
-                    date = datetime.strptime(name, "%Y-%m-%d").strftime("%d/%m/%Y")
-                except ValueError:
-                    continue
-            elif len(name) == 7:  # 2026-05
-                btype = "Mensuel"
-                try:
-                    date = datetime.strptime(name, "%Y-%m").strftime("%m/%Y")
-                except ValueError:
-                    continue
-            elif len(name) == 4:  # 2026
-                btype = "Annuel"
-                date = name
-            else:
-                continue
-            backups.append((f, btype, date, name))
+        self.table.setRowCount(len(entrees))
+        for row, entree in enumerate(entrees):
+            periode = entree["periode"]
+            lignes = entree.get("lignes", {})
+            horodatage = entree.get("horodatage") or ""
+            cellules = [
+                _Item(_format_date(periode) if len(periode) == 10 else "/".join(reversed(periode.split("-"))), periode),
+                _Item(entree["type"]),
+                _Item(datetime.fromisoformat(horodatage).strftime("%d/%m/%Y %H:%M") if horodatage else "", horodatage),
+                _Item(_format_taille(entree.get("taille", 0)), entree.get("taille", 0)),
+                _Item(str(lignes.get("depenses", "")), lignes.get("depenses", -1)),
+                _Item(str(lignes.get("recettes", "")), lignes.get("recettes", -1)),
+                _Item(_format_date(entree.get("derniere_depense")), entree.get("derniere_depense") or ""),
+                _Item(_format_date(entree.get("derniere_recette")), entree.get("derniere_recette") or ""),
+            ]
+            cellules[0].setData(NOM_ROLE, entree["nom"])
+            cellules[0].setToolTip(entree["nom"])
+            for col, item in enumerate(cellules):
+                if col:
+                    item.setTextAlignment(Qt.AlignCenter)
+                self.table.setItem(row, col, item)
 
-        backups.sort(key=lambda x: x[3], reverse=True)
+        self.table.setSortingEnabled(True)
+        self.table.sortItems(2, Qt.DescendingOrder)
 
-        self.table.setRowCount(len(backups))
-        for row, (filename, btype, date, _) in enumerate(backups):
-            self.table.setItem(row, 0, QTableWidgetItem(filename))
-            self.table.setItem(row, 1, QTableWidgetItem(btype))
-            self.table.setItem(row, 2, QTableWidgetItem(date))
-            self._center(row, 1)
-            self._center(row, 2)
+    def _filtrer(self):
+        type_ = self.type_combo.currentText() if self.type_combo.currentIndex() > 0 else None
+        texte = self.recherche.text().strip().lower()
+        for row in range(self.table.rowCount()):
+            visible = type_ is None or self.table.item(row, 1).text() == type_
+            if visible and texte:
+                visible = any(
+                    texte in self.table.item(row, col).text().lower()
+                    or texte in str(self.table.item(row, col).data(Qt.UserRole)).lower()
+                    for col in range(self.table.columnCount())
+                )
+            self.table.setRowHidden(row, not visible)
 
-    def _center(self, row, col):
-        item = self.table.item(row, col)
-        if item:
-            item.setTextAlignment(Qt.AlignCenter)
+    def _selection_changee(self):
+        selection = len(self.table.selectedItems()) > 0
+        self.restore_button.setEnabled(selection)
+        self.apercu_button.setEnabled(selection)
+
+    def apercu(self):
+        row = self.table.currentRow()
+        if row >= 0:
+            ApercuRestaurationDialog(self.table.item(row, 0).data(NOM_ROLE), self).exec()
 
     def restore(self):
         row = self.table.currentRow()
         if row < 0:
             return
 
-        filename = self.table.item(row, 0).text()
-        source = os.path.join(BACKUP_DIR, filename)
+        filename = self.table.item(row, 0).data(NOM_ROLE)
 
         reply = QMessageBox.question(
             self,
@@ -113,17 +169,195 @@ class RestoreDialog(QDialog):
         try:
             # Sauvegarde de sécurité avant restauration
             backup_database()
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur", f"Erreur lors de la restauration :\n{str(e)}")
+            return
 
-            # Restauration
-            shutil.copy2(source, DB_SOURCE)
+        # Lectures en arrière-plan arrêtées, puis attendues sans bloquer la fenêtre : plus
+        # aucune connexion n'est utilisée pendant l'échange
+        progress = QProgressDialog("Arrêt des lectures en cours...", None, 0, 0, self)
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(500)
+        service = QueryService.instance()
+        service.cancel_all()
+        service.call_when_done(lambda: self._restaurer(filename, progress))
+
+    def _restaurer(self, filename, progress):
+        service = QueryService.instance()
+        try:
+            progress.setLabelText("Restauration en cours...")
+            progress.setRange(0, 100)
+
+            def avancer(copiees, total):
+                progress.setValue(int(copiees * 100 / total) if total else 100)
+                QApplication.processEvents()
+
+            try:
+                restaurer_a_chaud(filename, DatabaseManager(), progression=avancer)
+            finally:
+                progress.close()
+
+            # Les fenêtres ouvertes rechargent leurs données depuis la base restaurée
+            service.database_replaced.emit()
 
             QMessageBox.information(
                 self,
                 "Restauration réussie",
-                f"La sauvegarde a été restaurée avec succès.\n\n"
-                "Veuillez redémarrer l'application pour prendre en compte les données restaurées."
+                "La sauvegarde a été restaurée avec succès."
             )
             self.accept()
 
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur lors de la restauration :\n{str(e)}")
+
+
+class ApercuRestaurationDialog(QDialog):
+    """
+    Différences entre la base et une sauvegarde (utils/comparaison.py) : un résumé par
+    table, et le détail des lignes de la cellule sélectionnée.
+
+    Le résumé et le détail sont lus par QueryService. La comparaison (sa connexion et le
+    fichier .apercu.db d'un manifeste) est fermée par la fenêtre si aucune lecture n'est en
+    cours, sinon par la dernière lecture, interrompue à la fermeture de la fenêtre.
+    """
+
+    LIBELLES = {"ajoutees": "Ajoutées", "supprimees": "Supprimées", "modifiees": "Modifiées"}
+    LIMITE_DETAILS = 500
+
+    def __init__(self, nom, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Aperçu de la restauration — {nom}")
+        self.setMinimumSize(800, 500)
+        self.comparaison = None
+        self._verrou = threading.Lock()  # protège comparaison, _lectures et _ferme
+        self._lectures = 0
+        self._ferme = False
+
+        layout = QVBoxLayout(self)
+        self.info = QLabel("Comparaison en cours...")
+        layout.addWidget(self.info)
+
+        self.resume_table = QTableWidget(len(TABLES), len(CATEGORIES))
+        self.resume_table.setVerticalHeaderLabels(list(TABLES))
+        self.resume_table.setHorizontalHeaderLabels([self.LIBELLES[c] for c in CATEGORIES])
+        self.resume_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.resume_table.setSelectionMode(QTableWidget.SingleSelection)
+        self.resume_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.resume_table.setMaximumHeight(130)
+        layout.addWidget(self.resume_table)
+
+        self.details_table = QTableWidget()
+        self.details_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.details_table.verticalHeader().setVisible(False)
+        layout.addWidget(self.details_table)
+
+        fermer = QPushButton("Fermer")
+        fermer.clicked.connect(self.accept)
+        layout.addWidget(fermer, alignment=Qt.AlignRight)
+
+        self.resume_table.currentCellChanged.connect(self._afficher_details)
+
+        chemin = os.path.join(BACKUP_DIR, nom)
+        QueryService.instance().submit(
+            lambda reader: self._comparer(chemin),
+            self._afficher_resume,
+            on_error=self._erreur,
+            channel=self,
+            long_running=True,
+        )
+
+    def _comparer(self, chemin):
+        comparaison = ComparaisonSauvegarde(DB_SOURCE, chemin)
+        with self._verrou:
+            ferme = self._ferme
+            if not ferme:
+                self.comparaison = comparaison
+        if ferme:
+            # Fenêtre fermée pendant la reconstitution du manifeste
+            comparaison.fermer()
+            raise TacheAnnulee("Aperçu fermé")
+        return self._lire(lambda c: c.resume())
+
+    def _lire(self, lecture):
+        """
+        Exécute lecture(comparaison) dans un thread du pool ; si la fenêtre a été fermée
+        entre-temps, la dernière lecture en cours ferme la comparaison.
+        :raise TacheAnnulee: Si la fenêtre est déjà fermée.
+        """
+        with self._verrou:
+            comparaison = self.comparaison
+            if comparaison is None:
+                raise TacheAnnulee("Aperçu fermé")
+            self._lectures += 1
+        try:
+            return lecture(comparaison)
+        finally:
+            with self._verrou:
+                self._lectures -= 1
+                derniere = self._ferme and not self._lectures
+            if derniere:
+                comparaison.fermer()
+
+    def _afficher_resume(self, resume):
+        total = 0
+        for row, table in enumerate(TABLES):
+            for col, categorie in enumerate(CATEGORIES):
+                nombre = resume[table][categorie]
+                total += nombre
+                item = QTableWidgetItem(str(nombre))
+                item.setTextAlignment(Qt.AlignCenter)
+                self.resume_table.setItem(row, col, item)
+        self.info.setText(
+            f"{total} ligne(s) différente(s). Sélectionnez une cellule pour afficher le détail "
+            f"({self.LIMITE_DETAILS} lignes au plus)." if total else "La sauvegarde est identique à la base actuelle."
+        )
+
+    def _erreur(self, e):
+        self.info.setText(f"Comparaison impossible : {e}")
+
+    def _afficher_details(self, row, col, *_):
+        if self.comparaison is None or row < 0 or col < 0:
+            return
+        table, categorie = TABLES[row], CATEGORIES[col]
+        QueryService.instance().submit(
+            lambda reader: self._lire(lambda c: c.details(table, categorie, self.LIMITE_DETAILS)),
+            lambda resultat: self._remplir_details(categorie, *resultat),
+            on_error=lambda e: self.info.setText(f"Détail indisponible : {e}"),
+            channel=self.details_table,
+        )
+
+    def _remplir_details(self, categorie, colonnes, lignes):
+        if categorie == "modifiees":
+            # Une ligne par version ; les valeurs modifiées sont signalées par '→' sur la ligne de la sauvegarde
+            entetes = ["Version", *colonnes]
+            affichees = []
+            for actuelle, sauvegardee in lignes:
+                affichees.append(["Actuelle", *actuelle])
+                affichees.append(["Sauvegarde", *[
+                    f"→ {s}" if a != s else s for a, s in zip(actuelle, sauvegardee)
+                ]])
+        else:
+            entetes, affichees = colonnes, lignes
+        self.details_table.clear()
+        self.details_table.setColumnCount(len(entetes))
+        self.details_table.setHorizontalHeaderLabels(entetes)
+        self.details_table.setRowCount(len(affichees))
+        for r, valeurs in enumerate(affichees):
+            for c, valeur in enumerate(valeurs):
+                self.details_table.setItem(r, c, QTableWidgetItem("" if valeur is None else str(valeur)))
+        self.details_table.resizeColumnsToContents()
+
+    def done(self, result):
+        service = QueryService.instance()
+        service.cancel(self)
+        service.cancel(self.details_table)
+        with self._verrou:
+            self._ferme = True
+            comparaison, self.comparaison = self.comparaison, None
+            en_lecture = self._lectures
+        if comparaison is not None:
+            if en_lecture:
+                comparaison.interrompre()  # La lecture interrompue ferme la comparaison
+            else:
+                comparaison.fermer()
+        super().done(result)
@@ -4,7 +4,7 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont, QColor
-from database import DatabaseManager
+from query_service import QueryService
 from util import convert_month_to_number, PeriodeManager
 
 MOIS_NOMS = [
@@ -20,9 +20,9 @@ class SyntheseDialog(QDialog):
         self.setMinimumSize(680, 480)
         self.setModal(True)
 
-        self.db_manager = DatabaseManager("data/mlbdd.db")
         self.periode_manager = PeriodeManager()
         self.mois, self.annee = self.periode_manager.get_periode()
+        self.totaux = {}
 
         layout = QVBoxLayout(self)
 
@@ -35,8 +35,9 @@ class SyntheseDialog(QDialog):
         layout.addWidget(titre)
 
         self.tabs = QTabWidget()
-        self.tabs.addTab(self._build_mensuel(), f"Mois — {self.mois} {self.annee}")
-        self.tabs.addTab(self._build_annuel(), f"Année {self.annee}")
+        self.chargement = QLabel("Chargement des totaux...")
+        self.chargement.setAlignment(Qt.AlignCenter)
+        self.tabs.addTab(self.chargement, f"Mois — {self.mois} {self.annee}")
         layout.addWidget(self.tabs)
 
         fermer = QPushButton("Fermer")
@@ -46,27 +47,30 @@ class SyntheseDialog(QDialog):
         btn_layout.addWidget(fermer)
         layout.addLayout(btn_layout)
 
-    def _get_mensuel_data(self, mois_num, annee):
-        mois_str = f"{mois_num:02d}"
-        annee_str = str(annee)
-
-        dep = self.db_manager.fetch_all(
-            "SELECT COALESCE(SUM(ttc),0), COALESCE(SUM(montant_tva),0) FROM depenses "
-            "WHERE strftime('%m', date)=? AND strftime('%Y', date)=?",
-            (mois_str, annee_str)
-        )
-        rec = self.db_manager.fetch_all(
-            "SELECT COALESCE(SUM(montant),0), COALESCE(SUM(montant_tva),0) FROM recettes "
-            "WHERE strftime('%m', date)=? AND strftime('%Y', date)=?",
-            (mois_str, annee_str)
+        # Totaux de l'année lus en arrière-plan, partagés par les deux onglets
+        annee = self.annee
+        QueryService.instance().submit(
+            lambda reader: reader.get_totaux_mensuels(annee),
+            self._afficher_totaux,
+            self._erreur_chargement,
+            channel=self,
         )
 
-        ttc_dep = float(dep[0][0]) if dep else 0.0
-        tva_dep = float(dep[0][1]) if dep else 0.0
-        ttc_rec = float(rec[0][0]) if rec else 0.0
-        tva_rec = float(rec[0][1]) if rec else 0.0
+    def _afficher_totaux(self, totaux):
+        self.totaux = totaux
+        self.tabs.clear()
+        self.tabs.addTab(self._build_mensuel(), f"Mois — {self.mois} {self.annee}")
+        self.tabs.addTab(self._build_annuel(), f"Année {self.annee}")
+
+    def _erreur_chargement(self, e):
+        self.chargement.setText(f"Erreur lors du chargement des totaux : {e}")
 
-        return ttc_dep, tva_dep, ttc_rec, tva_rec
+    def done(self, result):
+        QueryService.instance().cancel(self)
+        super().done(result)
+
+    def _get_mensuel_data(self, mois_num, annee):
+        return self.totaux.get((int(annee), mois_num), (0.0, 0.0, 0.0, 0.0))
 
     def _build_mensuel(self):
         widget = QWidget()
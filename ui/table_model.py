@@ -0,0 +1,142 @@
+from bisect import bisect_right
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+class RowTableModel(QAbstractTableModel):
+    """
+    Modèle de tableau en lecture seule adossé à une liste de tuples.
+
+    Les lignes sont stockées telles que renvoyées par SQLite et ne sont formatées qu'à
+    l'affichage, pour les seules cellules visibles. La vue découvre les lignes par lots
+    via canFetchMore/fetchMore au fil du défilement.
+
+    Après une écriture, les grilles patchent la seule ligne concernée (insert_row,
+    update_row, remove_row) au lieu de tout recharger.
+    """
+
+    BATCH_SIZE = 256
+
+    def __init__(self, headers, formatters=None, foregrounds=None, alignments=None, sort_key=None, parent=None):
+        """
+        :param headers: Libellés des colonnes.
+        :param formatters: dict {colonne: fonction(valeur) -> str} pour l'affichage.
+        :param foregrounds: dict {colonne: fonction(valeur) -> couleur ou None}.
+        :param alignments: dict {colonne: alignement Qt}.
+        :param sort_key: fonction(ligne) donnant l'ordre des lignes chargées ; les lignes
+                         insérées sont placées à leur rang, sinon ajoutées à la fin.
+        """
+        super().__init__(parent)
+        self._sort_key = sort_key
+        self._headers = list(headers)
+        self._formatters = formatters or {}
+        self._foregrounds = foregrounds or {}
+        self._alignments = alignments or {}
+        self._rows = []
+        self._loaded = 0
+
+    def set_rows(self, rows):
+        """Remplace le contenu du modèle ; seul le premier lot est exposé à la vue."""
+        self.beginResetModel()
+        self._rows = rows if isinstance(rows, list) else list(rows)
+        self._loaded = min(len(self._rows), self.BATCH_SIZE)
+        self.endResetModel()
+
+    def row_values(self, row):
+        """Retourne les valeurs brutes d'une ligne."""
+        return self._rows[row]
+
+    def text(self, row, column):
+        """Retourne le texte affiché dans une cellule."""
+        return self._format(column, self._rows[row][column])
+
+    def total_rows(self):
+        """Nombre total de lignes stockées, exposées ou non."""
+        return len(self._rows)
+
+    def insert_row(self, values):
+        """Insère une ligne à son rang ; elle n'est signalée à la vue que si elle tombe dans la partie exposée."""
+        values = tuple(values)
+        if self._sort_key is None:
+            position = len(self._rows)
+        else:
+            position = bisect_right(self._rows, self._sort_key(values), key=self._sort_key)
+        if position < self._loaded or not self.canFetchMore():
+            self.beginInsertRows(QModelIndex(), position, position)
+            self._rows.insert(position, values)
+            self._loaded += 1
+            self.endInsertRows()
+        else:
+            self._rows.insert(position, values)
+        return position
+
+    def update_row(self, row, values):
+        """Remplace une ligne ; la déplace si sa clé de tri a changé."""
+        values = tuple(values)
+        if self._sort_key is not None and self._sort_key(values) != self._sort_key(self._rows[row]):
+            self.remove_row(row)
+            return self.insert_row(values)
+        self._rows[row] = values
+        if row < self._loaded:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self._headers) - 1))
+        return row
+
+    def remove_row(self, row):
+        """Supprime une ligne et retourne ses valeurs."""
+        if row < self._loaded:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            values = self._rows.pop(row)
+            self._loaded -= 1
+            self.endRemoveRows()
+        else:
+            values = self._rows.pop(row)
+        return values
+
+    def _format(self, column, value):
+        formatter = self._formatters.get(column)
+        if formatter is not None:
+            return formatter(value)
+        return "" if value is None else str(value)
+
+    # Interface QAbstractTableModel
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self._rows[index.row()][index.column()]
+        if role == Qt.DisplayRole:
+            return self._format(index.column(), value)
+        if role == Qt.ForegroundRole and index.column() in self._foregrounds:
+            return self._foregrounds[index.column()](value)
+        if role == Qt.TextAlignmentRole and index.column() in self._alignments:
+            return self._alignments[index.column()]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and section < len(self._headers):
+            return self._headers[section]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self._rows)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.BATCH_SIZE, len(self._rows) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+
+def format_iso_date(value):
+    """Affiche une date ISO 'AAAA-MM-JJ' au format 'JJ/MM/AAAA'."""
+    if isinstance(value, str) and len(value) == 10 and value[4] == "-" and value[7] == "-":
+        return f"{value[8:10]}/{value[5:7]}/{value[0:4]}"
+    return "" if value is None else str(value)
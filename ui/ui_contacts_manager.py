@@ -3,7 +3,7 @@
 ################################################################################
 ## Form generated from reading UI file 'contacts_manager.ui'
 ##
-## Created by: Qt User Interface Compiler version 6.8.2
+## Created by: Qt User Interface Compiler version 6.12.0
 ##
 ## WARNING! All changes made in this file will be lost when recompiling UI file!
 ################################################################################
@@ -17,7 +17,7 @@ from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
     QPalette, QPixmap, QRadialGradient, QTransform)
 from PySide6.QtWidgets import (QAbstractItemView, QApplication, QGridLayout, QHeaderView,
     QLineEdit, QMainWindow, QPushButton, QSizePolicy,
-    QStatusBar, QTableWidget, QTableWidgetItem, QWidget)
+    QStatusBar, QTableView, QWidget)
 
 class Ui_ContactsManager(object):
     def setupUi(self, ContactsManager):
@@ -26,23 +26,11 @@ class Ui_ContactsManager(object):
         ContactsManager.resize(664, 636)
         self.centralwidget = QWidget(ContactsManager)
         self.centralwidget.setObjectName(u"centralwidget")
-        self.contacts_table = QTableWidget(self.centralwidget)
-        if (self.contacts_table.columnCount() < 4):
-            self.contacts_table.setColumnCount(4)
-        __qtablewidgetitem = QTableWidgetItem()
-        self.contacts_table.setHorizontalHeaderItem(0, __qtablewidgetitem)
-        __qtablewidgetitem1 = QTableWidgetItem()
-        self.contacts_table.setHorizontalHeaderItem(1, __qtablewidgetitem1)
-        __qtablewidgetitem2 = QTableWidgetItem()
-        self.contacts_table.setHorizontalHeaderItem(2, __qtablewidgetitem2)
-        __qtablewidgetitem3 = QTableWidgetItem()
-        self.contacts_table.setHorizontalHeaderItem(3, __qtablewidgetitem3)
+        self.contacts_table = QTableView(self.centralwidget)
         self.contacts_table.setObjectName(u"contacts_table")
         self.contacts_table.setGeometry(QRect(0, 180, 651, 381))
         self.contacts_table.setAlternatingRowColors(True)
         self.contacts_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
-        self.contacts_table.setRowCount(0)
-        self.contacts_table.setColumnCount(4)
         self.pushButton_quitter = QPushButton(self.centralwidget)
         self.pushButton_quitter.setObjectName(u"pushButton_quitter")
         self.pushButton_quitter.setGeometry(QRect(560, 570, 91, 41))
@@ -105,15 +93,6 @@ class Ui_ContactsManager(object):
 
     def retranslateUi(self, ContactsManager):
         ContactsManager.setWindowTitle(QCoreApplication.translate("ContactsManager", u"Gestion des Contacts", None))
-        ___qtablewidgetitem = self.contacts_table.horizontalHeaderItem(0)
-        ___qtablewidgetitem.setText(QCoreApplication.translate("ContactsManager", u"Nom", None));
-        ___qtablewidgetitem1 = self.contacts_table.horizontalHeaderItem(1)
-        ___qtablewidgetitem1.setText(QCoreApplication.translate("ContactsManager", u"Pr\u00e9nom", None));
-        ___qtablewidgetitem2 = self.contacts_table.horizontalHeaderItem(2)
-        ___qtablewidgetitem2.setText(QCoreApplication.translate("ContactsManager", u"T\u00e9l\u00e9phone", None));
-        ___qtablewidgetitem3 = self.contacts_table.horizontalHeaderItem(3)
-        ___qtablewidgetitem3.setText(QCoreApplication.translate("ContactsManager", u"Email", None));
-        self.contacts_table.setProperty(u"horizontalHeaderLabels", [])
         self.pushButton_quitter.setText(QCoreApplication.translate("ContactsManager", u"Quitter", None))
         self.edit_button.setText(QCoreApplication.translate("ContactsManager", u"Modifier", None))
         self.add_button.setText(QCoreApplication.translate("ContactsManager", u"Ajouter", None))
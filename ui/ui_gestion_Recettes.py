@@ -6,7 +6,7 @@ from PySide6.QtCore import QMetaObject
 from PySide6.QtWidgets import (
     QAbstractItemView, QCalendarWidget, QComboBox,
     QGridLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
-    QSizePolicy, QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget
+    QSizePolicy, QTableView, QVBoxLayout, QWidget
 )
 from PySide6.QtGui import QFont
 
@@ -131,12 +131,9 @@ class Ui_Dialog(object):
         main_layout.addLayout(btn_layout)
 
         # --- Tableau principal (s'étire) ---
-        self.tableWidget = QTableWidget()
+        # Colonnes et en-têtes fournis par le modèle (ui/table_model.py)
+        self.tableWidget = QTableView()
         self.tableWidget.setObjectName("tableWidget")
-        self.tableWidget.setColumnCount(9)
-        headers = ["Repère", "Date", "Client", "Paiement", "N°Facture", "Montant", "Taux TVA", "Montant TVA", "Commentaire"]
-        for i, h in enumerate(headers):
-            self.tableWidget.setHorizontalHeaderItem(i, QTableWidgetItem(h))
         self.tableWidget.setAlternatingRowColors(True)
         self.tableWidget.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.tableWidget.verticalHeader().setVisible(False)
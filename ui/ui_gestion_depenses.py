@@ -6,7 +6,7 @@ from PySide6.QtCore import QMetaObject, Qt
 from PySide6.QtWidgets import (
     QAbstractItemView, QCalendarWidget, QCheckBox, QComboBox,
     QGridLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
-    QSizePolicy, QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget
+    QSizePolicy, QTableView, QVBoxLayout, QWidget
 )
 from PySide6.QtGui import QFont
 
@@ -124,12 +124,9 @@ class Ui_Dialog(object):
         main_layout.addLayout(btn_layout)
 
         # --- Tableau principal (s'étire) ---
-        self.tableWidget = QTableWidget()
+        # Colonnes et en-têtes fournis par le modèle (ui/table_model.py)
+        self.tableWidget = QTableView()
         self.tableWidget.setObjectName("tableWidget")
-        self.tableWidget.setColumnCount(8)
-        headers = ["Repère", "Date", "Fournisseur", "TTC", "Taux TVA", "Montant TVA", "Validation", "Commentaire"]
-        for i, h in enumerate(headers):
-            self.tableWidget.setHorizontalHeaderItem(i, QTableWidgetItem(h))
         self.tableWidget.setAlternatingRowColors(True)
         self.tableWidget.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.tableWidget.verticalHeader().setVisible(False)
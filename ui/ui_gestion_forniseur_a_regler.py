@@ -3,7 +3,7 @@
 ################################################################################
 ## Form generated from reading UI file 'gestion_forniseur_a_regler.ui'
 ##
-## Created by: Qt User Interface Compiler version 6.8.2
+## Created by: Qt User Interface Compiler version 6.12.0
 ##
 ## WARNING! All changes made in this file will be lost when recompiling UI file!
 ################################################################################
@@ -17,8 +17,7 @@ from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
     QPalette, QPixmap, QRadialGradient, QTransform)
 from PySide6.QtWidgets import (QAbstractItemView, QApplication, QDialog, QGridLayout,
     QHeaderView, QLabel, QLineEdit, QPushButton,
-    QSizePolicy, QSplitter, QTableWidget, QTableWidgetItem,
-    QWidget)
+    QSizePolicy, QSplitter, QTableView, QWidget)
 
 class Ui_Dialog(object):
     def setupUi(self, Dialog):
@@ -27,17 +26,7 @@ class Ui_Dialog(object):
         Dialog.resize(450, 850)
         Dialog.setMinimumSize(QSize(450, 850))
         Dialog.setMaximumSize(QSize(440, 850))
-        self.tableWidget_a_regler = QTableWidget(Dialog)
-        if (self.tableWidget_a_regler.columnCount() < 4):
-            self.tableWidget_a_regler.setColumnCount(4)
-        __qtablewidgetitem = QTableWidgetItem()
-        self.tableWidget_a_regler.setHorizontalHeaderItem(0, __qtablewidgetitem)
-        __qtablewidgetitem1 = QTableWidgetItem()
-        self.tableWidget_a_regler.setHorizontalHeaderItem(1, __qtablewidgetitem1)
-        __qtablewidgetitem2 = QTableWidgetItem()
-        self.tableWidget_a_regler.setHorizontalHeaderItem(2, __qtablewidgetitem2)
-        __qtablewidgetitem3 = QTableWidgetItem()
-        self.tableWidget_a_regler.setHorizontalHeaderItem(3, __qtablewidgetitem3)
+        self.tableWidget_a_regler = QTableView(Dialog)
         self.tableWidget_a_regler.setObjectName(u"tableWidget_a_regler")
         self.tableWidget_a_regler.setEnabled(True)
         self.tableWidget_a_regler.setGeometry(QRect(10, 50, 440, 700))
@@ -95,14 +84,6 @@ class Ui_Dialog(object):
 
     def retranslateUi(self, Dialog):
         Dialog.setWindowTitle(QCoreApplication.translate("Dialog", u"Dialog", None))
-        ___qtablewidgetitem = self.tableWidget_a_regler.horizontalHeaderItem(0)
-        ___qtablewidgetitem.setText(QCoreApplication.translate("Dialog", u"Rep\u00e8re", None));
-        ___qtablewidgetitem1 = self.tableWidget_a_regler.horizontalHeaderItem(1)
-        ___qtablewidgetitem1.setText(QCoreApplication.translate("Dialog", u"Date", None));
-        ___qtablewidgetitem2 = self.tableWidget_a_regler.horizontalHeaderItem(2)
-        ___qtablewidgetitem2.setText(QCoreApplication.translate("Dialog", u"Fournisseur", None));
-        ___qtablewidgetitem3 = self.tableWidget_a_regler.horizontalHeaderItem(3)
-        ___qtablewidgetitem3.setText(QCoreApplication.translate("Dialog", u"TTC", None));
         self.label.setText(QCoreApplication.translate("Dialog", u"<html><head/><body><p align=\"center\"><span style=\" font-size:18pt; font-weight:700;\">Fournisseur \u00e0 R\u00e9gler</span></p></body></html>", None))
         self.pushButtonValider.setText(QCoreApplication.translate("Dialog", u"Valider", None))
         self.quitterButton.setText(QCoreApplication.translate("Dialog", u"Quitter", None))
@@ -1,67 +1,259 @@
+import hashlib
 import os
 import shutil
+import sqlite3
 from datetime import datetime
+from pathlib import Path
+from constants import BACKUP_CONFIG
+from utils import catalogue
+from utils.depot import EXTENSION_MANIFESTE, collecter_blocs, ecrire_instantane, reconstruire
 
 
 DB_SOURCE = os.path.join("data", "mlbdd.db")
 BACKUP_DIR = os.path.join("data", "backups")
 MAX_DAILY = 10
 MAX_MONTHLY = 12
+# Pages copiées par étape de l'API de sauvegarde SQLite (4 Ko par page par défaut)
+PAGES_PAR_ETAPE = 1024
 
 
-def backup_database():
-    """Crée les sauvegardes journalière, mensuelle et annuelle si nécessaire."""
+def copier_base(source, dest, progression=None, pages=PAGES_PAR_ETAPE, pause=0):
+    """
+    Copie une base SQLite ouverte en WAL avec l'API de sauvegarde (sqlite3.Connection.backup).
+
+    Contrairement à une copie de fichier, la copie inclut les pages encore dans le fichier
+    -wal et reflète un état validé de la base, sans bloquer les écritures : la copie se fait
+    par étapes de `pages` pages et reprend si la base est modifiée entre deux étapes.
+    La copie est écrite dans un fichier temporaire puis renommée, en mode journal DELETE
+    pour que la sauvegarde tienne en un seul fichier.
+    :param progression: Fonction appelée après chaque étape avec (pages copiées, total).
+    :param pause: Secondes d'attente entre deux étapes, pour laisser la main aux autres connexions.
+    """
+    temporaire = dest + ".tmp"
+    if os.path.exists(temporaire):
+        os.remove(temporaire)
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(temporaire)
+    try:
+        def etape(status, restantes, total):
+            if progression is not None:
+                progression(total - restantes, total)
+
+        src.backup(dst, pages=pages, progress=etape, sleep=pause)
+        dst.execute("PRAGMA journal_mode = DELETE")
+    except BaseException:
+        dst.close()
+        os.remove(temporaire)
+        raise
+    finally:
+        src.close()
+    dst.close()
+    os.replace(temporaire, dest)
+
+
+def _lecture_seule(chemin):
+    return sqlite3.connect(Path(chemin).resolve().as_uri() + "?mode=ro", uri=True)
+
+
+def verifier_base(chemin):
+    """
+    Contrôle l'intégrité d'une base avec PRAGMA quick_check.
+    :return: Liste des problèmes détectés, vide si la base est saine.
+    """
+    conn = _lecture_seule(chemin)
+    try:
+        resultat = [row[0] for row in conn.execute("PRAGMA quick_check")]
+    except sqlite3.DatabaseError as e:
+        return [str(e)]
+    finally:
+        conn.close()
+    return [] if resultat == ["ok"] else resultat
+
+
+def backup_database(progression=None, nettoyer=True):
+    """
+    Crée les sauvegardes journalière, mensuelle et annuelle si nécessaire.
+
+    Chaque sauvegarde est un manifeste (mlbdd_<période>.manifest) pointant vers les blocs
+    du dépôt (utils/depot.py) : seuls les blocs modifiés depuis la sauvegarde précédente
+    sont écrits. Les sauvegardes mensuelle et annuelle créées le même jour que la
+    journalière en sont des liens physiques. Chaque sauvegarde est décrite dans le
+    catalogue (utils/catalogue.py), complété au passage pour les sauvegardes qui n'y
+    figurent pas encore.
+    :param progression: Fonction (pages copiées, total) suivant la copie journalière.
+    :param nettoyer: Applique la rétention (MAX_DAILY, MAX_MONTHLY) ; à False, appeler
+                     nettoyer_sauvegardes() plus tard (à la fermeture de l'application).
+    """
     if not os.path.exists(DB_SOURCE):
         return
 
     os.makedirs(BACKUP_DIR, exist_ok=True)
 
     today = datetime.now()
-    _do_daily(today)
-    _do_monthly(today)
-    _do_annual(today)
+    journaliere = _do_daily(today, progression)
+    _do_monthly(today, journaliere)
+    _do_annual(today, journaliere)
+    indexer_sauvegardes()
+    if nettoyer:
+        nettoyer_sauvegardes()
 
 
-def _copy(dest):
-    shutil.copy2(DB_SOURCE, dest)
+def nettoyer_sauvegardes():
+    """
+    Supprime les sauvegardes journalières et mensuelles au-delà de MAX_DAILY et MAX_MONTHLY,
+    puis les blocs du dépôt qui ne sont plus référencés.
+    """
+    if not os.path.exists(BACKUP_DIR):
+        return
+    if _cleanup("Journalier", MAX_DAILY) + _cleanup("Mensuel", MAX_MONTHLY):
+        manifestes = [
+            os.path.join(BACKUP_DIR, f) for f in os.listdir(BACKUP_DIR) if f.endswith(EXTENSION_MANIFESTE)
+        ]
+        collecter_blocs(BACKUP_DIR, manifestes)
+        catalogue.synchroniser(BACKUP_DIR)
 
 
-def _do_daily(today):
-    name = f"mlbdd_{today.strftime('%Y-%m-%d')}.db"
-    dest = os.path.join(BACKUP_DIR, name)
-    if not os.path.exists(dest):
-        _copy(dest)
-        _cleanup_daily()
+def indexer_sauvegardes():
+    """
+    Ajoute au catalogue les sauvegardes qui n'y figurent pas (anciens fichiers .db, manifestes
+    créés avant le catalogue) ; les manifestes sont reconstitués le temps de la lecture.
+    """
+    connues = {e["nom"] for e in catalogue.lire_catalogue(BACKUP_DIR)}
+    nouvelles = []
+    for nom in sorted(os.listdir(BACKUP_DIR)):
+        if nom in connues or catalogue.type_sauvegarde(nom) is None:
+            continue
+        chemin = os.path.join(BACKUP_DIR, nom)
+        fichier = chemin
+        if nom.endswith(EXTENSION_MANIFESTE):
+            fichier = chemin[:-len(EXTENSION_MANIFESTE)] + ".index.db"
+            reconstruire(chemin, fichier, BACKUP_DIR)
+        try:
+            nouvelles.append(_decrire(nom, fichier, datetime.fromtimestamp(os.path.getmtime(chemin))))
+        finally:
+            if fichier != chemin:
+                os.remove(fichier)
+    if nouvelles:
+        catalogue.ajouter(BACKUP_DIR, *nouvelles)
 
 
-def _do_monthly(today):
-    name = f"mlbdd_{today.strftime('%Y-%m')}.db"
-    dest = os.path.join(BACKUP_DIR, name)
-    if not os.path.exists(dest):
-        _copy(dest)
-        _cleanup_monthly()
+def _decrire(nom, fichier, horodatage, empreinte=None):
+    """Entrée de catalogue d'une sauvegarde dont `fichier` est la copie de la base."""
+    if empreinte is None:
+        empreinte = hashlib.sha256()
+        with open(fichier, "rb") as f:
+            for bloc in iter(lambda: f.read(1024 * 1024), b""):
+                empreinte.update(bloc)
+        empreinte = empreinte.hexdigest()
+    try:
+        description = catalogue.decrire_base(fichier)
+    except sqlite3.Error:
+        description = {"lignes": {}, "derniere_depense": None, "derniere_recette": None}
+    return catalogue.entree(
+        nom, horodatage.isoformat(timespec="seconds"), os.path.getsize(fichier), empreinte, description
+    )
 
 
-def _do_annual(today):
-    name = f"mlbdd_{today.strftime('%Y')}.db"
-    dest = os.path.join(BACKUP_DIR, name)
-    if not os.path.exists(dest):
-        _copy(dest)
+def restaurer_a_chaud(nom, db_manager, progression=None):
+    """
+    Restaure une sauvegarde sans redémarrer l'application.
 
+    La sauvegarde est d'abord reconstituée (ou copiée) à côté de la base et contrôlée
+    (PRAGMA quick_check) ; la base n'est suspendue (DatabaseManager.hors_ligne) que le
+    temps de remplacer le fichier par un renommage atomique. Les archives des exercices clos
+    sont ensuite remises en accord avec la base restaurée (DatabaseManager.reconcilier_archives).
+    Les lectures en arrière-plan doivent être arrêtées au préalable (QueryService.cancel_all()
+    puis wait_for_done()).
+    :raise ValueError: Si la sauvegarde est corrompue ; la base n'est alors pas modifiée.
+    """
+    chemin = os.path.join(BACKUP_DIR, nom)
+    fichier = os.path.join(os.path.dirname(os.path.abspath(db_manager.db_file)), "mlbdd.restauration.db")
+    if nom.endswith(EXTENSION_MANIFESTE):
+        reconstruire(chemin, fichier, BACKUP_DIR)
+    else:
+        copier_base(chemin, fichier, progression)
+    try:
+        problemes = verifier_base(fichier)
+        if problemes:
+            raise ValueError(f"Sauvegarde corrompue : {'; '.join(problemes[:5])}")
+        with db_manager.hors_ligne():
+            os.replace(fichier, db_manager.db_file)
+    finally:
+        if os.path.exists(fichier):
+            os.remove(fichier)
+    db_manager.reconcilier_archives()
 
-def _cleanup_daily():
-    files = sorted(
-        f for f in os.listdir(BACKUP_DIR)
-        if len(f) == len("mlbdd_2026-05-02.db") and f.startswith("mlbdd_") and f[6:7].isdigit() and f[13:14] == "-"
-    )
-    for old in files[:-MAX_DAILY]:
-        os.remove(os.path.join(BACKUP_DIR, old))
+
+def _instantane(dest, progression=None):
+    """Copie cohérente de la base (API de sauvegarde) rangée dans le dépôt de blocs sous le manifeste dest."""
+    fichier = dest[:-len(EXTENSION_MANIFESTE)] + ".instantane.db"
+    copier_base(DB_SOURCE, fichier, progression)
+    try:
+        _, _, empreinte = ecrire_instantane(fichier, dest, BACKUP_DIR, niveau=BACKUP_CONFIG["NIVEAU_COMPRESSION"])
+        catalogue.ajouter(BACKUP_DIR, _decrire(os.path.basename(dest), fichier, datetime.now(), empreinte))
+    finally:
+        os.remove(fichier)
 
 
-def _cleanup_monthly():
-    files = sorted(
-        f for f in os.listdir(BACKUP_DIR)
-        if len(f) == len("mlbdd_2026-05.db") and f.startswith("mlbdd_") and f[6:7].isdigit() and "-" not in f[11:]
+def _lier(reference, dest):
+    """Crée dest comme lien physique de reference, ou en copie si le système de fichiers ne le permet pas."""
+    try:
+        os.link(reference, dest)
+    except OSError:
+        shutil.copy2(reference, dest)  # reference est une sauvegarde fermée : la copie de fichier suffit
+
+
+def _existe(periode):
+    """Indique si une sauvegarde de la période existe, au format manifeste ou .db."""
+    return any(
+        os.path.exists(os.path.join(BACKUP_DIR, f"mlbdd_{periode}{extension}"))
+        for extension in (EXTENSION_MANIFESTE, ".db")
     )
-    for old in files[:-MAX_MONTHLY]:
+
+
+def _do_daily(today, progression=None):
+    """Retourne le chemin de la sauvegarde si elle vient d'être créée, sinon None."""
+    periode = today.strftime('%Y-%m-%d')
+    if _existe(periode):
+        return None
+    dest = os.path.join(BACKUP_DIR, f"mlbdd_{periode}{EXTENSION_MANIFESTE}")
+    _instantane(dest, progression)
+    return dest
+
+
+def _do_monthly(today, journaliere=None):
+    _do_periode(today.strftime('%Y-%m'), journaliere)
+
+
+def _do_annual(today, journaliere=None):
+    _do_periode(today.strftime('%Y'), journaliere)
+
+
+def _do_periode(periode, journaliere):
+    if _existe(periode):
+        return
+    dest = os.path.join(BACKUP_DIR, f"mlbdd_{periode}{EXTENSION_MANIFESTE}")
+    if journaliere:
+        _lier(journaliere, dest)
+        reference = next(e for e in catalogue.lire_catalogue(BACKUP_DIR) if e["nom"] == os.path.basename(journaliere))
+        type_, periode = catalogue.type_sauvegarde(os.path.basename(dest))
+        catalogue.ajouter(BACKUP_DIR, dict(reference, nom=os.path.basename(dest), type=type_, periode=periode))
+    else:
+        _instantane(dest)
+
+
+def _cleanup(type_, conserver):
+    """
+    Supprime les sauvegardes les plus anciennes d'un type ("Journalier", "Mensuel"),
+    au-delà des `conserver` plus récentes.
+    :return: Nombre de sauvegardes supprimées.
+    """
+    files = []
+    for f in os.listdir(BACKUP_DIR):
+        analyse = catalogue.type_sauvegarde(f)
+        if analyse is not None and analyse[0] == type_:
+            files.append((analyse[1], f))
+    files.sort()
+    for _, old in files[:-conserver]:
         os.remove(os.path.join(BACKUP_DIR, old))
+    return max(len(files) - conserver, 0)
@@ -0,0 +1,136 @@
+import os
+import shutil
+import threading
+from constants import PDF_CONFIG
+
+EXTENSION = ".pdf"
+
+
+class CacheRapports:
+    """
+    Cache disque des rapports PDF, indexé par empreinte de contenu.
+
+    La clé est un SHA-256 calculé par l'appelant sur tout ce qui détermine le fichier
+    (lignes de la période, version du modèle, logo...) : une écriture dans la période
+    change la clé, l'ancienne entrée n'est plus jamais demandée et finit évincée. Les
+    fichiers sont écrits par remplacement atomique, ce qui permet le partage du dossier
+    entre les processus de l'export par lot. Au-delà de max_octets ou de max_fichiers,
+    les rapports les moins récemment utilisés (date de modification, mise à jour à
+    chaque succès) sont supprimés.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls, dossier):
+        """Retourne le cache partagé du processus pour un dossier."""
+        dossier = os.path.abspath(dossier)
+        with cls._instances_lock:
+            if dossier not in cls._instances:
+                cls._instances[dossier] = cls(dossier)
+            return cls._instances[dossier]
+
+    def __init__(self, dossier, max_octets=None, max_fichiers=None):
+        """
+        :param max_octets: Taille maximale des rapports conservés (PDF_CONFIG["CACHE_MAX_MO"] par défaut).
+        :param max_fichiers: Nombre maximal de rapports conservés (PDF_CONFIG["CACHE_MAX_FICHIERS"] par défaut).
+        """
+        self.dossier = dossier
+        self.max_octets = max_octets if max_octets is not None else PDF_CONFIG["CACHE_MAX_MO"] * 1024 * 1024
+        self.max_fichiers = max_fichiers if max_fichiers is not None else PDF_CONFIG["CACHE_MAX_FICHIERS"]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _chemin(self, cle):
+        return os.path.join(self.dossier, cle + EXTENSION)
+
+    def obtenir(self, cle, dest):
+        """
+        Copie le rapport en cache vers dest.
+        :return: True si la clé était en cache, False sinon (dest n'est pas touché).
+        """
+        chemin = self._chemin(cle)
+        try:
+            shutil.copyfile(chemin, dest)
+            os.utime(chemin)
+        except FileNotFoundError:
+            # Absent, ou évincé par un autre processus entre-temps
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def ranger(self, cle, source):
+        """Mémorise le rapport source sous la clé, puis applique les limites de taille."""
+        if os.path.getsize(source) > self.max_octets:
+            return
+        os.makedirs(self.dossier, exist_ok=True)
+        chemin = self._chemin(cle)
+        temporaire = f"{chemin}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(source, temporaire)
+        os.replace(temporaire, chemin)
+        self._evincer()
+
+    def _entrees(self):
+        """:return: Liste de (date de dernière utilisation, octets, chemin) des rapports en cache."""
+        entrees = []
+        if not os.path.isdir(self.dossier):
+            return entrees
+        for nom in os.listdir(self.dossier):
+            if not nom.endswith(EXTENSION):
+                continue
+            try:
+                infos = os.stat(os.path.join(self.dossier, nom))
+            except FileNotFoundError:
+                continue
+            entrees.append((infos.st_mtime, infos.st_size, os.path.join(self.dossier, nom)))
+        return entrees
+
+    def _evincer(self):
+        entrees = sorted(self._entrees())
+        octets = sum(taille for _, taille, _ in entrees)
+        while entrees and (octets > self.max_octets or len(entrees) > self.max_fichiers):
+            _, taille, chemin = entrees.pop(0)
+            try:
+                os.remove(chemin)
+            except FileNotFoundError:
+                pass
+            octets -= taille
+            with self._lock:
+                self.evictions += 1
+
+    def vider(self):
+        for _, _, chemin in self._entrees():
+            try:
+                os.remove(chemin)
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        """Retourne les compteurs du cache : hits, misses, evictions, entrees, octets."""
+        entrees = self._entrees()
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entrees": len(entrees), "octets": sum(taille for _, taille, _ in entrees)}
+
+
+if __name__ == "__main__":
+    import argparse
+    from constants import DB_CONFIG
+
+    parser = argparse.ArgumentParser(description="Cache des rapports PDF.")
+    parser.add_argument("--db", default=DB_CONFIG["DEFAULT_PATH"], help="Chemin de la base de données")
+    parser.add_argument("--vider", action="store_true", help="Supprime tous les rapports en cache")
+    args = parser.parse_args()
+
+    cache = CacheRapports.instance(os.path.join(os.path.dirname(os.path.abspath(args.db)), PDF_CONFIG["CACHE_DOSSIER"]))
+    if args.vider:
+        cache.vider()
+    stats = cache.stats()
+    print(f"{cache.dossier} : {stats['entrees']} rapport(s), {stats['octets'] / 1024 / 1024:.1f} Mo "
+          f"(limites : {cache.max_fichiers} rapports, {cache.max_octets / 1024 / 1024:.0f} Mo)")
@@ -0,0 +1,88 @@
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+NOM_CATALOGUE = "catalogue.json"
+# Type de sauvegarde selon la longueur de la période du nom de fichier (mlbdd_<période>.<ext>)
+TYPES = {10: "Journalier", 7: "Mensuel", 4: "Annuel"}
+EXTENSIONS = (".db", ".manifest")
+
+
+def type_sauvegarde(nom):
+    """
+    Analyse un nom de sauvegarde 'mlbdd_<période>.db' ou 'mlbdd_<période>.manifest'.
+    :return: (type, période), ou None si le fichier n'est pas une sauvegarde.
+    """
+    base, extension = os.path.splitext(nom)
+    periode = base[6:]
+    if not base.startswith("mlbdd_") or extension not in EXTENSIONS or not periode[:4].isdigit():
+        return None
+    type_ = TYPES.get(len(periode))
+    return (type_, periode) if type_ else None
+
+
+def decrire_base(fichier):
+    """
+    Lit le contenu d'une copie de la base pour le catalogue.
+    :return: dict {"lignes": {table: nombre}, "derniere_depense": date, "derniere_recette": date}.
+    """
+    conn = sqlite3.connect(Path(fichier).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        lignes = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("depenses", "recettes", "contacts")
+        }
+        return {
+            "lignes": lignes,
+            "derniere_depense": conn.execute("SELECT MAX(date) FROM depenses").fetchone()[0],
+            "derniere_recette": conn.execute("SELECT MAX(date) FROM recettes").fetchone()[0],
+        }
+    finally:
+        conn.close()
+
+
+def lire_catalogue(dossier):
+    """Retourne les entrées du catalogue du dossier de sauvegardes, triées par nom ; [] s'il est absent."""
+    try:
+        with open(os.path.join(dossier, NOM_CATALOGUE), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return []
+
+
+def ecrire_catalogue(dossier, entrees):
+    chemin = os.path.join(dossier, NOM_CATALOGUE)
+    temporaire = chemin + ".tmp"
+    with open(temporaire, "w", encoding="utf-8") as f:
+        json.dump(sorted(entrees, key=lambda e: e["nom"]), f, ensure_ascii=False, indent=1)
+    os.replace(temporaire, chemin)
+
+
+def ajouter(dossier, *entrees):
+    """Ajoute ou remplace des entrées du catalogue (clé : nom du fichier)."""
+    noms = {entree["nom"] for entree in entrees}
+    conservees = [e for e in lire_catalogue(dossier) if e["nom"] not in noms]
+    ecrire_catalogue(dossier, conservees + list(entrees))
+
+
+def synchroniser(dossier):
+    """Retire du catalogue les sauvegardes dont le fichier n'existe plus."""
+    entrees = lire_catalogue(dossier)
+    existantes = [e for e in entrees if os.path.exists(os.path.join(dossier, e["nom"]))]
+    if len(existantes) != len(entrees):
+        ecrire_catalogue(dossier, existantes)
+
+
+def entree(nom, horodatage, taille, empreinte, description):
+    """Construit une entrée de catalogue ; description vient de decrire_base()."""
+    type_, periode = type_sauvegarde(nom)
+    return {
+        "nom": nom,
+        "type": type_,
+        "periode": periode,
+        "horodatage": horodatage,
+        "taille": taille,
+        "empreinte": empreinte,
+        **description,
+    }
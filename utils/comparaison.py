@@ -0,0 +1,110 @@
+import os
+import sqlite3
+from pathlib import Path
+from utils.depot import EXTENSION_MANIFESTE, reconstruire
+
+TABLES = ("depenses", "recettes", "contacts")
+CATEGORIES = ("ajoutees", "supprimees", "modifiees")
+
+
+class ComparaisonSauvegarde:
+    """
+    Aperçu d'une restauration : différences, par id, entre la base et une sauvegarde.
+
+    La sauvegarde est attachée en lecture seule (ATTACH) à une connexion en lecture seule
+    sur la base ; les différences sont calculées en SQL, par jointure sur l'id. Seules les
+    lignes dont le contenu diffère sont lues. Du point de vue de la restauration :
+    - ajoutees : lignes présentes dans la sauvegarde et absentes de la base ;
+    - supprimees : lignes de la base absentes de la sauvegarde (perdues à la restauration) ;
+    - modifiees : même id, contenu différent.
+    """
+
+    def __init__(self, db_file, sauvegarde, depot=None):
+        """
+        :param sauvegarde: Fichier .db ou manifeste ; un manifeste est reconstitué dans un
+                           fichier temporaire, supprimé par fermer().
+        :param depot: Dossier du dépôt de blocs (celui du manifeste par défaut).
+        """
+        self._temporaire = None
+        self.conn = None
+        try:
+            if sauvegarde.endswith(EXTENSION_MANIFESTE):
+                self._temporaire = sauvegarde[:-len(EXTENSION_MANIFESTE)] + ".apercu.db"
+                reconstruire(sauvegarde, self._temporaire, depot or os.path.dirname(sauvegarde))
+                sauvegarde = self._temporaire
+            self.conn = sqlite3.connect(Path(db_file).resolve().as_uri() + "?mode=ro", uri=True, check_same_thread=False)
+            self.conn.execute("ATTACH DATABASE ? AS sauvegarde", (Path(sauvegarde).resolve().as_uri() + "?mode=ro",))
+            self._colonnes = {table: self._colonnes_communes(table) for table in TABLES}
+        except BaseException:
+            self.fermer()
+            raise
+
+    def _colonnes_communes(self, table):
+        """Colonnes présentes dans les deux bases, dans l'ordre de la base courante."""
+        courantes = [row[1] for row in self.conn.execute(f"PRAGMA main.table_info({table})")]
+        sauvegardees = {row[1] for row in self.conn.execute(f"PRAGMA sauvegarde.table_info({table})")}
+        return [c for c in courantes if c in sauvegardees]
+
+    def _requete(self, table, categorie, colonnes_select):
+        colonnes = self._colonnes[table]
+        if categorie == "ajoutees":
+            return (f"SELECT {colonnes_select('s')} FROM sauvegarde.{table} s "
+                    f"WHERE NOT EXISTS (SELECT 1 FROM main.{table} m WHERE m.id = s.id) ORDER BY s.id")
+        if categorie == "supprimees":
+            return (f"SELECT {colonnes_select('m')} FROM main.{table} m "
+                    f"WHERE NOT EXISTS (SELECT 1 FROM sauvegarde.{table} s WHERE s.id = m.id) ORDER BY m.id")
+        # Comparaison de lignes complètes (row values) : une seule jointure sur la clé primaire
+        courante = ", ".join(f"m.{c}" for c in colonnes)
+        sauvegardee = ", ".join(f"s.{c}" for c in colonnes)
+        return (f"SELECT {colonnes_select('m, s')} FROM main.{table} m JOIN sauvegarde.{table} s ON s.id = m.id "
+                f"WHERE ({courante}) IS NOT ({sauvegardee}) ORDER BY m.id")
+
+    def resume(self):
+        """
+        Compte les différences de chaque table.
+        :return: dict {table: {"ajoutees": n, "supprimees": n, "modifiees": n}}.
+        """
+        return {
+            table: {
+                categorie: self.conn.execute(
+                    f"SELECT COUNT(*) FROM ({self._requete(table, categorie, lambda alias: '1')})"
+                ).fetchone()[0]
+                for categorie in CATEGORIES
+            }
+            for table in TABLES
+        }
+
+    def details(self, table, categorie, limite=500):
+        """
+        Lignes d'une catégorie de différences.
+        :return: (colonnes, lignes) ; pour "modifiees", chaque ligne est le couple
+                 (ligne actuelle, ligne de la sauvegarde).
+        """
+        colonnes = self._colonnes[table]
+        if categorie == "modifiees":
+            def select(alias):
+                return ", ".join([f"m.{c}" for c in colonnes] + [f"s.{c}" for c in colonnes])
+        else:
+            def select(alias):
+                return ", ".join(f"{alias}.{c}" for c in colonnes)
+        rows = self.conn.execute(f"{self._requete(table, categorie, select)} LIMIT ?", (limite,)).fetchall()
+        if categorie == "modifiees":
+            rows = [(row[:len(colonnes)], row[len(colonnes):]) for row in rows]
+        return colonnes, rows
+
+    def interrompre(self):
+        """Interrompt la requête en cours, depuis un autre thread (elle lève sqlite3.OperationalError)."""
+        if self.conn is not None:
+            self.conn.interrupt()
+
+    def fermer(self):
+        if self.conn is not None:
+            self.conn.close()
+        if self._temporaire and os.path.exists(self._temporaire):
+            os.remove(self._temporaire)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
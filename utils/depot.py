@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import zlib
+from datetime import datetime
+
+# Taille des blocs découpés dans la base (multiple de toutes les tailles de page SQLite)
+TAILLE_BLOC = 64 * 1024
+EXTENSION_MANIFESTE = ".manifest"
+EXTENSION_COMPRESSE = ".z"
+
+
+def _chemin_bloc(depot, empreinte):
+    return os.path.join(depot, "blocs", empreinte[:2], empreinte)
+
+
+def _ecrire_atomique(chemin, donnees):
+    temporaire = chemin + ".tmp"
+    with open(temporaire, "wb") as f:
+        f.write(donnees)
+    os.replace(temporaire, chemin)
+
+
+def _bloc_existe(chemin):
+    return os.path.exists(chemin) or os.path.exists(chemin + EXTENSION_COMPRESSE)
+
+
+def ecrire_instantane(fichier, manifeste, depot, taille_bloc=TAILLE_BLOC, niveau=0):
+    """
+    Range un fichier de base dans le dépôt de blocs et écrit son manifeste.
+
+    Le fichier est découpé en blocs de taille fixe identifiés par leur SHA-256 ; seuls les
+    blocs absents du dépôt sont écrits, les autres sont partagés avec les instantanés précédents.
+    Le fichier est lu bloc par bloc et n'est jamais chargé entier en mémoire.
+    :param fichier: Copie cohérente de la base (voir backup.copier_base).
+    :param manifeste: Chemin du manifeste à écrire (liste ordonnée des empreintes).
+    :param depot: Dossier du dépôt ; les blocs sont rangés dans depot/blocs/.
+    :param niveau: Niveau de compression zlib des nouveaux blocs (1 à 9), 0 pour les écrire bruts.
+    :return: (nombre de blocs écrits, octets écrits, SHA-256 du fichier complet).
+    """
+    empreintes, ecrits, octets = [], 0, 0
+    empreinte_fichier = hashlib.sha256()
+    with open(fichier, "rb") as f:
+        while True:
+            bloc = f.read(taille_bloc)
+            if not bloc:
+                break
+            empreinte_fichier.update(bloc)
+            empreinte = hashlib.sha256(bloc).hexdigest()
+            chemin = _chemin_bloc(depot, empreinte)
+            if not _bloc_existe(chemin):
+                os.makedirs(os.path.dirname(chemin), exist_ok=True)
+                compresse = zlib.compress(bloc, niveau) if niveau else None
+                if compresse is not None and len(compresse) < len(bloc):
+                    _ecrire_atomique(chemin + EXTENSION_COMPRESSE, compresse)
+                    octets += len(compresse)
+                else:
+                    _ecrire_atomique(chemin, bloc)
+                    octets += len(bloc)
+                ecrits += 1
+            empreintes.append(empreinte)
+    contenu = {
+        "version": 1,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "taille": os.path.getsize(fichier),
+        "taille_bloc": taille_bloc,
+        "compression": niveau,
+        "empreinte": empreinte_fichier.hexdigest(),
+        "blocs": empreintes,
+    }
+    _ecrire_atomique(manifeste, json.dumps(contenu).encode("utf-8"))
+    return ecrits, octets, contenu["empreinte"]
+
+
+def lire_manifeste(manifeste):
+    with open(manifeste, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _lire_bloc(chemin):
+    """Retourne le contenu d'un bloc, décompressé au besoin, ou None s'il est absent."""
+    try:
+        with open(chemin, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    try:
+        with open(chemin + EXTENSION_COMPRESSE, "rb") as f:
+            return zlib.decompress(f.read())
+    except FileNotFoundError:
+        return None
+    except zlib.error:
+        return b""  # Rejeté par le contrôle d'empreinte
+
+
+def reconstruire(manifeste, dest, depot):
+    """
+    Reconstitue le fichier de base d'un instantané à partir de ses blocs, décompressés
+    et écrits un par un.
+    :raise ValueError: Si un bloc est absent ou ne correspond plus à son empreinte.
+    """
+    contenu = lire_manifeste(manifeste)
+    temporaire = dest + ".tmp"
+    try:
+        with open(temporaire, "wb") as sortie:
+            for empreinte in contenu["blocs"]:
+                bloc = _lire_bloc(_chemin_bloc(depot, empreinte))
+                if bloc is None:
+                    raise ValueError(f"Bloc manquant dans le dépôt : {empreinte}")
+                if hashlib.sha256(bloc).hexdigest() != empreinte:
+                    raise ValueError(f"Bloc corrompu dans le dépôt : {empreinte}")
+                sortie.write(bloc)
+        if os.path.getsize(temporaire) != contenu["taille"]:
+            raise ValueError("Taille de l'instantané reconstitué incorrecte.")
+    except BaseException:
+        if os.path.exists(temporaire):
+            os.remove(temporaire)
+        raise
+    os.replace(temporaire, dest)
+
+
+def collecter_blocs(depot, manifestes):
+    """
+    Supprime les blocs du dépôt qui ne sont plus référencés par aucun des manifestes donnés.
+    :return: Nombre de blocs supprimés.
+    """
+    references = set()
+    for manifeste in manifestes:
+        references.update(lire_manifeste(manifeste)["blocs"])
+    supprimes = 0
+    racine = os.path.join(depot, "blocs")
+    if not os.path.isdir(racine):
+        return 0
+    for sous_dossier in os.listdir(racine):
+        chemin_dossier = os.path.join(racine, sous_dossier)
+        for nom in os.listdir(chemin_dossier):
+            if nom.endswith(EXTENSION_COMPRESSE):
+                empreinte = nom[:-len(EXTENSION_COMPRESSE)]
+            else:
+                empreinte = nom
+            if empreinte not in references:
+                os.remove(os.path.join(chemin_dossier, nom))
+                supprimes += 1
+    return supprimes
@@ -0,0 +1,133 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from constants import DB_CONFIG
+from database import DatabaseReader
+from pdf_generator import PDFGenerator
+
+# Connexion en lecture seule du processus de rendu (voir _initialiser)
+_lecteur = None
+
+
+def taches_export(mois_debut, annee_debut, mois_fin, annee_fin):
+    """
+    Liste les PDF d'une plage de périodes (bornes incluses) :
+    - un rapport fiscal par mois ;
+    - un rapport par trimestre entièrement compris dans la plage ;
+    - une synthèse par année entièrement comprise dans la plage.
+    Les tâches les plus longues (trimestres) viennent en premier, pour que les derniers
+    processus libres ne restent pas à attendre un gros rapport lancé en fin de lot.
+    :return: Liste de (nom du fichier, annee, mois, mois_fin) ; mois vaut None pour une synthèse annuelle.
+    """
+    mois_plage = []
+    annee, mois = int(annee_debut), int(mois_debut)
+    while (annee, mois) <= (int(annee_fin), int(mois_fin)):
+        mois_plage.append((annee, mois))
+        annee, mois = (annee + 1, 1) if mois == 12 else (annee, mois + 1)
+    couverts = set(mois_plage)
+    trimestres, mensuels, annuels = [], [], []
+    for annee, mois in mois_plage:
+        mensuels.append((f"DDF_{annee}_{mois:02d}.pdf", annee, mois, mois))
+        if mois % 3 == 0 and {(annee, mois - 2), (annee, mois - 1)} <= couverts:
+            trimestres.append((f"DDF_{annee}_T{mois // 3}.pdf", annee, mois - 2, mois))
+        if mois == 12 and all((annee, m) in couverts for m in range(1, 13)):
+            annuels.append((f"Synthese_{annee}.pdf", annee, None, None))
+    return trimestres + mensuels + annuels
+
+
+def _initialiser(db_file):
+    """Ouvre, dans chaque processus de rendu, sa propre connexion en lecture seule (sans cache)."""
+    global _lecteur
+    _lecteur = DatabaseReader(db_file)
+
+
+def _generer(tache, dossier):
+    """Rend un PDF dans un processus du pool. :return: (chemin, durée en s)."""
+    nom, annee, mois, mois_fin = tache
+    chemin = os.path.join(dossier, nom)
+    debut = time.perf_counter()
+    generateur = PDFGenerator(_lecteur)
+    if mois is None:
+        generateur.generate_synthese_annuelle(annee, chemin)
+    else:
+        generateur.generate_ddf(mois, annee, chemin, mois_fin)
+    return chemin, time.perf_counter() - debut
+
+
+def exporter_lot(taches, dossier, db_file=None, processus=None, progression=None):
+    """
+    Rend une liste de PDF (voir taches_export) dans un pool de processus : chaque processus
+    ouvre sa connexion en lecture seule et met en page ses rapports indépendamment des
+    autres, si bien que le débit croît avec le nombre de cœurs (la mise en page ReportLab,
+    en Python pur, n'avance que sur un cœur par processus).
+    :param processus: Nombre de processus, par défaut un par cœur (au plus un par tâche).
+    :param progression: Fonction appelée à chaque PDF terminé avec (faits, total, nom, durée en s,
+                        erreur ou None), dans le processus appelant ; si elle lève une exception,
+                        les PDF pas encore commencés sont abandonnés et l'exception propagée.
+    :return: dict {"fichiers": [(chemin, durée)], "erreurs": [(nom, message)], "duree": durée totale,
+             "processus": nombre de processus}.
+    """
+    if db_file is None:
+        db_file = DB_CONFIG["DEFAULT_PATH"]
+    os.makedirs(dossier, exist_ok=True)
+    processus = max(1, min(processus or os.cpu_count() or 1, len(taches)))
+    fichiers, erreurs = [], []
+    debut = time.perf_counter()
+    # Processus neufs (spawn), comme sous Windows : rien n'est hérité des threads et connexions de l'appelant
+    contexte = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(processus, contexte, _initialiser, (os.path.abspath(db_file),)) as pool:
+        futures = {pool.submit(_generer, tache, dossier): tache[0] for tache in taches}
+        try:
+            for future in as_completed(futures):
+                nom = futures[future]
+                try:
+                    chemin, duree = future.result()
+                    fichiers.append((chemin, duree))
+                    erreur = None
+                except Exception as e:
+                    duree, erreur = 0.0, str(e)
+                    erreurs.append((nom, erreur))
+                if progression is not None:
+                    progression(len(fichiers) + len(erreurs), len(taches), nom, duree, erreur)
+        except BaseException:
+            # progression a levé (export annulé) : seuls les PDF déjà en cours de rendu sont attendus
+            for future in futures:
+                future.cancel()
+            raise
+    duree_totale = time.perf_counter() - debut
+    print(f"Export par lot : {len(fichiers)} PDF en {duree_totale:.1f} s sur {processus} processus"
+          f" ({len(erreurs)} erreur(s))")
+    return {"fichiers": sorted(fichiers), "erreurs": erreurs, "duree": duree_totale, "processus": processus}
+
+
+def lire_periode(texte):
+    """Convertit 'MM/AAAA' en (mois, annee)."""
+    mois, annee = texte.split("/")
+    if not 1 <= int(mois) <= 12:
+        raise ValueError(f"Mois invalide : {texte}")
+    return int(mois), int(annee)
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import DatabaseManager
+
+    parser = argparse.ArgumentParser(description="Export des rapports PDF d'une plage de périodes.")
+    parser.add_argument("debut", type=lire_periode, help="Première période, MM/AAAA")
+    parser.add_argument("fin", type=lire_periode, help="Dernière période (incluse), MM/AAAA")
+    parser.add_argument("dossier", help="Dossier de destination des PDF")
+    parser.add_argument("--db", default=DB_CONFIG["DEFAULT_PATH"], help="Chemin de la base de données")
+    parser.add_argument("--processus", type=int, default=None, help="Nombre de processus (un par cœur par défaut)")
+    args = parser.parse_args()
+
+    def afficher(faits, total, nom, duree, erreur):
+        etat = f"erreur : {erreur}" if erreur else f"{duree * 1000:.0f} ms"
+        print(f"[{faits}/{total}] {nom} : {etat}")
+
+    # Schéma migré par la connexion d'écriture avant l'ouverture des lecteurs en lecture seule
+    db = DatabaseManager(args.db)
+    db.conn
+    db.close_connection()
+    taches = taches_export(*args.debut, *args.fin)
+    exporter_lot(taches, args.dossier, args.db, args.processus, afficher)
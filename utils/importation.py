@@ -0,0 +1,281 @@
+import csv
+import os
+import unicodedata
+from contextlib import nullcontext
+from datetime import date, datetime
+from database import DatabaseManager
+from util import calculate_tva
+
+# Lignes écrites par transaction
+TAILLE_LOT = 5000
+# Profil de performance SQLite appliqué pendant un import (voir constants.DB_PROFILS)
+PROFIL_IMPORT = "import_massif"
+# Erreurs conservées en détail dans le rapport (les suivantes sont seulement comptées)
+MAX_ERREURS_DETAILLEES = 1000
+
+# Champs lus dans le fichier pour chaque table (le montant de TVA est toujours recalculé)
+CHAMPS = {
+    "depenses": ["date", "fournisseur", "ttc", "tva", "validation", "commentaire"],
+    "recettes": ["date", "client", "paiement", "numero_facture", "montant", "tva", "commentaire"],
+}
+OBLIGATOIRES = {
+    "depenses": ("date", "fournisseur", "ttc", "tva"),
+    "recettes": ("date", "client", "montant", "tva"),
+}
+# En-têtes reconnus pour chaque champ (comparés sans accents ni casse)
+ALIAS = {
+    "date": ("date", "date operation", "date valeur"),
+    "fournisseur": ("fournisseur", "tiers", "libelle"),
+    "client": ("client", "tiers"),
+    "ttc": ("ttc", "montant ttc", "montant", "debit"),
+    "montant": ("montant", "montant ttc", "ttc", "credit"),
+    "tva": ("tva", "taux", "taux tva", "tva id"),
+    "validation": ("validation", "regle", "valide"),
+    "paiement": ("paiement", "mode de paiement", "reglement"),
+    "numero_facture": ("numero facture", "n facture", "facture"),
+    "commentaire": ("commentaire", "note", "remarque"),
+}
+VALEURS_OUI = ("oui", "o", "valide", "x", "1", "yes", "true")
+
+
+class RapportImport:
+    """Bilan d'un import : compteurs et erreurs par ligne."""
+
+    def __init__(self, table):
+        self.table = table
+        self.lignes_lues = 0
+        self.lignes_importees = 0
+        self.contacts_crees = 0
+        self.nb_erreurs = 0
+        self.erreurs = []  # (numéro de ligne dans le fichier, message)
+
+    def ajouter_erreur(self, numero, message):
+        self.nb_erreurs += 1
+        if len(self.erreurs) < MAX_ERREURS_DETAILLEES:
+            self.erreurs.append((numero, message))
+
+    def resume(self):
+        return (f"{self.lignes_importees} ligne(s) importée(s) dans '{self.table}' sur {self.lignes_lues} lue(s), "
+                f"{self.contacts_crees} contact(s) créé(s), {self.nb_erreurs} erreur(s).")
+
+
+def _normaliser(texte):
+    texte = unicodedata.normalize("NFKD", str(texte)).encode("ascii", "ignore").decode()
+    return " ".join(texte.lower().replace("°", "").replace(".", " ").replace("_", " ").split())
+
+
+def parse_date(valeur):
+    """Convertit 'jj/mm/aaaa', 'aaaa-mm-jj' ou une date Excel en date ISO 'aaaa-mm-jj'."""
+    if isinstance(valeur, (datetime, date)):
+        return valeur.strftime("%Y-%m-%d")
+    texte = str(valeur).strip()
+    for format_date in ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%d/%m/%y"):
+        try:
+            return datetime.strptime(texte, format_date).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError(f"date invalide '{texte}'")
+
+
+def parse_montant(valeur):
+    """Convertit un montant ('1 003,77 €', '49.97', nombre Excel) en float."""
+    if isinstance(valeur, (int, float)):
+        return float(valeur)
+    texte = str(valeur).replace("€", "").replace(" ", "").replace("\u00a0", "").replace("\u202f", "").strip()
+    if "," in texte:
+        texte = texte.replace(".", "").replace(",", ".")
+    try:
+        return float(texte)
+    except ValueError:
+        raise ValueError(f"montant invalide '{valeur}'")
+
+
+def parse_taux(valeur):
+    """Convertit un taux de TVA ('20', '5,5 %', 0.2 ou 20.0) en pourcentage."""
+    taux = parse_montant(str(valeur).replace("%", "")) if not isinstance(valeur, (int, float)) else float(valeur)
+    return taux * 100 if 0 < taux < 1 else taux
+
+
+def lire_lignes(chemin, separateur=None, encodage="utf-8-sig", feuille=None):
+    """
+    Parcourt un fichier CSV ou Excel (.xlsx) ligne par ligne, sans le charger en mémoire.
+    :param separateur: Séparateur CSV ; détecté sur le début du fichier si None.
+    :param feuille: Nom de la feuille Excel ; la feuille active par défaut.
+    :return: Générateur de listes de valeurs, en-tête compris.
+    """
+    if os.path.splitext(chemin)[1].lower() in (".xlsx", ".xlsm"):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise RuntimeError("L'import Excel nécessite le paquet openpyxl (pip install openpyxl).")
+        classeur = load_workbook(chemin, read_only=True, data_only=True)
+        try:
+            onglet = classeur[feuille] if feuille else classeur.active
+            for valeurs in onglet.iter_rows(values_only=True):
+                yield ["" if v is None else v for v in valeurs]
+        finally:
+            classeur.close()
+        return
+    with open(chemin, newline="", encoding=encodage) as fichier:
+        if separateur is None:
+            debut = fichier.read(4096)
+            fichier.seek(0)
+            try:
+                separateur = csv.Sniffer().sniff(debut, delimiters=";,\t|").delimiter
+            except csv.Error:
+                separateur = ";"
+        yield from csv.reader(fichier, delimiter=separateur)
+
+
+def resoudre_colonnes(table, entete, correspondance=None):
+    """
+    Associe chaque champ de la table à un index de colonne du fichier.
+    :param correspondance: dict {champ: en-tête ou index} prioritaire sur la détection par ALIAS.
+    :return: dict {champ: index}.
+    """
+    correspondance = correspondance or {}
+    entetes = [_normaliser(e) for e in entete]
+    colonnes = {}
+    for champ in CHAMPS[table]:
+        cible = correspondance.get(champ)
+        if isinstance(cible, int) or (isinstance(cible, str) and cible.isdigit()):
+            colonnes[champ] = int(cible)
+        elif cible is not None:
+            if _normaliser(cible) not in entetes:
+                raise ValueError(f"Colonne '{cible}' introuvable pour le champ '{champ}'.")
+            colonnes[champ] = entetes.index(_normaliser(cible))
+        else:
+            for alias in ALIAS.get(champ, (champ,)):
+                if alias in entetes and entetes.index(alias) not in colonnes.values():
+                    colonnes[champ] = entetes.index(alias)
+                    break
+    manquants = [champ for champ in OBLIGATOIRES[table] if champ not in colonnes]
+    if manquants:
+        raise ValueError(f"Colonne(s) obligatoire(s) introuvable(s) : {', '.join(manquants)}.")
+    return colonnes
+
+
+def convertir_ligne(table, valeurs, colonnes):
+    """Convertit une ligne du fichier en tuple prêt pour insert_depenses_bulk / insert_recettes_bulk."""
+    def valeur(champ, defaut=""):
+        index = colonnes.get(champ)
+        if index is None or index >= len(valeurs) or valeurs[index] in ("", None):
+            return defaut
+        return valeurs[index]
+
+    for champ in OBLIGATOIRES[table]:
+        if valeur(champ) == "":
+            raise ValueError(f"champ '{champ}' vide")
+    date_iso = parse_date(valeur("date"))
+    montant = parse_montant(valeur("ttc" if table == "depenses" else "montant"))
+    taux = parse_taux(valeur("tva"))
+    # TVA toujours recalculée depuis le TTC et le taux, comme à la saisie
+    montant_tva = calculate_tva(f"{abs(montant):.2f}", f"{taux}%")
+    if montant_tva is None:
+        raise ValueError("calcul de la TVA impossible")
+    montant_tva = -montant_tva if montant < 0 else montant_tva
+    commentaire = str(valeur("commentaire")).strip()
+    if table == "depenses":
+        validation = "Oui" if _normaliser(valeur("validation", "non")) in VALEURS_OUI else "Non"
+        return (date_iso, str(valeur("fournisseur")).strip(), montant, taux, montant_tva, validation, commentaire)
+    return (date_iso, str(valeur("client")).strip(), str(valeur("paiement", "null")).strip(),
+            str(valeur("numero_facture")).strip(), montant, taux, montant_tva, commentaire)
+
+
+def importer_fichier(chemin, table, correspondance=None, db_manager=None, separateur=None,
+                     encodage="utf-8-sig", feuille=None, progression=None, profil=PROFIL_IMPORT):
+    """
+    Importe un fichier CSV ou Excel dans 'depenses' ou 'recettes'.
+
+    Le fichier est lu en flux et écrit par lots de TAILLE_LOT lignes, une transaction par
+    lot. Les contacts absents sont créés comme par insert_fournisseur. Une ligne invalide
+    est consignée dans le rapport sans interrompre l'import.
+    :param correspondance: dict {champ: en-tête ou index de colonne}, voir resoudre_colonnes.
+    :param progression: Fonction appelée avec le nombre de lignes lues après chaque lot ; peut
+                        lever une exception pour interrompre l'import entre deux lots (les
+                        lots déjà écrits sont conservés, le bilan partiel est affiché).
+    :param profil: Profil de performance (DB_PROFILS) de la connexion d'écriture dédiée à
+                   l'import (voir DatabaseManager.ecrivain_dedie), None pour écrire sur la
+                   connexion partagée.
+    :return: RapportImport.
+    """
+    if table not in CHAMPS:
+        raise ValueError(f"Table inconnue : {table}")
+    db = db_manager or DatabaseManager()
+    rapport = RapportImport(table)
+    contacts = {row[0] for row in db.fetch_all("SELECT nom FROM contacts", as_tuples=True)}
+
+    lignes = lire_lignes(chemin, separateur, encodage, feuille)
+    entete = next(lignes, None)
+    if entete is None:
+        return rapport
+    colonnes = resoudre_colonnes(table, entete, correspondance)
+    lot, numeros = [], []
+
+    def ecrire_lot(ecrivain):
+        inserer = ecrivain.insert_depenses_bulk if table == "depenses" else ecrivain.insert_recettes_bulk
+        nouveaux = {ligne[1] for ligne in lot if ligne[1] not in contacts}
+        try:
+            with ecrivain.transaction():
+                for nom in nouveaux:
+                    ecrivain.insert_fournisseur(nom)
+                inserer(lot, fetch_rows=False)
+        except Exception as e:
+            for numero in numeros:
+                rapport.ajouter_erreur(numero, f"lot non écrit : {e}")
+        else:
+            contacts.update(nouveaux)
+            rapport.contacts_crees += len(nouveaux)
+            rapport.lignes_importees += len(lot)
+        lot.clear()
+        numeros.clear()
+        if progression is not None:
+            progression(rapport.lignes_lues)
+
+    # Connexion dédiée : le profil d'import (synchronous=OFF) ne touche pas aux saisies faites entre-temps
+    with db.ecrivain_dedie(profil) if profil is not None else nullcontext(db) as ecrivain:
+        try:
+            for numero, valeurs in enumerate(lignes, start=2):
+                if not any(str(v).strip() for v in valeurs):
+                    continue
+                rapport.lignes_lues += 1
+                try:
+                    lot.append(convertir_ligne(table, valeurs, colonnes))
+                    numeros.append(numero)
+                except ValueError as e:
+                    rapport.ajouter_erreur(numero, str(e))
+                if len(lot) >= TAILLE_LOT:
+                    ecrire_lot(ecrivain)
+            if lot:
+                ecrire_lot(ecrivain)
+        except Exception:
+            print(f"Import interrompu : {rapport.resume()}")
+            raise
+    return rapport
+
+
+if __name__ == "__main__":
+    import argparse
+    from constants import DB_CONFIG
+
+    parser = argparse.ArgumentParser(description="Import d'écritures depuis un fichier CSV ou Excel.")
+    parser.add_argument("fichier", help="Fichier .csv ou .xlsx, avec une ligne d'en-tête")
+    parser.add_argument("--table", choices=sorted(CHAMPS), required=True, help="Table de destination")
+    parser.add_argument("--db", default=DB_CONFIG["DEFAULT_PATH"], help="Chemin de la base de données")
+    parser.add_argument("--colonne", action="append", default=[], metavar="CHAMP=EN-TÊTE",
+                        help="Correspondance explicite d'un champ (répétable), ex. ttc='Montant TTC'")
+    parser.add_argument("--separateur", help="Séparateur CSV (détecté par défaut)")
+    parser.add_argument("--encodage", default="utf-8-sig", help="Encodage du fichier CSV")
+    parser.add_argument("--feuille", help="Feuille Excel à importer")
+    parser.add_argument("--profil", default=PROFIL_IMPORT, help="Profil de performance SQLite pendant l'import")
+    args = parser.parse_args()
+
+    correspondance = dict(option.split("=", 1) for option in args.colonne)
+    rapport = importer_fichier(
+        args.fichier, args.table, correspondance, DatabaseManager(args.db),
+        separateur=args.separateur, encodage=args.encodage, feuille=args.feuille, profil=args.profil,
+        progression=lambda n: print(f"{n} ligne(s) lue(s)..."),
+    )
+    for numero, message in rapport.erreurs:
+        print(f"Ligne {numero} : {message}")
+    print(rapport.resume())
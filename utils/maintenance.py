@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import time
+from database import DatabaseManager
+
+# Taille du journal WAL au-delà de laquelle il est reporté dans la base et tronqué
+SEUIL_WAL_MO = 4
+# Pages libres au-delà desquelles elles sont rendues au système (VACUUM incrémental)
+SEUIL_PAGES_LIBRES = 256
+# Pages libérées au plus par une maintenance en cours d'utilisation (toutes à la fermeture)
+PAGES_PAR_VACUUM = 2048
+# Inactivité de l'interface (sans clavier ni souris) après laquelle la maintenance est lancée
+DELAI_INACTIVITE_S = 300
+# Valeur de PRAGMA auto_vacuum pour le mode INCREMENTAL
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def etat_base(conn, db_file):
+    """
+    Mesures qui déclenchent la maintenance.
+    :return: dict {"wal_octets", "pages", "pages_libres", "taille_page", "auto_vacuum", "statistiques"}.
+    """
+    wal = f"{db_file}-wal"
+    return {
+        "wal_octets": os.path.getsize(wal) if os.path.exists(wal) else 0,
+        "pages": conn.execute("PRAGMA page_count").fetchone()[0],
+        "pages_libres": conn.execute("PRAGMA freelist_count").fetchone()[0],
+        "taille_page": conn.execute("PRAGMA page_size").fetchone()[0],
+        "auto_vacuum": conn.execute("PRAGMA auto_vacuum").fetchone()[0],
+        "statistiques": conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        ).fetchone()[0] > 0,
+    }
+
+
+def maintenir_base(db_manager=None, forcer=False):
+    """
+    Entretient la base sur la connexion d'écriture ; seules les opérations dont le seuil
+    est atteint sont exécutées :
+    - checkpoint : reporte le journal WAL dans la base et le tronque (SEUIL_WAL_MO) ;
+    - VACUUM incrémental : rend les pages libres au système (SEUIL_PAGES_LIBRES) ;
+    - ANALYZE : statistiques du planificateur si elles n'existent pas encore.
+    Avec forcer (fermeture de l'application), le checkpoint et PRAGMA optimize sont toujours
+    exécutés et toutes les pages libres sont rendues ; une base encore en auto_vacuum=NONE
+    est reconstruite une fois (voir reconstruire_base). La taille de page, propre au fichier,
+    n'est jamais une raison de reconstruire.
+    :return: Liste de (opération, durée en ms, détail), aussi affichée en console.
+    """
+    db = db_manager or DatabaseManager()
+    operations = []
+
+    def mesurer(nom, action):
+        debut = time.perf_counter()
+        detail = action()
+        operations.append((nom, (time.perf_counter() - debut) * 1000, detail))
+
+    with db.connexion_exclusive() as conn:
+        etat = etat_base(conn, db.db_file)
+    if forcer and etat["auto_vacuum"] != AUTO_VACUUM_INCREMENTAL:
+        try:
+            mesurer("vacuum", lambda: reconstruire_base(db))
+        except RuntimeError as e:
+            print(f"Maintenance vacuum reportée : {e}")
+    with db.connexion_exclusive() as conn:
+        etat = etat_base(conn, db.db_file)
+        if etat["auto_vacuum"] == AUTO_VACUUM_INCREMENTAL and etat["pages_libres"] > SEUIL_PAGES_LIBRES:
+            def liberer():
+                pages = etat["pages_libres"] if forcer else min(etat["pages_libres"], PAGES_PAR_VACUUM)
+                # executescript exécute le PRAGMA jusqu'au bout (execute ne libère qu'une page)
+                conn.executescript(f"PRAGMA incremental_vacuum({pages})")
+                return f"{etat['pages_libres'] - conn.execute('PRAGMA freelist_count').fetchone()[0]} page(s) libérée(s)"
+            mesurer("incremental_vacuum", liberer)
+        if not etat["statistiques"]:
+            def analyser():
+                conn.execute("ANALYZE")
+                return "statistiques créées"
+            mesurer("analyze", analyser)
+        elif forcer:
+            def optimiser():
+                conn.execute("PRAGMA optimize")
+                return ""
+            mesurer("optimize", optimiser)
+        if forcer or etat["wal_octets"] > SEUIL_WAL_MO * 1024 * 1024:
+            def checkpoint():
+                bloque = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0]
+                apres = etat_base(conn, db.db_file)["wal_octets"]
+                suite = " (lecture en cours)" if bloque else ""
+                return f"WAL {etat['wal_octets'] / 1e6:.1f} Mo -> {apres / 1e6:.1f} Mo{suite}"
+            mesurer("checkpoint", checkpoint)
+
+    for nom, duree, detail in operations:
+        print(f"Maintenance {nom} : {duree:.0f} ms {detail}".rstrip())
+    return operations
+
+
+def reconstruire_base(db, taille_page=None):
+    """
+    Reconstruit la base (VACUUM) en auto_vacuum=INCREMENTAL. La taille de page ne peut pas
+    changer en mode WAL : la base est suspendue (DatabaseManager.hors_ligne) et reconstruite
+    hors WAL, puis rouverte avec son profil.
+    :param taille_page: Nouvelle taille de page, None pour garder celle du fichier.
+    :return: Détail de l'opération.
+    """
+    with db.hors_ligne():
+        conn = sqlite3.connect(db.db_file)
+        try:
+            taille_actuelle = conn.execute("PRAGMA page_size").fetchone()[0]
+            taille_page = taille_page or taille_actuelle
+            avant = conn.execute("PRAGMA page_count").fetchone()[0] * taille_actuelle
+            conn.execute("PRAGMA journal_mode = DELETE")
+            conn.execute(f"PRAGMA page_size = {taille_page}")
+            conn.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+            conn.execute("VACUUM")
+            apres = conn.execute("PRAGMA page_count").fetchone()[0] * taille_page
+        finally:
+            conn.close()
+    return f"auto_vacuum=INCREMENTAL, pages de {taille_page} o, {avant / 1e6:.1f} Mo -> {apres / 1e6:.1f} Mo"
+
+
+if __name__ == "__main__":
+    import argparse
+    from constants import DB_CONFIG
+
+    parser = argparse.ArgumentParser(description="Maintenance de la base (checkpoint, ANALYZE, VACUUM).")
+    parser.add_argument("--db", default=DB_CONFIG["DEFAULT_PATH"], help="Chemin de la base de données")
+    parser.add_argument("--forcer", action="store_true", help="Maintenance complète, comme à la fermeture")
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    with db.connexion_exclusive() as conn:
+        print(etat_base(conn, db.db_file))
+    if not maintenir_base(db, forcer=args.forcer):
+        print("Aucune maintenance nécessaire.")